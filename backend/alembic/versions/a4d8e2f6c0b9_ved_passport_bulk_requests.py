@@ -0,0 +1,41 @@
+"""Идемпотентные запросы массового создания ВЭД паспортов
+
+Revision ID: a4d8e2f6c0b9
+Revises: f3a7c9e1b5d2
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d8e2f6c0b9'
+down_revision: Union[str, None] = 'f3a7c9e1b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ved_passport_bulk_requests',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('order_number', sa.String(), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('passport_ids', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('created_by', 'idempotency_key', name='uq_ved_bulk_requests_user_key')
+    )
+    op.create_index(op.f('ix_ved_passport_bulk_requests_id'), 'ved_passport_bulk_requests', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ved_passport_bulk_requests_id'), table_name='ved_passport_bulk_requests')
+    op.drop_table('ved_passport_bulk_requests')
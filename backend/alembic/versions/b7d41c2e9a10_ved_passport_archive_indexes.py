@@ -0,0 +1,52 @@
+"""Индексы архива ВЭД паспортов
+
+Revision ID: b7d41c2e9a10
+Revises: f461a92ad980
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41c2e9a10'
+down_revision: Union[str, None] = 'f461a92ad980'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Индексы из models.VedPassport.__table_args__
+BTREE_INDEXES = (
+    ("ix_ved_passports_created_at_id", "(created_at, id)"),
+    ("ix_ved_passports_created_by_created_at", "(created_by, created_at)"),
+    ("ix_ved_passports_status_created_at", "(status, created_at)"),
+    ("ix_ved_passports_nomenclature_id", "(nomenclature_id)"),
+    ("ix_ved_passports_passport_number_prefix", "(passport_number text_pattern_ops)"),
+    ("ix_ved_passports_order_number_prefix", "(order_number text_pattern_ops)"),
+)
+
+# Триграммные индексы для ILIKE '%term%' (нужно расширение pg_trgm)
+TRGM_INDEXES = (
+    ("ix_ved_passports_passport_number_trgm", "passport_number"),
+    ("ix_ved_passports_order_number_trgm", "order_number"),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, columns in BTREE_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON ved_passports {columns}")
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, column in TRGM_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON ved_passports USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in TRGM_INDEXES + BTREE_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,43 @@
+"""Индексы канонического ключа артикула
+
+Revision ID: c3e8f5a1d2b4
+Revises: b7d41c2e9a10
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f5a1d2b4'
+down_revision: Union[str, None] = 'b7d41c2e9a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Выражение совпадает с utils.nomenclature_matching.canonical_article_sql
+KEY_EXPRESSION = r"upper(regexp_replace({column}, '[\s./_-]+', '', 'g'))"
+
+# Индексы из models.MatchingNomenclature / models.ArticleMapping
+KEY_INDEXES = (
+    ("ix_matching_nomenclatures_agb_article_key", "matching_nomenclatures", "agb_article"),
+    ("ix_matching_nomenclatures_bl_article_key", "matching_nomenclatures", "bl_article"),
+    ("ix_article_mappings_contractor_article_key", "article_mappings", "contractor_article"),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, column in KEY_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table} (({KEY_EXPRESSION.format(column=column)}))"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in KEY_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
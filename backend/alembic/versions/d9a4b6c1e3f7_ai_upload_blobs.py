@@ -0,0 +1,53 @@
+"""Хранилище файлов ИИ-обработки по содержимому
+
+Revision ID: d9a4b6c1e3f7
+Revises: c3e8f5a1d2b4
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a4b6c1e3f7'
+down_revision: Union[str, None] = 'c3e8f5a1d2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ai_upload_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('extension', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index(op.f('ix_ai_upload_blobs_last_used_at'), 'ai_upload_blobs', ['last_used_at'], unique=False)
+    op.create_table(
+        'ai_processing_log_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('log_id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['log_id'], ['ai_processing_logs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['sha256'], ['ai_upload_blobs.sha256'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ai_processing_log_files_id'), 'ai_processing_log_files', ['id'], unique=False)
+    op.create_index(op.f('ix_ai_processing_log_files_log_id'), 'ai_processing_log_files', ['log_id'], unique=False)
+    op.create_index(op.f('ix_ai_processing_log_files_sha256'), 'ai_processing_log_files', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ai_processing_log_files_sha256'), table_name='ai_processing_log_files')
+    op.drop_index(op.f('ix_ai_processing_log_files_log_id'), table_name='ai_processing_log_files')
+    op.drop_index(op.f('ix_ai_processing_log_files_id'), table_name='ai_processing_log_files')
+    op.drop_table('ai_processing_log_files')
+    op.drop_index(op.f('ix_ai_upload_blobs_last_used_at'), table_name='ai_upload_blobs')
+    op.drop_table('ai_upload_blobs')
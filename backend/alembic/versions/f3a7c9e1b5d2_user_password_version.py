@@ -0,0 +1,26 @@
+"""Версия пароля пользователя для отзыва токенов
+
+Revision ID: f3a7c9e1b5d2
+Revises: e1b5c7d9f2a3
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a7c9e1b5d2'
+down_revision: Union[str, None] = 'e1b5c7d9f2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('password_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'password_version')
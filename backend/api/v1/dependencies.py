@@ -9,60 +9,60 @@ from typing import Optional
 from database import get_db
 from models import User
 from .shared.constants import SECRET_KEY, ALGORITHM
+from .shared.principal_cache import UserPrincipal, principal_cache, token_version
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
+def _resolve_principal(token: str, db: Session) -> Optional[UserPrincipal]:
+    """Декодирует JWT и возвращает снимок пользователя (из кэша или БД)"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        username: str = payload.get("sub")
+        if username is None:
+            return None
+    except JWTError:
+        return None
+
+    version = payload.get("ver")
+    principal = principal_cache.get(username, version)
+    if principal is not None:
+        return principal
+
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        return None
+    # Токен выпущен до смены пароля
+    if version is not None and version != token_version(user):
+        return None
+
+    principal = UserPrincipal.from_user(user)
+    principal_cache.set(username, version, principal)
+    return principal
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
+) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
+    principal = _resolve_principal(token, db)
+    if principal is None:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
-    
-    if user is None:
-        raise credentials_exception
-    return user
+    return principal
 
-def get_current_user_ws(token: str, db: Session) -> User:
+def get_current_user_ws(token: str, db: Session) -> UserPrincipal:
     """Версия get_current_user для WebSocket подключений"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401)
-    except JWTError:
-        raise HTTPException(status_code=401)
-    
-    user = db.query(User).filter(User.username == username).first()
-    
-    if user is None:
+    principal = _resolve_principal(token, db)
+    if principal is None:
         raise HTTPException(status_code=401)
-    return user
-    
+    return principal
+
 def get_current_user_optional(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> Optional[User]:
+) -> Optional[UserPrincipal]:
     """Получение текущего пользователя (опционально)"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-    except JWTError:
-        return None
-    
-    user = db.query(User).filter(User.username == username).first()
-    return user
\ No newline at end of file
+    return _resolve_principal(token, db)
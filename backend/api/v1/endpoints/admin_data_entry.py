@@ -1,17 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+import asyncio
+import os
+import shutil
+import tempfile
 from database import get_db
 from models import User, Department, Event, News, CompanyEmployee, VedPassport, ArticleSearchRequest
 from api.v1.dependencies import get_current_user
-from api.v1.schemas import APIResponse
-from passlib.context import CryptContext
+from api.v1.schemas import APIResponse, JobAcceptedResponse
+from api.v1.shared.password_hasher import get_password_hash
+from utils.jobs import JobContext, enqueue_sync, job_accepted, job_handler
+from utils.nomenclature_importer import NomenclatureImportProgress, import_nomenclature
 from datetime import datetime
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
 
 # Пользователи
 @router.post("/users", response_model=APIResponse)
@@ -247,6 +250,82 @@ def create_ved_passport(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Ошибка создания ВЭД паспорта: {str(e)}")
 
+# Номенклатура ВЭД: инкрементальный импорт из Excel фоновой задачей
+# Каталог общий для приложения и отдельного процесса-исполнителя задач
+NOMENCLATURE_IMPORT_DIR = os.getenv("NOMENCLATURE_IMPORT_DIR", "uploads/ved_nomenclature_import")
+
+
+def _remove_import_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@job_handler("nomenclature_import", max_attempts=1)
+async def nomenclature_import_job(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Импорт номенклатуры ВЭД; прогресс чтения и записи - в context.report"""
+    def on_progress(progress: NomenclatureImportProgress) -> None:
+        if progress.status == "applying" and progress.to_apply:
+            context.report(
+                10 + 90 * progress.applied / progress.to_apply,
+                f"Записано {progress.applied} из {progress.to_apply}"
+            )
+        else:
+            context.report(5, f"Прочитано строк: {progress.total_rows}")
+
+    path = payload["path"]
+    progress = NomenclatureImportProgress(on_progress=on_progress)
+    try:
+        await asyncio.to_thread(
+            import_nomenclature, path, payload.get("sheet"),
+            payload.get("deactivate_missing", False), payload.get("dry_run", False), progress
+        )
+    except asyncio.CancelledError:
+        # При остановке исполнителя задача вернётся в очередь - файл ещё нужен
+        if context.cancel_requested:
+            _remove_import_file(path)
+        raise
+    _remove_import_file(path)
+    context.check_cancelled()
+    if progress.status == "failed":
+        raise RuntimeError(progress.error)
+    return progress.as_dict()
+
+
+@router.post("/ved-nomenclature/import", response_model=JobAcceptedResponse, status_code=202)
+def start_ved_nomenclature_import(
+    file: UploadFile = File(...),
+    sheet: Optional[str] = Form(None),
+    deactivate_missing: bool = Form(False),
+    dry_run: bool = Form(False),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Запуск импорта номенклатуры ВЭД; прогресс - GET /api/v1/jobs/{job_id}"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    if not file.filename.endswith('.xlsx'):
+        raise HTTPException(status_code=400, detail="Поддерживаются только файлы .xlsx")
+    
+    # Загрузка закрывается после ответа, поэтому копируем её в каталог импорта
+    os.makedirs(NOMENCLATURE_IMPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="ved_nomenclature_", suffix=".xlsx", dir=NOMENCLATURE_IMPORT_DIR)
+    with os.fdopen(fd, "wb") as tmp:
+        shutil.copyfileobj(file.file, tmp)
+    
+    try:
+        job = enqueue_sync(
+            db,
+            "nomenclature_import",
+            {"path": path, "sheet": sheet, "deactivate_missing": deactivate_missing, "dry_run": dry_run},
+            user_id=current_user.id
+        )
+    except Exception:
+        _remove_import_file(path)
+        raise
+    return job_accepted(job, message="Импорт номенклатуры запущен", dry_run=dry_run)
+
 # Запросы поиска статей
 @router.post("/article-search-requests", response_model=APIResponse)
 def create_article_search_request(
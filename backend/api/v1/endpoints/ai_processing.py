@@ -3,32 +3,29 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 import os
-import json
 import uuid
 import time
 import asyncio
 from pathlib import Path
 
-# Импорты для обработки файлов
-import pandas as pd
-import PyPDF2
-from PIL import Image
-import pytesseract
-import openai
-import requests
-import docx
-import pptx
-from docx import Document
-from pptx import Presentation
-
+from database import SessionLocal
 from ..dependencies import get_db, get_current_user
-from models import ApiKey, AiProcessingLog, User, MatchingNomenclature
-from ..schemas import AIMatchingResponse, MatchingResult
+from models import ApiKey, AiProcessingLog, User
+from ..schemas import AIMatchingResponse, JobAcceptedResponse, MatchingResult
+from utils.ai_article_extraction import extract_articles, parse_quantity
+from utils.ai_gateway import AiUsage, ai_gateway
+from utils.blob_store import ai_upload_store
+from utils.nomenclature_matching import NomenclatureMatch, canonical_article, lookup_exact, match_batch
+from utils.jobs import JobContext, enqueue_sync, job_accepted, job_handler
+from utils.ocr import ocr_client
+from utils.structured_order import format_order_lines, read_order_rows
+from utils.text_extraction import text_extraction_pool
+from utils.upload_ingest import IngestedUpload
 
 router = APIRouter()
 
-# Настройки для обработки файлов
-UPLOAD_DIR = Path("uploads/ai_processing")
+# Настройки для обработки файлов (хранилище по содержимому, utils.blob_store)
+UPLOAD_DIR = ai_upload_store.root
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 ALLOWED_EXTENSIONS = {
@@ -49,144 +46,34 @@ def is_allowed_file(filename: str) -> bool:
     ext = get_file_extension(filename)
     return any(ext in extensions for extensions in ALLOWED_EXTENSIONS.values())
 
-async def extract_text_from_pdf(file_path: str) -> str:
-    """Извлечь текст из PDF файла"""
-    try:
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        raise Exception(f"Ошибка извлечения текста из PDF: {str(e)}")
+async def extract_text_from_file(file_path: str, filename: str, content_hash: Optional[str] = None) -> str:
+    """Извлечь текст из файла в зависимости от его типа
 
-async def extract_text_from_excel(file_path: str) -> str:
-    """Извлечь текст из Excel файла"""
-    try:
-        ext = get_file_extension(file_path)
-        if ext == '.csv':
-            df = pd.read_csv(file_path, encoding='utf-8')
-        else:
-            df = pd.read_excel(file_path)
-        
-        # Преобразуем DataFrame в текст
-        text = ""
-        for column in df.columns:
-            text += f"{column}: "
-            text += " ".join([str(val) for val in df[column].dropna().tolist()]) + "\n"
-        
-        return text
-    except Exception as e:
-        raise Exception(f"Ошибка извлечения текста из Excel: {str(e)}")
+    Документы разбираются в пуле процессов (utils.text_extraction),
+    изображения и PDF без текстового слоя (сканы) распознаются OCR.
+    Текст сохраняется рядом с файлом в хранилище: повторная загрузка
+    того же содержимого не разбирается заново.
+    """
+    if content_hash:
+        cached = await asyncio.to_thread(ai_upload_store.read_text, content_hash)
+        if cached is not None:
+            return cached
 
-async def extract_text_from_image(file_path: str) -> str:
-    """Извлечь текст из изображения с помощью OCR сервиса"""
-    try:
-        # Используем OCR сервис
-        ocr_url = os.getenv('OCR_SERVICE_URL', 'http://localhost:8001')
-        
-        with open(file_path, 'rb') as f:
-            files = {'file': f}
-            response = requests.post(f"{ocr_url}/ocr/", files=files)
-            response.raise_for_status()
-            
-        result = response.json()
-        if result.get('success'):
-            return result.get('text', '')
-        else:
-            raise Exception("OCR сервис вернул ошибку")
-            
-    except requests.RequestException as e:
-        # Fallback на локальный Tesseract если OCR сервис недоступен
-        try:
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(image, lang='rus+eng')
-            return text
-        except Exception as fallback_error:
-            raise Exception(f"Ошибка OCR обработки: {str(e)}, Fallback: {str(fallback_error)}")
-    except Exception as e:
-        raise Exception(f"Ошибка OCR обработки: {str(e)}")
-
-async def extract_text_from_word(file_path: str) -> str:
-    """Извлечь текст из Word документа"""
-    try:
-        doc = Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
-    except Exception as e:
-        raise Exception(f"Ошибка извлечения текста из Word: {str(e)}")
-
-async def extract_text_from_powerpoint(file_path: str) -> str:
-    """Извлечь текст из PowerPoint презентации"""
-    try:
-        prs = Presentation(file_path)
-        text = ""
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    text += shape.text + "\n"
-        return text.strip()
-    except Exception as e:
-        raise Exception(f"Ошибка извлечения текста из PowerPoint: {str(e)}")
-
-async def extract_text_from_text_file(file_path: str) -> str:
-    """Извлечь текст из текстового файла"""
-    try:
-        # Пробуем разные кодировки
-        encodings = ['utf-8', 'cp1251', 'latin-1', 'iso-8859-1']
-        text = ""
-        
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as file:
-                    text = file.read()
-                break
-            except UnicodeDecodeError:
-                continue
-        
-        if not text:
-            # Если все кодировки не сработали, читаем как бинарный файл
-            with open(file_path, 'rb') as file:
-                content = file.read()
-                text = content.decode('utf-8', errors='ignore')
-        
-        return text.strip()
-    except Exception as e:
-        raise Exception(f"Ошибка извлечения текста из текстового файла: {str(e)}")
-
-async def extract_text_from_file(file_path: str, filename: str) -> str:
-    """Извлечь текст из файла в зависимости от его типа"""
     ext = get_file_extension(filename)
-    
-    if ext in ALLOWED_EXTENSIONS['pdf']:
-        return await extract_text_from_pdf(file_path)
-    elif ext in ALLOWED_EXTENSIONS['excel']:
-        return await extract_text_from_excel(file_path)
-    elif ext in ALLOWED_EXTENSIONS['word']:
-        return await extract_text_from_word(file_path)
-    elif ext in ALLOWED_EXTENSIONS['powerpoint']:
-        return await extract_text_from_powerpoint(file_path)
-    elif ext in ALLOWED_EXTENSIONS['text']:
-        return await extract_text_from_text_file(file_path)
-    elif ext in ALLOWED_EXTENSIONS['images']:
-        return await extract_text_from_image(file_path)
+    if ext in ALLOWED_EXTENSIONS['images']:
+        text = await ocr_client.recognize(file_path)
     else:
-        raise Exception(f"Неподдерживаемый тип файла: {ext}")
+        text = await text_extraction_pool.extract(file_path, filename, content_hash)
+        if ext in ALLOWED_EXTENSIONS['pdf'] and not text.strip():
+            text = await ocr_client.recognize(file_path)
 
-async def get_ai_response(text: str, api_key: str, provider: str) -> str:
-    """Получить ответ от ИИ"""
-    try:
-        if provider == 'openai':
-            openai.api_key = api_key
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """Ты - эксперт по сопоставлению артикулов. 
+    if content_hash:
+        await asyncio.to_thread(ai_upload_store.write_text, content_hash, text)
+    return text
+
+AI_OPENAI_MODEL = os.getenv("AI_OPENAI_MODEL", "gpt-3.5-turbo")
+
+ARTICLE_EXTRACTION_PROMPT = """Ты - эксперт по сопоставлению артикулов. 
                         Проанализируй предоставленный текст и найди все артикулы, описания товаров и количества.
                         Верни результат в формате JSON с полями:
                         - contractor_article: артикул контрагента
@@ -203,101 +90,235 @@ async def get_ai_response(text: str, api_key: str, provider: str) -> str:
                                 "unit": "шт"
                             }
                         ]"""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Проанализируй этот текст и найди артикулы:\n\n{text}"
-                    }
-                ]
+
+async def get_ai_response(text: str, api_key: str, provider: str, usage: Optional[AiUsage] = None):
+    """Получить ответ от ИИ через общий шлюз (utils.ai_gateway)"""
+    try:
+        if provider == 'openai':
+            return await ai_gateway.chat_completion(
+                'openai',
+                api_key,
+                [
+                    {"role": "system", "content": ARTICLE_EXTRACTION_PROMPT},
+                    {"role": "user", "content": f"Проанализируй этот текст и найди артикулы:\n\n{text}"}
+                ],
+                model=AI_OPENAI_MODEL,
+                usage=usage
             )
-            return response.choices[0].message.content
         elif provider == 'polza':
             # Интеграция с Polza.ai
-            headers = {
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            }
-            data = {
-                'text': text,
-                'task': 'extract_articles'
-            }
-            response = requests.post('https://api.polza.ai/v1/analyze', headers=headers, json=data)
-            response.raise_for_status()
-            return response.json()
+            return await ai_gateway.post_json(
+                'polza', '/v1/analyze', api_key, {'text': text, 'task': 'extract_articles'}, usage
+            )
         else:
             raise Exception(f"Неподдерживаемый провайдер: {provider}")
     except Exception as e:
         raise Exception(f"Ошибка получения ответа от ИИ: {str(e)}")
 
+def matched_result(article: dict, match: NomenclatureMatch) -> MatchingResult:
+    """Результат сопоставления позиции с найденной номенклатурой"""
+    nomenclature = match.nomenclature
+    # В номенклатуре сопоставления нет коэффициента фасовки - количество не пересчитывается
+    packaging_factor = 1.0
+    return MatchingResult(
+        id=str(uuid.uuid4()),
+        contractor_article=article.get('contractor_article', ''),
+        description=article.get('description') or nomenclature.agb_description or '',
+        matched=True,
+        agb_article=nomenclature.agb_article,
+        bl_article=nomenclature.bl_article,
+        match_confidence=match.confidence,
+        packaging_factor=packaging_factor,
+        recalculated_quantity=parse_quantity(article.get('quantity', 0)) * packaging_factor,
+        nomenclature={
+            'id': nomenclature.id,
+            'name': nomenclature.agb_description,
+            'article': nomenclature.agb_article
+        },
+        search_type=match.search_type
+    )
+
 async def match_articles_with_database(articles: List[dict], db: Session) -> List[MatchingResult]:
-    """Сопоставить найденные артикулы с базой данных"""
+    """Сопоставить найденные артикулы с базой данных
+
+    Все позиции сопоставляются пакетно (utils.nomenclature_matching.match_batch):
+    несколько запросов на весь список вместо двух ILIKE на каждую позицию.
+    """
+    matches = await asyncio.to_thread(match_batch, db, articles) if articles else []
     results = []
-    
-    for article in articles:
-        contractor_article = article.get('contractor_article', '')
-        description = article.get('description', '')
-        
-        # Поиск в базе данных по артикулу
-        nomenclature = db.query(MatchingNomenclature).filter(
-            MatchingNomenclature.agb_article.ilike(f"%{contractor_article}%")
-        ).first()
-        
-        if not nomenclature:
-            # Поиск по описанию
-            nomenclature = db.query(MatchingNomenclature).filter(
-                MatchingNomenclature.name.ilike(f"%{description}%")
-            ).first()
-        
-        if nomenclature:
-            # Вычисляем уверенность сопоставления
-            confidence = 0
-            if contractor_article.lower() in nomenclature.agb_article.lower():
-                confidence += 50
-            if any(word in nomenclature.name.lower() for word in description.lower().split()):
-                confidence += 30
-            if nomenclature.bl_article and contractor_article.lower() in nomenclature.bl_article.lower():
-                confidence += 20
-            
-            confidence = min(confidence, 100)
-            
-            results.append(MatchingResult(
-                id=str(uuid.uuid4()),
-                contractor_article=contractor_article,
-                description=description,
-                matched=True,
-                agb_article=nomenclature.agb_article,
-                bl_article=nomenclature.bl_article,
-                match_confidence=confidence,
-                packaging_factor=nomenclature.packaging or 1.0,
-                recalculated_quantity=article.get('quantity', 0) * (nomenclature.packaging or 1.0),
-                nomenclature={
-                    'id': nomenclature.id,
-                    'name': nomenclature.name,
-                    'code_1c': nomenclature.code_1c,
-                    'article': nomenclature.agb_article
-                }
-            ))
+    for article, match in zip(articles, matches):
+        if match:
+            results.append(matched_result(article, match))
         else:
             results.append(MatchingResult(
                 id=str(uuid.uuid4()),
-                contractor_article=contractor_article,
-                description=description,
+                contractor_article=article.get('contractor_article', ''),
+                description=article.get('description', ''),
                 matched=False,
                 match_confidence=0
             ))
-    
     return results
 
-@router.post("/ai-process/", response_model=AIMatchingResponse)
+def decrypt_api_key(api_key_obj: ApiKey) -> str:
+    """Расшифровать ключ ИИ-сервиса"""
+    from cryptography.fernet import Fernet
+    encryption_key = os.getenv('API_KEY_ENCRYPTION_KEY', Fernet.generate_key())
+    cipher_suite = Fernet(encryption_key)
+    return cipher_suite.decrypt(api_key_obj.key.encode()).decode()
+
+async def run_ai_processing(
+    db: Session,
+    log: AiProcessingLog,
+    api_key_obj: ApiKey,
+    decrypted_key: str,
+    message: str,
+    saved_files: List[IngestedUpload],
+    context: Optional[JobContext] = None
+) -> AIMatchingResponse:
+    """Разбор файлов, запрос к ИИ и сопоставление; результат пишется в лог"""
+    start_time = time.time()
+    report = context.report if context else (lambda percent, message=None: None)
+
+    # Токены и время ответа ИИ по всем частям запроса
+    usage = AiUsage()
+    try:
+        # Источники текста для ИИ: (заголовок, текст); части каждого режутся отдельно
+        sections = [("--- Сообщение пользователя ---", message)] if message else []
+        file_refs = [{"filename": upload.filename, "sha256": upload.sha256} for upload in saved_files]
+
+        # Табличные заявки с колонкой артикула разбираем без ИИ
+        report(5, "Разбор таблиц")
+        order_rows = await asyncio.gather(
+            *[
+                asyncio.to_thread(read_order_rows, upload.path, upload.filename)
+                if upload.extension in ALLOWED_EXTENSIONS['excel'] else asyncio.sleep(0)
+                for upload in saved_files
+            ],
+            return_exceptions=True
+        )
+        structured_rows = []
+        unstructured_files = []
+        for upload, rows in zip(saved_files, order_rows):
+            if isinstance(rows, BaseException):
+                print(f"Ошибка чтения таблицы {upload.filename}: {str(rows)}")
+                rows = None
+            if rows is None:
+                unstructured_files.append(upload)
+            else:
+                structured_rows.extend(rows)
+
+        # Точные совпадения по номенклатуре и сохранённым соответствиям
+        local_results = []
+        unmatched_rows = []
+        if structured_rows:
+            exact = await asyncio.to_thread(lookup_exact, db, [row["contractor_article"] for row in structured_rows])
+            for row in structured_rows:
+                match = exact.get(canonical_article(row['contractor_article']))
+                if match:
+                    local_results.append(matched_result(row, match))
+                else:
+                    unmatched_rows.append(row)
+
+        # Извлекаем текст из остальных файлов параллельно
+        report(20, "Извлечение текста из файлов")
+        file_texts = await asyncio.gather(
+            *[extract_text_from_file(upload.path, upload.filename, upload.sha256) for upload in unstructured_files],
+            return_exceptions=True
+        )
+        for upload, file_text in zip(unstructured_files, file_texts):
+            if isinstance(file_text, BaseException):
+                print(f"Ошибка обработки файла {upload.filename}: {str(file_text)}")
+                continue
+            sections.append((f"--- Содержимое файла {upload.filename} ---", file_text))
+        if unmatched_rows:
+            sections.append(("--- Позиции без точного совпадения ---", format_order_lines(unmatched_rows)))
+
+        # ИИ нужен, только если остались несопоставленные строки или нетабличные файлы
+        articles, ai_response, failed_chunks = [], [], 0
+        ai_skipped = bool(structured_rows) and not unmatched_rows and not unstructured_files
+        if not ai_skipped:
+            # Длинный текст обрабатывается частями параллельно
+            report(45, "Запрос к ИИ")
+            articles, ai_response, failed_chunks = await extract_articles(
+                sections,
+                api_key_obj.provider,
+                lambda chunk: get_ai_response(chunk, decrypted_key, api_key_obj.provider, usage)
+            )
+
+        # Сопоставляем с базой данных
+        report(85, "Сопоставление с номенклатурой")
+        matching_results = local_results + await match_articles_with_database(articles, db)
+
+        # Обновляем лог
+        processing_time = time.time() - start_time
+        log.success = True
+        log.error_message = None
+        log.output_data = {
+            "ai_response": ai_response,
+            "articles_count": len(matching_results),
+            "matched_locally": len(local_results),
+            "ai_skipped": ai_skipped,
+            "failed_chunks": failed_chunks,
+            "files": file_refs,
+            "usage": usage.as_dict(),
+        }
+        log.processing_time = processing_time
+        db.commit()
+        
+        # Обновляем время последнего использования API ключа
+        api_key_obj.last_used = datetime.utcnow()
+        db.commit()
+        
+        message = f"Обработано {len(matching_results)} позиций. Найдено совпадений: {len([r for r in matching_results if r.matched])}"
+        if failed_chunks:
+            # Часть текста ИИ не обработал - позиции из неё в результат не попали
+            message += f". Внимание: не удалось обработать частей текста: {failed_chunks}, результат может быть неполным"
+        return AIMatchingResponse(
+            message=message,
+            matching_results=matching_results,
+            processing_time=processing_time,
+            status='partial' if failed_chunks else 'success'
+        )
+        
+    except Exception as e:
+        # Обновляем лог с ошибкой
+        db.rollback()
+        log.success = False
+        log.error_message = str(e)
+        log.output_data = {"usage": usage.as_dict()}
+        log.processing_time = time.time() - start_time
+        db.commit()
+        raise
+
+@job_handler("ai_processing", priority=10, max_attempts=2)
+async def ai_processing_job(context: JobContext, payload: dict) -> dict:
+    """Фоновая ИИ-обработка запроса /ai-process/"""
+    with SessionLocal() as db:
+        log = db.get(AiProcessingLog, payload["log_id"])
+        api_key_obj = db.get(ApiKey, payload["api_key_id"])
+        if log is None or api_key_obj is None:
+            raise RuntimeError("Лог обработки или API ключ удалены")
+        saved_files = [IngestedUpload(temporary=False, **file) for file in payload.get("files", [])]
+        missing = [upload.filename for upload in saved_files if not os.path.exists(upload.path)]
+        if missing:
+            raise RuntimeError(f"Файлы не найдены в хранилище: {', '.join(missing)}")
+        response = await run_ai_processing(
+            db, log, api_key_obj, decrypt_api_key(api_key_obj), payload.get("message", ""), saved_files, context
+        )
+        return response.model_dump(mode="json")
+
+@router.post("/ai-process/", response_model=JobAcceptedResponse, status_code=202)
 async def process_ai_request(
     message: str = Form(...),
     files: List[UploadFile] = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Обработать запрос к ИИ-агенту"""
-    start_time = time.time()
-    
+    """Поставить запрос к ИИ-агенту в очередь
+
+    Файлы сохраняются сразу, обработка выполняется фоновой задачей;
+    результат (AIMatchingResponse) - в GET /api/v1/jobs/{job_id}.
+    """
     # Получаем активный API ключ
     api_key_obj = db.query(ApiKey).filter(
         ApiKey.is_active == True,
@@ -307,101 +328,55 @@ async def process_ai_request(
     if not api_key_obj:
         raise HTTPException(status_code=400, detail="Нет активного API ключа для ИИ-сервиса")
     
-    # Расшифровываем ключ
+    # Проверяем, что ключ расшифровывается, до постановки задачи
     try:
-        from cryptography.fernet import Fernet
-        encryption_key = os.getenv('API_KEY_ENCRYPTION_KEY', Fernet.generate_key())
-        cipher_suite = Fernet(encryption_key)
-        decrypted_key = cipher_suite.decrypt(api_key_obj.key.encode()).decode()
-    except Exception as e:
+        decrypt_api_key(api_key_obj)
+    except Exception:
         raise HTTPException(status_code=500, detail="Ошибка расшифровки API ключа")
+
+    for file in files:
+        if not is_allowed_file(file.filename):
+            raise HTTPException(status_code=400, detail=f"Неподдерживаемый тип файла: {file.filename}")
     
     # Создаем лог обработки
     log = AiProcessingLog(
         user_id=current_user.id,
-        api_key_id=api_key_obj.id,
         request_type='file_upload' if files else 'text_input',
-        input_text=message,
-        status='processing'
+        input_data={"message": message, "api_key_id": api_key_obj.id, "provider": api_key_obj.provider},
+        success=False
     )
     db.add(log)
     db.commit()
     
     try:
-        # Обрабатываем файлы
-        extracted_text = message
-        file_paths = []
-        
-        for file in files:
-            if not is_allowed_file(file.filename):
-                raise HTTPException(status_code=400, detail=f"Неподдерживаемый тип файла: {file.filename}")
-            
-            # Сохраняем файл
-            file_id = str(uuid.uuid4())
-            file_path = UPLOAD_DIR / f"{file_id}_{file.filename}"
-            
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            
-            file_paths.append(str(file_path))
-            
-            # Извлекаем текст из файла
-            try:
-                file_text = await extract_text_from_file(str(file_path), file.filename)
-                extracted_text += f"\n\n--- Содержимое файла {file.filename} ---\n{file_text}"
-            except Exception as e:
-                print(f"Ошибка обработки файла {file.filename}: {str(e)}")
-                continue
-        
-        # Получаем ответ от ИИ
-        ai_response = await get_ai_response(extracted_text, decrypted_key, api_key_obj.provider)
-        
-        # Парсим ответ ИИ
-        try:
-            if api_key_obj.provider == 'openai':
-                articles = json.loads(ai_response)
-            else:
-                articles = ai_response.get('articles', [])
-        except json.JSONDecodeError:
-            # Если не удалось распарсить JSON, создаем простой ответ
-            articles = [{
-                'contractor_article': 'Не удалось извлечь',
-                'description': 'Ошибка парсинга ответа ИИ',
-                'quantity': 0,
-                'unit': 'шт'
-            }]
-        
-        # Сопоставляем с базой данных
-        matching_results = await match_articles_with_database(articles, db)
-        
-        # Обновляем лог
-        processing_time = time.time() - start_time
-        log.status = 'success'
-        log.ai_response = json.dumps(ai_response)
-        log.processing_time = processing_time
-        log.file_path = ','.join(file_paths) if file_paths else None
-        db.commit()
-        
-        # Обновляем время последнего использования API ключа
-        api_key_obj.last_used = datetime.utcnow()
+        # Потоково, один раз на содержимое (SHA-256); лог ссылается на файлы хранилища
+        saved_files = [await ai_upload_store.ingest(file) for file in files]
+        ai_upload_store.register(db, log.id, saved_files)
         db.commit()
-        
-        return AIMatchingResponse(
-            message=f"Обработано {len(articles)} позиций. Найдено совпадений: {len([r for r in matching_results if r.matched])}",
-            matching_results=matching_results,
-            processing_time=processing_time,
-            status='success'
-        )
-        
     except Exception as e:
-        # Обновляем лог с ошибкой
-        log.status = 'error'
+        db.rollback()
+        log.success = False
         log.error_message = str(e)
-        log.processing_time = time.time() - start_time
         db.commit()
-        
-        raise HTTPException(status_code=500, detail=f"Ошибка обработки: {str(e)}")
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Ошибка сохранения файлов: {str(e)}")
+
+    job = enqueue_sync(
+        db,
+        "ai_processing",
+        {
+            "log_id": log.id,
+            "api_key_id": api_key_obj.id,
+            "message": message,
+            "files": [
+                {"path": upload.path, "filename": upload.filename, "sha256": upload.sha256, "size": upload.size}
+                for upload in saved_files
+            ],
+        },
+        user_id=current_user.id
+    )
+    return job_accepted(job, log_id=log.id)
 
 @router.get("/ai-logs/")
 async def get_ai_logs(
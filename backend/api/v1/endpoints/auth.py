@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from typing import Optional
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_db, get_async_db
 from models import User
 from ..dependencies import get_current_user
 from ..shared.constants import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-from ..shared.utils import verify_password
+from ..shared.password_hasher import verify_and_update_async, verify_password_async, get_password_hash_async
+from ..shared.principal_cache import invalidate_user, token_version
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
@@ -31,15 +34,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 @router.post("/login")
-def login(
+async def login(
     login_data: LoginData,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Вход в систему"""
     print(f"👤 Попытка входа для пользователя: {login_data.username}")
     
     # Ищем пользователя
-    user = db.query(User).filter(User.username == login_data.username).first()
+    result = await db.execute(select(User).where(User.username == login_data.username))
+    user = result.scalars().first()
     
     if not user:
         print(f"❌ Пользователь не найден: {login_data.username}")
@@ -49,8 +53,9 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Проверяем пароль
-    if not verify_password(login_data.password, user.hashed_password):
+    # Проверяем пароль (с перехешированием при смене work factor)
+    is_valid, new_hash = await verify_and_update_async(login_data.password, user.hashed_password)
+    if not is_valid:
         print(f"❌ Неверный пароль для пользователя: {login_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -58,12 +63,20 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if new_hash:
+        # Версия токенов не меняется: сессии на других устройствах остаются
+        user.hashed_password = new_hash
+        await db.commit()
+        await db.refresh(user)
+        invalidate_user(user_id=user.id, username=user.username)
+    
     print(f"✅ Успешный вход для пользователя: {login_data.username}")
     
     # Создаем токен
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "ver": token_version(user)},
+        expires_delta=access_token_expires
     )
     
     return {
@@ -87,8 +100,19 @@ def login(
     }
 
 @router.get("/me")
-def read_users_me(current_user: User = Depends(get_current_user)):
+def read_users_me(
+    principal: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Получение информации о текущем пользователе"""
+    # Кэш хранит только облегчённый снимок - профиль читаем целиком
+    current_user = db.query(User).filter(User.id == principal.id).first()
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return {
         "id": current_user.id,
         "username": current_user.username,
@@ -106,9 +130,12 @@ def read_users_me(current_user: User = Depends(get_current_user)):
     }
 
 @router.get("/profile")
-def get_profile(current_user: User = Depends(get_current_user)):
+def get_profile(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Получение профиля пользователя (алиас для /me)"""
-    return read_users_me(current_user)
+    return read_users_me(current_user, db)
 
 @router.post("/logout")
 async def logout():
@@ -120,14 +147,14 @@ class ChangePasswordData(BaseModel):
     new_password: str
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     password_data: ChangePasswordData,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Смена пароля"""
     # Получаем пользователя из токена
-    current_user = get_current_user_optional(token, db)
+    current_user = await _get_user_by_token(token, db)
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -135,24 +162,38 @@ def change_password(
         )
     
     # Проверяем текущий пароль
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Неверный текущий пароль"
         )
     
     # Хешируем новый пароль
-    from ..shared.utils import get_password_hash
-    new_hashed_password = get_password_hash(password_data.new_password)
+    new_hashed_password = await get_password_hash_async(password_data.new_password)
     
-    # Обновляем пароль в базе данных
+    # Обновляем пароль в базе данных; новая версия отзывает выданные токены
     current_user.hashed_password = new_hashed_password
     current_user.is_password_changed = True
-    db.commit()
+    current_user.password_version = (current_user.password_version or 0) + 1
+    await db.commit()
+    invalidate_user(user_id=current_user.id, username=current_user.username)
     print(f"✅ Пароль успешно изменен для пользователя {current_user.username}")
     
     return {"message": "Пароль успешно изменен"}
 
+async def _get_user_by_token(token: str, db: AsyncSession) -> Optional[User]:
+    """Пользователь из токена (асинхронная версия get_current_user_optional)"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        username: str = payload.get("sub")
+        if username is None:
+            return None
+    except JWTError:
+        return None
+
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
 def get_current_user_optional(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import selectinload
 from typing import List
 from datetime import datetime
 
-from database import get_db
+from database import get_db, get_async_db
 from models import ChatRoom, ChatMessage, ChatParticipant, User, ChatBot
 from ..dependencies import get_current_user
 from ..schemas import (
@@ -23,14 +24,14 @@ router = APIRouter()
 
 @router.get("/rooms/", response_model=List[ChatRoomSchema])
 @router.get("/rooms", response_model=List[ChatRoomSchema])
-def get_chat_rooms(
+async def get_chat_rooms(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка чат-комнат пользователя"""
     try:
         # Получаем все активные чаты, где пользователь является участником
-        result = db.execute(
+        result = await db.execute(
             select(ChatRoom)
             .join(ChatParticipant, ChatRoom.id == ChatParticipant.room_id)
             .where(
@@ -87,14 +88,14 @@ def create_chat_room(
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
 @router.get("/rooms/{room_id}", response_model=ChatRoomSchema)
-def get_chat_room(
+async def get_chat_room(
     room_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение информации о чат-комнате"""
     try:
-        result = db.execute(
+        result = await db.execute(
             select(ChatRoom)
             .join(ChatParticipant)
             .where(
@@ -121,15 +122,15 @@ def get_chat_room(
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
 @router.get("/rooms/{room_id}/messages/", response_model=List[ChatMessageSchema])
-def get_chat_messages(
+async def get_chat_messages(
     room_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение сообщений чат-комнаты"""
     try:
         # Проверяем, что пользователь является участником чата
-        result = db.execute(
+        result = await db.execute(
             select(ChatParticipant).where(
                 and_(
                     ChatParticipant.room_id == room_id,
@@ -143,7 +144,7 @@ def get_chat_messages(
             raise HTTPException(status_code=403, detail="Доступ к чату запрещен")
         
         # Получаем сообщения
-        result = db.execute(
+        result = await db.execute(
             select(ChatMessage)
             .where(ChatMessage.room_id == room_id)
             .order_by(ChatMessage.created_at.desc())
@@ -12,7 +12,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
-from database import get_db
+from database import get_db, get_read_db
 from models import User, Event, News
 from api.v1.endpoints.auth import get_current_user
 
@@ -48,7 +48,7 @@ def debug_users(db: Session = Depends(get_db)):
 
 @router.get("/admin/dashboard/stats")
 def get_admin_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить статистику для дашборда администратора"""
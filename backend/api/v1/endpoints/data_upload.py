@@ -5,13 +5,14 @@ API endpoints для загрузки данных сопоставления с
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
-import pandas as pd
-import io
+import itertools
 import json
 from datetime import datetime
 
 from database import SessionLocal
 from models import User, ArticleSearchRequest, ArticleSearchResult
+from utils.tabular_reader import read_batches
+from utils.upload_ingest import ingest_upload
 from .auth import get_current_user
 from ..schemas import APIResponse
 
@@ -35,23 +36,22 @@ async def upload_articles_data(
     if current_user.role not in ["admin", "manager", "employee"]:
         raise HTTPException(status_code=403, detail="Доступ запрещен")
     
+    upload = None
     try:
         # Проверяем тип файла
         if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
             raise HTTPException(status_code=400, detail="Поддерживаются только файлы CSV и Excel")
         
-        # Читаем файл
-        contents = await file.read()
+        # Потоково сохраняем файл на диск
+        upload = await ingest_upload(file)
         
-        # Определяем тип файла и читаем данные
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        else:  # Excel файл
-            df = pd.read_excel(io.BytesIO(contents))
+        # Читаем файл порциями (CSV или Excel по расширению)
+        batches = read_batches(upload.path, file.filename)
+        first_batch = next(batches)
         
         # Проверяем обязательные колонки
         required_columns = ['article_name', 'description', 'category']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        missing_columns = [col for col in required_columns if col not in first_batch.columns]
         if missing_columns:
             raise HTTPException(
                 status_code=400, 
@@ -60,9 +60,11 @@ async def upload_articles_data(
         
         # Обрабатываем данные
         uploaded_count = 0
+        total_rows = 0
         errors = []
         
-        for index, row in df.iterrows():
+        for index, row in (item for batch in itertools.chain([first_batch], batches) for item in batch.iterrows()):
+            total_rows += 1
             try:
                 # Создаем запрос на поиск
                 search_request = ArticleSearchRequest(
@@ -108,7 +110,7 @@ async def upload_articles_data(
             message=f"Успешно загружено {uploaded_count} статей",
             data={
                 "uploaded_count": uploaded_count,
-                "total_rows": len(df),
+                "total_rows": total_rows,
                 "errors": errors[:10],  # Показываем только первые 10 ошибок
                 "file_name": file.filename,
                 "description": description
@@ -120,6 +122,9 @@ async def upload_articles_data(
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Ошибка обработки файла: {str(e)}")
+    finally:
+        if upload is not None:
+            upload.cleanup()
 
 @router.get("/upload-history", response_model=APIResponse)
 def get_upload_history(
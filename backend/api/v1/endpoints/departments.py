@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import List
 import os
 
-from database import get_db
+from database import get_db, get_async_db
 from models import Department, User, UserRole
 from ..schemas import Department as DepartmentSchema, DepartmentList, DepartmentCreate, DepartmentUpdate
 from .auth import get_current_user
@@ -62,15 +63,15 @@ def count_departments(db: Session = Depends(get_db)):
 
 
 @router.get("/list", response_model=DepartmentList)
-def get_departments(
-    db: Session = Depends(get_db)
+async def get_departments(
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка отделов"""
     try:
         # Используем raw SQL для получения отделов
         query = "SELECT id, name, description, head_id, is_active, sort_order, created_at FROM departments WHERE is_active = true ORDER BY sort_order ASC, id ASC"
         
-        result = db.execute(text(query)).fetchall()
+        result = (await db.execute(text(query))).fetchall()
         
         departments_list = []
         for row in result:
@@ -95,20 +96,20 @@ def get_departments(
 
 
 @router.get("/", response_model=DepartmentList)
-def get_departments_root(
-    db: Session = Depends(get_db)
+async def get_departments_root(
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка отделов (корневой endpoint)"""
-    return get_departments(db)
+    return await get_departments(db)
 
 
 @router.get("/{department_id}", response_model=DepartmentSchema)
-def get_department(
+async def get_department(
     department_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение отдела по ID"""
-    department = db.query(Department).filter(Department.id == department_id).first()
+    department = await db.get(Department, department_id)
     
     if not department:
         raise HTTPException(
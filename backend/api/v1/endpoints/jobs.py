@@ -0,0 +1,73 @@
+"""
+API статуса фоновых задач (utils.jobs)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from database import get_async_db
+from models import BackgroundJob, User
+from ..dependencies import get_current_user
+from ..schemas import JobResponse
+from utils.jobs import FINISHED_STATUSES, job_as_dict, job_worker_pool, request_cancel
+
+router = APIRouter()
+
+
+async def _get_job(job_id: int, db: AsyncSession, current_user: User) -> BackgroundJob:
+    job = await db.get(BackgroundJob, job_id)
+    # Чужие задачи видит только администратор
+    if job is None or (job.created_by != current_user.id and current_user.role != 'admin'):
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job
+
+
+@router.get("/", response_model=List[JobResponse])
+async def list_jobs(
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Последние задачи текущего пользователя"""
+    query = select(BackgroundJob).where(BackgroundJob.created_by == current_user.id)
+    if status:
+        query = query.where(BackgroundJob.status == status)
+    if kind:
+        query = query.where(BackgroundJob.kind == kind)
+    result = await db.execute(query.order_by(BackgroundJob.created_at.desc()).limit(min(max(limit, 1), 200)))
+    return [job_as_dict(job) for job in result.scalars().all()]
+
+
+@router.get("/stats")
+async def get_jobs_stats(current_user: User = Depends(get_current_user)):
+    """Счётчики исполнителей задач этого процесса"""
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return job_worker_pool.stats()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Статус, прогресс и результат задачи"""
+    return job_as_dict(await _get_job(job_id, db, current_user))
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Отменить задачу (выполняемая остановится при следующей проверке прогресса)"""
+    job = await _get_job(job_id, db, current_user)
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Задача уже завершена ({job.status})")
+    return job_as_dict(await request_cancel(db, job))
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import List, Optional
 
-from database import get_db
+from database import get_db, get_async_db
 from models import News, User, UserRole
 from ..schemas import News as NewsSchema, NewsCreate, NewsUpdate
 from ..dependencies import get_current_user_optional
@@ -143,12 +144,12 @@ def test_news(db: Session = Depends(get_db)):
 
 
 @router.get("/list", response_model=List[NewsSchema])
-def get_news(
+async def get_news(
     skip: int = 0,
     limit: int = 10,
     category: Optional[str] = None,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка новостей"""
     try:
@@ -164,7 +165,7 @@ def get_news(
         params['limit'] = limit
         params['skip'] = skip
         
-        result = db.execute(text(query), params).fetchall()
+        result = (await db.execute(text(query), params)).fetchall()
         
         news_list = []
         for row in result:
@@ -186,24 +187,24 @@ def get_news(
 
 
 @router.get("/", response_model=List[NewsSchema])
-def get_news_root(
+async def get_news_root(
     skip: int = 0,
     limit: int = 10,
     category: Optional[str] = None,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка новостей (корневой endpoint)"""
-    return get_news(skip, limit, category, token, db)
+    return await get_news(skip, limit, category, token, db)
 
 
 @router.get("/{news_id}", response_model=NewsSchema)
-def get_news_by_id(
+async def get_news_by_id(
     news_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение новости по ID"""
-    news = db.query(News).filter(News.id == news_id).first()
+    news = await db.get(News, news_id)
     
     if not news:
         raise HTTPException(
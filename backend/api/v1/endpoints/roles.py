@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from database import get_db
+from database import get_async_db
 from models import User
 from .auth import get_current_user
 
@@ -40,7 +40,7 @@ async def get_permissions(
 @router.get("/")
 async def read_roles(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка всех ролей"""
     if current_user.role != "admin":
@@ -87,7 +87,7 @@ async def read_roles(
 async def read_role(
     role_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение роли по ID"""
     if current_user.role != "admin":
@@ -8,7 +8,8 @@ import hashlib
 from cryptography.fernet import Fernet
 import base64
 
-from ..dependencies import get_db, get_current_user
+from database import get_async_db
+from ..dependencies import get_current_user
 from models import ApiKey, AiProcessingLog, User, AppSettings
 from ..schemas import ApiKeyCreate, ApiKeyUpdate, ApiKeyResponse, AppSettingsCreate, AppSettingsUpdate, AppSettingsResponse
 
@@ -35,7 +36,7 @@ def decrypt_api_key(encrypted_key: str) -> str:
 
 @router.get("/api-keys/", response_model=List[ApiKeyResponse])
 async def get_api_keys(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить список API ключей"""
@@ -50,7 +51,7 @@ async def get_api_keys(
 @router.post("/api-keys/", response_model=ApiKeyResponse)
 async def create_api_key(
     api_key_data: ApiKeyCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать новый API ключ"""
@@ -86,7 +87,7 @@ async def create_api_key(
 async def update_api_key(
     key_id: int,
     api_key_data: ApiKeyUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить API ключ"""
@@ -117,7 +118,7 @@ async def update_api_key(
 @router.delete("/api-keys/{key_id}/")
 async def delete_api_key(
     key_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить API ключ"""
@@ -138,7 +139,7 @@ async def delete_api_key(
 @router.get("/api-keys/{key_id}/decrypt/")
 async def get_decrypted_key(
     key_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить расшифрованный API ключ (только для админа)"""
@@ -160,7 +161,7 @@ async def get_decrypted_key(
 @router.post("/api-keys/{key_id}/test/")
 async def test_api_key(
     key_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Тестировать API ключ"""
@@ -190,7 +191,7 @@ async def test_api_key(
 @router.get("/api-keys/{key_id}/decrypt/")
 async def get_decrypted_api_key(
     key_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить расшифрованный API ключ (только для администраторов)"""
@@ -214,7 +215,7 @@ async def get_decrypted_api_key(
 # Эндпоинты для настроек приложения
 @router.get("/app-settings/", response_model=List[AppSettingsResponse])
 async def get_app_settings(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить все настройки приложения"""
@@ -229,7 +230,7 @@ async def get_app_settings(
 @router.post("/app-settings/", response_model=AppSettingsResponse)
 async def create_app_setting(
     setting_data: AppSettingsCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать новую настройку приложения"""
@@ -261,7 +262,7 @@ async def create_app_setting(
 async def update_app_setting(
     setting_id: int,
     setting_data: AppSettingsUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить настройку приложения"""
@@ -290,7 +291,7 @@ async def update_app_setting(
 @router.delete("/app-settings/{setting_id}/")
 async def delete_app_setting(
     setting_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить настройку приложения"""
@@ -311,7 +312,7 @@ async def delete_app_setting(
 @router.get("/app-settings/{key}/", response_model=AppSettingsResponse)
 async def get_app_setting_by_key(
     key: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить настройку по ключу"""
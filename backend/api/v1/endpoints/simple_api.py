@@ -4,7 +4,7 @@
 
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import get_db
+from database import get_async_db
 from models import MatchingNomenclature
 from sqlalchemy import select, or_
 import re
@@ -14,7 +14,7 @@ router = APIRouter()
 @router.post("/search/")
 async def simple_search_api(
     request_data: dict,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Простой API для поиска товаров"""
     try:
@@ -4,7 +4,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from typing import List
 
-from database import get_db
+from database import get_async_db
 from models import User, TeamMember
 from ..schemas import (
     TeamMember as TeamMemberSchema,
@@ -19,7 +19,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[TeamMemberWithUser])
 async def get_team_members(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     show_all: bool = False,
     current_user: User = Depends(get_current_user)
 ):
@@ -42,7 +42,7 @@ async def get_team_members(
 async def create_team_member(
     team_data: TeamMemberCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Добавление члена команды (только для администраторов)"""
     if current_user.role != "admin":
@@ -85,7 +85,7 @@ async def update_team_member(
     member_id: int,
     team_data: TeamMemberUpdate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Обновление информации о члене команды (только для администраторов)"""
     if current_user.role != "admin":
@@ -112,7 +112,7 @@ async def update_team_member(
 async def remove_team_member(
     member_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Удаление члена команды (только для администраторов)"""
     if current_user.role != "admin":
@@ -135,7 +135,7 @@ async def reorder_team_member(
     member_id: int,
     new_order: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Изменение порядка отображения члена команды"""
     if current_user.role != "admin":
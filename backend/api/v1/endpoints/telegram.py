@@ -5,7 +5,7 @@ from typing import List, Optional
 import httpx
 from datetime import datetime
 
-from database import get_db
+from database import get_async_db
 from models import User, UserRole
 # Telegram схемы временно отключены
 # from ..schemas import (
@@ -78,7 +78,7 @@ def create_response_keyboard(request_id: int):
 async def create_telegram_bot(
     bot_data: TelegramBotCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Создание нового Telegram бота"""
 
@@ -116,7 +116,7 @@ async def create_telegram_bot(
 @router.get("/bots", response_model=List[TelegramBotSchema])
 async def get_telegram_bots(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка всех ботов"""
 
@@ -137,7 +137,7 @@ async def update_telegram_bot(
     bot_id: int,
     bot_data: TelegramBotUpdate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Обновление настроек бота"""
 
@@ -176,7 +176,7 @@ async def set_bot_webhook(
     bot_id: int,
     webhook_data: TelegramWebhookUpdate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Установка webhook для бота"""
 
@@ -217,7 +217,7 @@ async def set_bot_webhook(
 async def link_telegram_user(
     user_data: TelegramUserCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Связывание пользователя с Telegram аккаунтом"""
 
@@ -264,7 +264,7 @@ async def link_telegram_user(
 @router.get("/users", response_model=List[TelegramUserSchema])
 async def get_telegram_users(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка связанных Telegram пользователей"""
 
@@ -285,7 +285,7 @@ async def notify_new_request(
     request_id: int,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Отправка уведомления о новой заявке всем исполнителям в Telegram"""
 
@@ -390,7 +390,7 @@ async def telegram_webhook(
     bot_token: str,
     update_data: dict,
     background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Обработка webhook от Telegram"""
 
@@ -498,7 +498,7 @@ async def telegram_webhook(
 @router.get("/stats")
 async def get_telegram_stats(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение статистики по Telegram интеграции"""
 
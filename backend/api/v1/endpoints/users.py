@@ -1,24 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
 from typing import List
 
-from database import get_db
+from database import get_db, get_async_db
 from models import User
 from ..schemas import UserResponse as UserSchema, UserCreate, UserUpdate, PasswordReset, AdminPasswordReset
 from ..dependencies import get_current_user
+from ..shared.principal_cache import invalidate_user
+from ..shared.password_hasher import get_password_hash_async
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
 
 @router.get("/list")
-def read_users(
+async def read_users(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка всех активных пользователей (только для администраторов)"""
     if current_user.role != "admin":
@@ -26,7 +24,8 @@ def read_users(
     
     try:
         # Используем обычный SQLAlchemy запрос
-        users = db.query(User).filter(User.is_active == True).all()
+        result = await db.execute(select(User).where(User.is_active == True))
+        users = result.scalars().all()
         
         # Преобразуем в список словарей для правильной сериализации
         users_list = []
@@ -105,9 +104,9 @@ def read_deactivated_users(
         raise HTTPException(status_code=500, detail=f"Ошибка при получении деактивированных пользователей: {str(e)}")
 
 @router.get("/chat-users", response_model=List[UserSchema])
-def read_chat_users(
+async def read_chat_users(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка всех активных пользователей для чата"""
     try:
@@ -120,7 +119,7 @@ def read_chat_users(
             ORDER BY first_name, last_name
         """
         
-        result = db.execute(text(query)).fetchall()
+        result = (await db.execute(text(query))).fetchall()
         
         users_list = []
         for row in result:
@@ -152,7 +151,7 @@ def read_chat_users(
 async def create_user(
     user_data: UserCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Создание нового пользователя (только для администраторов)"""
     if current_user.role != "admin":
@@ -160,9 +159,12 @@ async def create_user(
     
     try:
         # Проверяем, не существует ли уже пользователь с таким username или email
-        existing_user = db.query(User).filter(
-            (User.username == user_data.username) | (User.email == user_data.email)
-        ).first()
+        result = await db.execute(
+            select(User).where(
+                (User.username == user_data.username) | (User.email == user_data.email)
+            )
+        )
+        existing_user = result.scalars().first()
         
         if existing_user:
             if existing_user.username == user_data.username:
@@ -171,7 +173,7 @@ async def create_user(
                 raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
         
         # Создаем нового пользователя
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         
         new_user = User(
             username=user_data.username,
@@ -189,8 +191,8 @@ async def create_user(
         )
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         
         return {
             "id": new_user.id,
@@ -214,7 +216,7 @@ async def create_user(
         raise
     except Exception as e:
         print(f"❌ Ошибка при создании пользователя: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 @router.put("/{user_id}", response_model=UserSchema)
@@ -222,14 +224,14 @@ async def update_user(
     user_id: int,
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Обновление пользователя (только для администраторов)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Доступ запрещен")
     
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Пользователь не найден")
         
@@ -255,8 +257,9 @@ async def update_user(
         if user_data.avatar_url is not None:
             user.avatar_url = user_data.avatar_url
         
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        invalidate_user(user_id=user.id, username=user.username)
         
         return {
             "id": user.id,
@@ -280,21 +283,21 @@ async def update_user(
         raise
     except Exception as e:
         print(f"❌ Ошибка при обновлении пользователя: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Удаление пользователя (только для администраторов)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Доступ запрещен")
     
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Пользователь не найден")
         
@@ -304,7 +307,8 @@ async def delete_user(
         
         # Мягкое удаление - деактивируем пользователя
         user.is_active = False
-        db.commit()
+        await db.commit()
+        invalidate_user(user_id=user.id, username=user.username)
         
         return {"message": "Пользователь успешно деактивирован"}
         
@@ -312,5 +316,5 @@ async def delete_user(
         raise
     except Exception as e:
         print(f"❌ Ошибка при удалении пользователя: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
\ No newline at end of file
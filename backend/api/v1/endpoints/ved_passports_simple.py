@@ -1,87 +1,201 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from typing import List
-import io
-from sqlalchemy.orm import Session
-from typing import List, Dict
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, or_, union_all, literal, tuple_
+from sqlalchemy.exc import IntegrityError
+from typing import List, Dict, Optional
 from datetime import datetime
 
-from database import SessionLocal
-from models import User, UserRole, VEDNomenclature, VedPassport
-from utils.pdf_generator import generate_bulk_passports_pdf
+from database import get_async_db, get_async_read_db, async_read_session_factory
+from models import User, UserRole, VEDNomenclature, VedPassport, VedPassportBulkRequest
+from utils.pdf_render_pool import pdf_render_pool, passport_snapshot
+from utils.pdf_cache import passport_pdf_cache
+from utils.archive_export import ARCHIVE_EXPORT_CHUNK_SIZE, csv_chunks, write_xlsx
+from utils.passport_serials import passport_serial_allocator, format_passport_number
 from ..schemas import (
     VEDNomenclature as VEDNomenclatureSchema,
     VedPassport as VedPassportSchema,
+    BulkPassportCreate,
+    PassportWithNomenclature,
+    PassportGenerationResult,
 )
 from .auth import get_current_user
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Максимум паспортов в одном запросе массового создания
+VED_BULK_MAX_PASSPORTS = int(os.getenv("VED_BULK_MAX_PASSPORTS", "5000"))
 
 
 @router.get("/nomenclature/", response_model=List[VEDNomenclatureSchema])
-def get_ved_nomenclature(
+async def get_ved_nomenclature(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка номенклатуры для паспортов ВЭД"""
     # Разрешаем доступ любому авторизованному пользователю
     
     try:
-        nomenclature = db.query(VEDNomenclature).filter(VEDNomenclature.is_active == True).all()
+        result = await db.execute(select(VEDNomenclature).where(VEDNomenclature.is_active == True))
+        nomenclature = result.scalars().all()
         return nomenclature
     except Exception as e:
         print(f"Ошибка при получении номенклатуры: {e}")
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
 
+# Фасеты архива меняются редко: кэшируем агрегат на ARCHIVE_FILTERS_TTL_SECONDS
+ARCHIVE_FILTERS_TTL_SECONDS = float(os.getenv("ARCHIVE_FILTERS_TTL_SECONDS", "300"))
+_archive_filters_cache: Dict[str, object] = {"value": None, "expires_at": 0.0}
+_archive_filters_lock = asyncio.Lock()
+
+
+def invalidate_archive_filters() -> None:
+    _archive_filters_cache["expires_at"] = 0.0
+
+
+async def _load_archive_filters(db: AsyncSession) -> Dict[str, List[str]]:
+    """Все три фасета одним запросом (UNION ALL вместо трёх DISTINCT-сканов)"""
+    active = VEDNomenclature.is_active == True
+    facets = union_all(
+        select(literal("product_types").label("facet"), VEDNomenclature.product_type.label("value"))
+        .where(VEDNomenclature.product_type.isnot(None), active).distinct(),
+        select(literal("matrices").label("facet"), VEDNomenclature.matrix.label("value"))
+        .where(VEDNomenclature.matrix.isnot(None), active).distinct(),
+        select(literal("statuses").label("facet"), VedPassport.status.label("value"))
+        .where(VedPassport.status.isnot(None)).distinct(),
+    )
+    result: Dict[str, List[str]] = {"product_types": [], "matrices": [], "statuses": []}
+    for facet, value in (await db.execute(facets)).all():
+        if value:
+            result[facet].append(value)
+    return result
+
+
 @router.get("/archive/filters", response_model=Dict[str, List[str]])
-def get_archive_filters(
+async def get_archive_filters(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Получение доступных фильтров для архива"""
     # Разрешаем доступ любому авторизованному пользователю
     
     try:
-        # Получаем уникальные типы продуктов
-        product_types = db.query(VEDNomenclature.product_type).filter(
-            VEDNomenclature.product_type.isnot(None),
-            VEDNomenclature.is_active == True
-        ).distinct().all()
-        
-        # Получаем уникальные матрицы
-        matrices = db.query(VEDNomenclature.matrix).filter(
-            VEDNomenclature.matrix.isnot(None),
-            VEDNomenclature.is_active == True
-        ).distinct().all()
-        
-        # Получаем уникальные статусы паспортов
-        statuses = db.query(VedPassport.status).filter(
-            VedPassport.status.isnot(None)
-        ).distinct().all()
-        
-        return {
-            "product_types": [item[0] for item in product_types if item[0]],
-            "matrices": [item[0] for item in matrices if item[0]],
-            "statuses": [item[0] for item in statuses if item[0]]
-        }
+        if _archive_filters_cache["value"] is not None and time.monotonic() < _archive_filters_cache["expires_at"]:
+            return _archive_filters_cache["value"]
+        async with _archive_filters_lock:
+            # Пока ждали блокировку, кэш мог обновить другой запрос
+            if _archive_filters_cache["value"] is None or time.monotonic() >= _archive_filters_cache["expires_at"]:
+                _archive_filters_cache["value"] = await _load_archive_filters(db)
+                _archive_filters_cache["expires_at"] = time.monotonic() + ARCHIVE_FILTERS_TTL_SECONDS
+        return _archive_filters_cache["value"]
         
     except Exception as e:
         print(f"Ошибка при получении фильтров: {e}")
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
 
+def _encode_archive_cursor(passport: VedPassport) -> str:
+    raw = f"{passport.created_at.isoformat()}|{passport.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_archive_cursor(cursor: str):
+    try:
+        created_at, passport_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(passport_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Некорректный курсор пагинации")
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _apply_archive_filters(
+    query,
+    search: str = None,
+    product_type: str = None,
+    matrix: str = None,
+    status: str = None,
+    date_from: str = None,
+    date_to: str = None,
+    order_number: str = None,
+    code_1c: str = None
+):
+    """Фильтры архива паспортов; фильтры по номенклатуре - подзапросом по id, без JOIN"""
+    # Применяем фильтры
+    if search:
+        search_term = search.strip()
+        pattern = _escape_like(search_term)
+        matching_nomenclature = select(VEDNomenclature.id).where(
+            (VEDNomenclature.code_1c == search_term) |
+            (VEDNomenclature.article == search_term) |
+            (VEDNomenclature.name == search_term) |
+            (VEDNomenclature.matrix == search_term)
+        )
+        if len(search_term) >= 3:
+            # Подстрока - триграммные индексы (pg_trgm)
+            number_match = (
+                VedPassport.passport_number.ilike(f"%{pattern}%", escape="\\") |
+                VedPassport.order_number.ilike(f"%{pattern}%", escape="\\")
+            )
+        else:
+            # Короткий терм - только префикс (индексы text_pattern_ops)
+            number_match = (
+                VedPassport.passport_number.like(f"{pattern}%", escape="\\") |
+                VedPassport.order_number.like(f"{pattern}%", escape="\\")
+            )
+        query = query.where(number_match | VedPassport.nomenclature_id.in_(matching_nomenclature))
+
+    nomenclature_filters = []
+    if product_type:
+        nomenclature_filters.append(VEDNomenclature.product_type == product_type)
+    if matrix:
+        nomenclature_filters.append(VEDNomenclature.matrix == matrix)
+    if code_1c:
+        nomenclature_filters.append(VEDNomenclature.code_1c == code_1c)
+    if nomenclature_filters:
+        query = query.where(VedPassport.nomenclature_id.in_(
+            select(VEDNomenclature.id).where(*nomenclature_filters)
+        ))
+
+    if status:
+        query = query.where(VedPassport.status == status)
+
+    if order_number:
+        query = query.where(VedPassport.order_number == order_number)
+
+    if date_from:
+        try:
+            date_from_obj = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
+            query = query.where(VedPassport.created_at >= date_from_obj)
+        except ValueError:
+            pass
+
+    if date_to:
+        try:
+            date_to_obj = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
+            query = query.where(VedPassport.created_at <= date_to_obj)
+        except ValueError:
+            pass
+    
+    return query
+
+
 @router.get("/admin/archive/", response_model=List[VedPassportSchema])
-def get_all_ved_passports_archive_admin(
+async def get_all_ved_passports_archive_admin(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     search: str = None,
     product_type: str = None,
     matrix: str = None,
@@ -91,77 +205,123 @@ def get_all_ved_passports_archive_admin(
     order_number: str = None,
     code_1c: str = None,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
-    """Получение архива всех паспортов ВЭД для администратора"""
+    """Получение архива всех паспортов ВЭД для администратора
+
+    Сортировка (created_at, id) по убыванию. Для глубокой пагинации
+    передавайте cursor из заголовка ответа X-Next-Cursor вместо offset.
+    """
     # Разрешаем доступ любому авторизованному пользователю
     
     try:
-        query = db.query(VedPassport).join(VEDNomenclature, VedPassport.nomenclature_id == VEDNomenclature.id)
-        
-        # Применяем фильтры
-        if search:
-            search_term = search.strip()
-            query = query.filter(
-                (VedPassport.passport_number == search_term) |
-                (VedPassport.order_number == search_term) |
-                (VEDNomenclature.code_1c == search_term) |
-                (VEDNomenclature.article == search_term) |
-                (VEDNomenclature.name == search_term) |
-                (VEDNomenclature.matrix == search_term)
-            )
-        
-        if product_type:
-            query = query.filter(VEDNomenclature.product_type == product_type)
-        
-        if matrix:
-            query = query.filter(VEDNomenclature.matrix == matrix)
+        query = select(VedPassport)
+        limit = max(1, min(limit, 500))
         
-        if status:
-            query = query.filter(VedPassport.status == status)
+        query = _apply_archive_filters(
+            query, search, product_type, matrix, status, date_from, date_to, order_number, code_1c
+        )
         
-        if order_number:
-            query = query.filter(VedPassport.order_number == order_number)
+        # Сортировка и пагинация: keyset по (created_at, id), offset - для совместимости
+        query = query.order_by(VedPassport.created_at.desc(), VedPassport.id.desc())
+        if cursor:
+            query = query.where(tuple_(VedPassport.created_at, VedPassport.id) < tuple_(*_decode_archive_cursor(cursor)))
+        else:
+            query = query.offset(offset)
+        result = await db.execute(query.limit(limit))
+        passports = result.scalars().all()
         
-        if code_1c:
-            query = query.filter(VEDNomenclature.code_1c == code_1c)
-        
-        if date_from:
-            try:
-                date_from_obj = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-                query = query.filter(VedPassport.created_at >= date_from_obj)
-            except ValueError:
-                pass
-        
-        if date_to:
-            try:
-                date_to_obj = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-                query = query.filter(VedPassport.created_at <= date_to_obj)
-            except ValueError:
-                pass
-        
-        # Сортировка и пагинация
-        passports = query.order_by(VedPassport.created_at.desc()).offset(offset).limit(limit).all()
+        if len(passports) == limit and passports[-1].created_at is not None:
+            response.headers["X-Next-Cursor"] = _encode_archive_cursor(passports[-1])
         
         return passports
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Ошибка при получении архива всех паспортов: {e}")
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
 
+ARCHIVE_EXPORT_COLUMNS = (
+    VedPassport.id, VedPassport.passport_number, VedPassport.order_number, VedPassport.status,
+    VedPassport.quantity, VedPassport.created_at,
+    VEDNomenclature.code_1c, VEDNomenclature.name, VEDNomenclature.article, VEDNomenclature.matrix,
+    VEDNomenclature.drilling_depth, VEDNomenclature.height, VEDNomenclature.thread, VEDNomenclature.product_type,
+)
+
+
+@router.get("/admin/archive/export/{export_format}")
+async def export_ved_passports_archive(
+    export_format: str,
+    current_user: User = Depends(get_current_user),
+    search: str = None,
+    product_type: str = None,
+    matrix: str = None,
+    status: str = None,
+    date_from: str = None,
+    date_to: str = None,
+    order_number: str = None,
+    code_1c: str = None
+):
+    """Потоковая выгрузка архива паспортов с номенклатурой (csv, xlsx/excel)
+
+    Фильтры те же, что у /admin/archive/. Чтение идёт серверным курсором
+    с реплики; сессия открывается внутри генератора и живёт ровно столько,
+    сколько длится выгрузка.
+    """
+    if export_format not in ("csv", "xlsx", "excel"):
+        raise HTTPException(status_code=400, detail="Поддерживаются форматы: csv, xlsx")
+
+    query = _apply_archive_filters(
+        select(*ARCHIVE_EXPORT_COLUMNS).outerjoin(VEDNomenclature, VedPassport.nomenclature_id == VEDNomenclature.id),
+        search, product_type, matrix, status, date_from, date_to, order_number, code_1c
+    ).order_by(VedPassport.created_at.desc(), VedPassport.id.desc())
+    session_factory = await async_read_session_factory()
+
+    async def partitions():
+        async with session_factory() as db:
+            result = await db.stream(query.execution_options(yield_per=ARCHIVE_EXPORT_CHUNK_SIZE))
+            async for rows in result.partitions():
+                yield rows
+
+    filename = f"ved_passports_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if export_format == "csv":
+        return StreamingResponse(
+            csv_chunks(partitions()),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f"attachment; filename={filename}.csv"}
+        )
+
+    try:
+        xlsx_path = await write_xlsx(partitions())
+    except Exception as e:
+        print(f"Ошибка при выгрузке архива в XLSX: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка экспорта: {str(e)}")
+    return FileResponse(
+        xlsx_path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=f"{filename}.xlsx",
+        background=BackgroundTask(os.remove, xlsx_path)
+    )
+
+
 @router.get("/", response_model=List[VedPassportSchema])
-def get_ved_passports(
+async def get_ved_passports(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение списка паспортов ВЭД"""
     # Разрешаем доступ любому авторизованному пользователю
     
     try:
-        passports = db.query(VedPassport).filter(
-            VedPassport.created_by == current_user.id
-        ).order_by(VedPassport.created_at.desc()).all()
+        result = await db.execute(
+            select(VedPassport).where(
+                VedPassport.created_by == current_user.id
+            ).order_by(VedPassport.created_at.desc())
+        )
+        passports = result.scalars().all()
         
         return passports
         
@@ -171,38 +331,238 @@ def get_ved_passports(
 
 
 @router.get("/archive/", response_model=List[VedPassportSchema])
-def get_user_archive(
+async def get_user_archive(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Архив паспортов для текущего пользователя (VED доступен)."""
     try:
-        passports = db.query(VedPassport).filter(
-            VedPassport.created_by == current_user.id,
-            VedPassport.status == "archived"
-        ).order_by(VedPassport.created_at.desc()).all()
+        result = await db.execute(
+            select(VedPassport).where(
+                VedPassport.created_by == current_user.id,
+                VedPassport.status == "archived"
+            ).order_by(VedPassport.created_at.desc())
+        )
+        passports = result.scalars().all()
         return passports
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
 
+def _passport_result(passport: VedPassport, nomenclature: Optional[VEDNomenclature]) -> PassportWithNomenclature:
+    return PassportWithNomenclature(
+        id=passport.id,
+        passport_number=passport.passport_number,
+        title=passport.title,
+        description=passport.description,
+        status=passport.status,
+        order_number=passport.order_number,
+        quantity=passport.quantity,
+        nomenclature_id=passport.nomenclature_id,
+        created_by=passport.created_by,
+        created_at=passport.created_at.isoformat() if passport.created_at else "",
+        updated_at=passport.updated_at.isoformat() if passport.updated_at else None,
+        nomenclature=VEDNomenclatureSchema.model_validate(nomenclature) if nomenclature else None,
+    )
+
+
+def _bulk_request_hash(request: BulkPassportCreate) -> str:
+    """Отпечаток тела запроса (без ключа идемпотентности)"""
+    body = json.dumps(request.model_dump(exclude={"idempotency_key"}), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+async def _replay_bulk_request(
+    db: AsyncSession, user_id: int, key: str, request_hash: str
+) -> Optional[PassportGenerationResult]:
+    """Повторный запрос с тем же ключом возвращает ранее созданные паспорта
+
+    Ключ, уже использованный с другим заказом или позициями, - ошибка 422.
+    """
+    bulk_request = (await db.execute(
+        select(VedPassportBulkRequest).where(
+            VedPassportBulkRequest.created_by == user_id,
+            VedPassportBulkRequest.idempotency_key == key
+        )
+    )).scalar_one_or_none()
+    if bulk_request is None:
+        return None
+    if bulk_request.request_hash != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Ключ идемпотентности уже использован для другого запроса"
+        )
+
+    ids = list(bulk_request.passport_ids or [])
+    passports = (await db.execute(select(VedPassport).where(VedPassport.id.in_(ids)))).scalars().all()
+    by_id = {p.id: p for p in passports}
+    results = [_passport_result(by_id[i], by_id[i].nomenclature) for i in ids if i in by_id]
+    return PassportGenerationResult(
+        success=True,
+        message=f"Запрос уже выполнен: {len(results)} паспортов",
+        generated_count=len(results),
+        passports=results,
+        errors=[]
+    )
+
+
+@router.post("/bulk/", response_model=PassportGenerationResult)
+@router.post("/bulk", response_model=PassportGenerationResult, include_in_schema=False)
+async def create_bulk_passports(
+    request: BulkPassportCreate,
+    idempotency_key_header: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Массовое создание паспортов ВЭД для одного заказа
+
+    Серийные номера выделяются одним блоком, все паспорта вставляются
+    одним многострочным INSERT ... RETURNING в одной транзакции. Ключ
+    идемпотентности (поле idempotency_key или заголовок Idempotency-Key)
+    сохраняется в той же транзакции: повтор запроса вернёт те же паспорта,
+    а тот же ключ с другим телом запроса - ошибку 422.
+    """
+    key = (request.idempotency_key or idempotency_key_header or "").strip() or None
+    request_hash = _bulk_request_hash(request)
+
+    try:
+        if key:
+            replay = await _replay_bulk_request(db, current_user.id, key, request_hash)
+            if replay is not None:
+                return replay
+
+        # Номенклатура для всех позиций одним запросом
+        ids = {item.nomenclature_id for item in request.items if item.nomenclature_id}
+        codes = {item.code_1c.strip() for item in request.items if not item.nomenclature_id and item.code_1c}
+        conditions = []
+        if ids:
+            conditions.append(VEDNomenclature.id.in_(ids))
+        if codes:
+            conditions.append(VEDNomenclature.code_1c.in_(codes))
+        found = []
+        if conditions:
+            found = (await db.execute(
+                select(VEDNomenclature).where(or_(*conditions), VEDNomenclature.is_active == True)
+            )).scalars().all()
+        by_id = {n.id: n for n in found}
+        by_code = {n.code_1c: n for n in found}
+
+        errors: List[str] = []
+        lines = []
+        for index, item in enumerate(request.items, start=1):
+            if item.nomenclature_id:
+                nomenclature = by_id.get(item.nomenclature_id)
+                label = f"ID {item.nomenclature_id}"
+            elif item.code_1c:
+                nomenclature = by_code.get(item.code_1c.strip())
+                label = f"код 1С {item.code_1c}"
+            else:
+                errors.append(f"Позиция {index}: не указан nomenclature_id или code_1c")
+                continue
+            if nomenclature is None:
+                errors.append(f"Позиция {index}: номенклатура ({label}) не найдена")
+                continue
+            lines.append((nomenclature, item.quantity))
+
+        total = sum(quantity for _, quantity in lines)
+        if total == 0:
+            raise HTTPException(status_code=400, detail={"message": "Нет позиций для создания паспортов", "errors": errors})
+        if total > VED_BULK_MAX_PASSPORTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Слишком много паспортов в одном запросе: {total} (максимум {VED_BULK_MAX_PASSPORTS})"
+            )
+
+        year = datetime.now().year
+        serials = iter(await passport_serial_allocator.allocate(total, year))
+        rows = []
+        for nomenclature, quantity in lines:
+            for _ in range(quantity):
+                rows.append({
+                    "passport_number": format_passport_number(
+                        next(serials), year, nomenclature.matrix,
+                        nomenclature.drilling_depth, nomenclature.product_type
+                    ),
+                    "title": request.title,
+                    "description": request.description,
+                    "status": "active",
+                    "order_number": request.order_number,
+                    "quantity": 1,
+                    "created_by": current_user.id,
+                    "nomenclature_id": nomenclature.id,
+                })
+
+        inserted = (await db.execute(
+            insert(VedPassport).returning(VedPassport, sort_by_parameter_order=True),
+            rows
+        )).scalars().all()
+
+        if key:
+            db.add(VedPassportBulkRequest(
+                idempotency_key=key,
+                created_by=current_user.id,
+                order_number=request.order_number,
+                request_hash=request_hash,
+                passport_ids=[p.id for p in inserted]
+            ))
+        await db.commit()
+        invalidate_archive_filters()
+    except HTTPException:
+        raise
+    except IntegrityError as e:
+        await db.rollback()
+        # Параллельный запрос с тем же ключом успел закоммитить первым
+        if key:
+            replay = await _replay_bulk_request(db, current_user.id, key, request_hash)
+            if replay is not None:
+                return replay
+        print(f"Конфликт при массовом создании паспортов: {e}")
+        raise HTTPException(status_code=409, detail="Конфликт номеров паспортов, повторите запрос")
+    except Exception as e:
+        await db.rollback()
+        print(f"Ошибка при массовом создании паспортов: {e}")
+        raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
+
+    nomenclature_by_id = {n.id: n for n, _ in lines}
+    results = [_passport_result(p, nomenclature_by_id.get(p.nomenclature_id)) for p in inserted]
+    return PassportGenerationResult(
+        success=True,
+        message=f"Создано {len(results)} паспортов",
+        generated_count=len(results),
+        passports=results,
+        errors=errors
+    )
+
+
 @router.post("/export/bulk/pdf")
-def export_bulk_pdf(
+async def export_bulk_pdf(
     passport_ids: List[int],
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Экспорт выбранных паспортов в один PDF."""
+    """Экспорт выбранных паспортов в один PDF.
+
+    Рендеринг идёт чанками в пуле процессов (utils.pdf_render_pool),
+    готовый файл отдаётся с диска и удаляется после отправки.
+    """
     if not passport_ids:
         raise HTTPException(status_code=400, detail="Список паспортов пуст")
     try:
-        passports = db.query(VedPassport).filter(VedPassport.id.in_(passport_ids)).all()
+        passports = (await db.execute(
+            select(VedPassport).where(VedPassport.id.in_(passport_ids)).order_by(VedPassport.id)
+        )).scalars().all()
         if not passports:
             raise HTTPException(status_code=404, detail="Паспорта не найдены")
-        pdf_bytes = generate_bulk_passports_pdf(passports)
-        return StreamingResponse(io.BytesIO(pdf_bytes), media_type="application/pdf", headers={
-            "Content-Disposition": "attachment; filename=ved_passports.pdf"
-        })
+        snapshots = [passport_snapshot(p) for p in passports]
+        # Соединение с БД больше не нужно - возвращаем его в пул до рендеринга
+        await db.close()
+        pdf_path = await pdf_render_pool.render_to_file(snapshots)
+        return FileResponse(
+            pdf_path,
+            media_type="application/pdf",
+            filename="ved_passports.pdf",
+            background=BackgroundTask(pdf_render_pool.cleanup, pdf_path)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -210,16 +570,16 @@ def export_bulk_pdf(
 
 
 @router.get("/{passport_id}", response_model=VedPassportSchema)
-def get_ved_passport(
+async def get_ved_passport(
     passport_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение конкретного паспорта ВЭД по ID"""
     # Разрешаем доступ любому авторизованному пользователю
     
     try:
-        passport = db.query(VedPassport).filter(VedPassport.id == passport_id).first()
+        passport = await db.get(VedPassport, passport_id)
         
         if not passport:
             raise HTTPException(status_code=404, detail="Паспорт не найден")
@@ -234,3 +594,39 @@ def get_ved_passport(
     except Exception as e:
         print(f"Ошибка при получении паспорта: {e}")
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
+
+
+@router.get("/{passport_id}/export/pdf")
+async def export_passport_pdf(
+    passport_id: int,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """PDF одного паспорта из дискового кэша (utils.pdf_cache) со строгим ETag"""
+    passport = await db.get(VedPassport, passport_id)
+    if not passport:
+        raise HTTPException(status_code=404, detail="Паспорт не найден")
+    if passport.created_by != current_user.id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+
+    snapshot = passport_snapshot(passport)
+    await db.close()
+
+    etag = f'"{passport_pdf_cache.etag(snapshot)}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        pdf_path = await passport_pdf_cache.get_or_render(snapshot)
+    except Exception as e:
+        print(f"Ошибка при генерации PDF паспорта {passport_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка экспорта PDF: {str(e)}")
+
+    return FileResponse(
+        pdf_path,
+        media_type="application/pdf",
+        filename=f"ved_passport_{passport_id}.pdf",
+        headers=headers
+    )
@@ -3,16 +3,21 @@ API endpoints для загрузки данных ВЭД паспортов
 """
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+import itertools
 import time
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from typing import List, Dict, Any
-import pandas as pd
-import io
 import json
 from datetime import datetime
 
 from database import SessionLocal
 from models import User, VedPassport
+from utils.pdf_cache import passport_pdf_cache
+from utils.upload_ingest import ingest_upload_sync
+from utils.ved_passport_import import (
+    REQUIRED_COLUMNS, copy_passports, load_nomenclature, prepare_passports, read_table_batches
+)
 from .auth import get_current_user
 from ..schemas import APIResponse
 
@@ -26,72 +31,71 @@ def get_db():
         db.close()
 
 @router.post("/upload-ved-passports", response_model=APIResponse)
-async def upload_ved_passports_data(
+def upload_ved_passports_data(
     file: UploadFile = File(...),
     description: str = Form(""),
+    dry_run: bool = Form(False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Загрузка данных ВЭД паспортов из CSV/Excel файла"""
+    """Загрузка данных ВЭД паспортов из CSV/Excel файла
+
+    Файл потоково сохраняется на диск (utils.upload_ingest), проверка
+    колонками (utils.ved_passport_import) и вставка через COPY.
+    dry_run=true - только проверка, без записи в БД.
+    """
     if current_user.role not in ["admin", "manager", "ved_passport", "ved"]:
         raise HTTPException(status_code=403, detail="Доступ запрещен")
     
+    upload = None
     try:
         # Проверяем тип файла
         if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
             raise HTTPException(status_code=400, detail="Поддерживаются только файлы CSV и Excel")
         
-        # Читаем файл
-        contents = await file.read()
-        
-        # Определяем тип файла и читаем данные
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        else:  # Excel файл
-            df = pd.read_excel(io.BytesIO(contents))
+        started = time.perf_counter()
+        upload = ingest_upload_sync(file)
+        batches = read_table_batches(upload.path, file.filename)
+        first_batch = next(batches)
         
         # Проверяем обязательные колонки
-        required_columns = ['passport_number', 'order_number']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in first_batch.columns]
         if missing_columns:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Отсутствуют обязательные колонки: {', '.join(missing_columns)}"
             )
         
-        # Обрабатываем данные
-        uploaded_count = 0
+        # Порции проверяются и вставляются по мере чтения файла
+        nomenclature = load_nomenclature(db)
+        seen_numbers = set()
+        total_rows = valid_count = uploaded_count = error_count = 0
         errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                # Создаем ВЭД паспорт
-                passport = VedPassport(
-                    passport_number=str(row['passport_number']),
-                    order_number=str(row['order_number']),
-                    title=str(row.get('title', '')),
-                    description=str(row.get('description', '')),
-                    quantity=int(row.get('quantity', 1)),
-                    status=str(row.get('status', 'active')),
-                    created_by=current_user.id,
-                    nomenclature_id=int(row.get('nomenclature_id', 1))  # По умолчанию 1
-                )
-                
-                db.add(passport)
-                uploaded_count += 1
-                
-            except Exception as e:
-                errors.append(f"Строка {index + 1}: {str(e)}")
-        
-        db.commit()
+        for batch in itertools.chain([first_batch], batches):
+            valid, batch_errors = prepare_passports(batch, db, current_user.id, nomenclature, seen_numbers)
+            total_rows += len(batch)
+            valid_count += len(valid)
+            error_count += len(batch_errors)
+            errors.extend(batch_errors[:100 - len(errors)])
+            if not dry_run and len(valid):
+                uploaded_count += copy_passports(db, valid)
+        if uploaded_count:
+            db.commit()
         
         return APIResponse(
             success=True,
-            message=f"Успешно загружено {uploaded_count} ВЭД паспортов",
+            message=(
+                f"Проверка завершена: к загрузке готово {valid_count} ВЭД паспортов" if dry_run
+                else f"Успешно загружено {uploaded_count} ВЭД паспортов"
+            ),
             data={
                 "uploaded_count": uploaded_count,
-                "total_rows": len(df),
-                "errors": errors[:10],  # Показываем только первые 10 ошибок
+                "valid_count": valid_count,
+                "total_rows": total_rows,
+                "error_count": error_count,
+                "errors": errors,  # Показываем только первые 100 ошибок
+                "dry_run": dry_run,
+                "elapsed_seconds": round(time.perf_counter() - started, 3),
                 "file_name": file.filename,
                 "description": description
             }
@@ -99,9 +103,15 @@ async def upload_ved_passports_data(
         
     except HTTPException:
         raise
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Конфликт при загрузке (повторите проверку файла): {str(e.orig)}")
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Ошибка обработки файла: {str(e)}")
+    finally:
+        if upload is not None:
+            upload.cleanup()
 
 @router.get("/ved-passports-history", response_model=APIResponse)
 def get_ved_passports_history(
@@ -153,6 +163,7 @@ def clear_ved_passports_data(
         deleted_passports = db.query(VedPassport).delete()
         
         db.commit()
+        passport_pdf_cache.clear()
         
         return APIResponse(
             success=True,
@@ -224,7 +235,7 @@ def get_ved_passports_template():
         "description": "Описание паспорта",
         "quantity": 1,
         "status": "active",
-        "nomenclature_id": 1
+        "code_1c": "УТ-00047870"
     }
     
     return APIResponse(
@@ -234,8 +245,12 @@ def get_ved_passports_template():
             "template": template_data,
             "required_columns": ["passport_number", "order_number"],
             "optional_columns": [
-                "title", "description", "quantity", "status", "nomenclature_id"
+                "title", "description", "quantity", "status", "nomenclature_id", "code_1c", "article"
             ],
-            "instructions": "Обязательные колонки: passport_number, order_number. Остальные колонки опциональны."
+            "instructions": (
+                "Обязательные колонки: passport_number, order_number. Номенклатура указывается "
+                "одной из колонок nomenclature_id, code_1c или article (артикул должен быть уникальным). "
+                "Остальные колонки опциональны."
+            )
         }
     )
@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_async_db
 from models import User
 from .auth import get_current_user
 
@@ -26,7 +26,7 @@ class WikiResponse(BaseModel):
 @router.get("/sections", response_model=WikiResponse)
 async def get_wiki_sections(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение разделов Wiki для текущего пользователя"""
     
@@ -83,7 +83,7 @@ async def get_wiki_sections(
 async def get_wiki_content(
     section_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получение контента конкретного раздела Wiki"""
     
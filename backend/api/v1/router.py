@@ -157,6 +157,12 @@ try:
 except ImportError:
     pass
 
+try:
+    from .endpoints.jobs import router as jobs_router
+    api_router.include_router(jobs_router, prefix="/jobs", tags=["⏳ Фоновые задачи"])
+except ImportError:
+    pass
+
 try:
     from .endpoints.dashboard import router as dashboard_router
     api_router.include_router(dashboard_router, tags=["📊 Дашборд"])
@@ -600,7 +600,9 @@ class VedPassportUpdate(BaseModel):
 
 class BulkPassportItem(BaseModel):
     """Схема элемента для массового создания паспортов"""
-    code_1c: str = Field(description="Код 1С")
+    nomenclature_id: Optional[int] = Field(None, description="ID номенклатуры")
+    code_1c: Optional[str] = Field(None, description="Код 1С (если не указан nomenclature_id)")
+    quantity: int = Field(1, description="Количество паспортов", ge=1)
 
 
 # Схемы для системы сопоставления артикулов
@@ -737,7 +739,9 @@ class BulkPassportCreate(BaseModel):
     """Схема массового создания ВЭД паспортов"""
     order_number: str = Field(description="Номер заказа")
     title: Optional[str] = Field(None, description="Заголовок")
-    items: List[BulkPassportItem] = Field(description="Список позиций")
+    description: Optional[str] = Field(None, description="Описание")
+    idempotency_key: Optional[str] = Field(None, description="Ключ идемпотентности (или заголовок Idempotency-Key)")
+    items: List[BulkPassportItem] = Field(description="Список позиций", min_length=1)
 
 
 class PassportWithNomenclature(BaseModel):
@@ -1302,7 +1306,7 @@ class AIMatchingResponse(BaseModel):
     message: str = Field(description="Сообщение ИИ")
     matching_results: Optional[List[MatchingResult]] = Field(None, description="Результаты сопоставления")
     processing_time: Optional[float] = Field(None, description="Время обработки")
-    status: str = Field(description="Статус обработки")
+    status: str = Field(description="Статус обработки: success или partial (часть текста не обработана)")
 
 
 # Схемы для чата с ИИ
@@ -1363,3 +1367,35 @@ class ChatSessionResponse(BaseModel):
         if v is None:
             return []
         return v
+
+
+# Схемы фоновых задач (utils.jobs)
+class JobAcceptedResponse(BaseModel):
+    """Ответ 202: задача поставлена в очередь"""
+    model_config = ConfigDict(extra="allow")
+
+    job_id: int = Field(description="ID задачи")
+    kind: str = Field(description="Тип задачи")
+    status: str = Field(description="Статус задачи")
+    status_url: str = Field(description="Адрес для опроса статуса")
+
+
+class JobResponse(BaseModel):
+    """Состояние фоновой задачи"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int = Field(description="ID задачи")
+    kind: str = Field(description="Тип задачи")
+    status: str = Field(description="Статус (queued, running, succeeded, failed, cancelled)")
+    priority: int = Field(description="Приоритет (больше - раньше)")
+    progress: float = Field(description="Прогресс, %")
+    progress_message: Optional[str] = Field(None, description="Текущий этап")
+    attempts: int = Field(description="Выполнено попыток")
+    max_attempts: int = Field(description="Максимум попыток")
+    cancel_requested: bool = Field(description="Запрошена отмена")
+    result: Optional[Any] = Field(None, description="Результат")
+    error: Optional[str] = Field(None, description="Ошибка последней попытки")
+    created_by: Optional[int] = Field(None, description="Кто поставил задачу")
+    created_at: Optional[datetime] = Field(None, description="Дата создания")
+    started_at: Optional[datetime] = Field(None, description="Начало последней попытки")
+    finished_at: Optional[datetime] = Field(None, description="Завершение")
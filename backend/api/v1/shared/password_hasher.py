@@ -0,0 +1,149 @@
+"""
+API v1 - Хеширование паролей в выделенном ограниченном пуле потоков
+
+bcrypt тратит 100-300 мс CPU на вызов. Чтобы не блокировать event loop и
+не исчерпывать общий threadpool при всплеске логинов, все операции с
+паролями выполняются в отдельном пуле с контролем очереди: если очередь
+переполнена, запрос сразу получает 503.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+T = TypeVar("T")
+
+# Настройки пула и стоимости bcrypt
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# min/max rounds помечают хеши с другим work factor как требующие обновления
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class PasswordHasherOverloaded(HTTPException):
+    """Пул хеширования переполнен"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервис аутентификации перегружен, повторите попытку позже",
+            headers={"Retry-After": "1"},
+        )
+
+
+class PasswordHasher:
+    """Ограниченный пул для операций bcrypt с метриками очереди"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_pending = workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwd-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherOverloaded()
+            self._pending += 1
+
+    def _wrap(self, fn: Callable[..., T], *args) -> Callable[[], T]:
+        enqueued_at = time.perf_counter()
+
+        def task() -> T:
+            started_at = time.perf_counter()
+            with self._lock:
+                self._running += 1
+                self.total_wait_seconds += started_at - enqueued_at
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self.completed += 1
+                    self.total_run_seconds += time.perf_counter() - started_at
+
+        return task
+
+    def _release(self, _future) -> None:
+        # Вызывается и при завершении, и при отмене задачи из очереди
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, fn: Callable[..., T], *args):
+        self._admit()
+        future = self._executor.submit(self._wrap(fn, *args))
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        """Синхронный вызов (для обычных def-обработчиков)"""
+        return self._submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., T], *args) -> T:
+        """Асинхронный вызов, не блокирующий event loop"""
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait_seconds / completed * 1000, 2),
+                "avg_run_ms": round(self.total_run_seconds / completed * 1000, 2),
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+            }
+
+
+password_hasher = PasswordHasher()
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return password_hasher.run(pwd_context.verify, plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return password_hasher.run(pwd_context.hash, password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверка пароля; второй элемент - новый хеш, если изменился work factor"""
+    return password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run_async(pwd_context.verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run_async(pwd_context.hash, password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await password_hasher.run_async(pwd_context.verify_and_update, plain_password, hashed_password)
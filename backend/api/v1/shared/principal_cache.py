@@ -0,0 +1,117 @@
+"""
+API v1 - Кэш аутентифицированных пользователей (principal cache)
+
+Хранит облегчённый неизменяемый снимок пользователя, чтобы запросы
+с валидным JWT не обращались к базе данных при тёплом кэше.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+# Настройки кэша
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Неизменяемый снимок пользователя для проверки доступа"""
+    id: int
+    username: str
+    role: str
+    is_active: bool
+    department_id: Optional[int]
+
+    @classmethod
+    def from_user(cls, user: Any) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            is_active=bool(user.is_active),
+            department_id=user.department_id,
+        )
+
+
+def token_version(user: Any) -> str:
+    """Версия токена: отпечаток счётчика смен пароля пользователя.
+
+    При смене пароля счётчик растёт, и ранее выданные токены перестают
+    совпадать с записями кэша. Перехеширование при входе (смена work
+    factor) счётчик не меняет - токены на других устройствах остаются
+    действительными.
+    """
+    return hashlib.sha256(f"{user.id}:{user.password_version or 0}".encode()).hexdigest()[:16]
+
+
+class PrincipalCache:
+    """Потокобезопасный LRU-кэш снимков пользователей с TTL"""
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS, max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], Tuple[float, UserPrincipal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str, version: Optional[str]) -> Optional[UserPrincipal]:
+        key = (username, version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, username: str, version: Optional[str], principal: UserPrincipal) -> None:
+        key = (username, version)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: Optional[str] = None, user_id: Optional[int] = None) -> int:
+        """Удаляет все записи пользователя (по username или id)"""
+        with self._lock:
+            keys = [
+                key for key, (_, principal) in self._entries.items()
+                if (username is not None and key[0] == username)
+                or (user_id is not None and principal.id == user_id)
+            ]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl_seconds": self.ttl,
+                "max_entries": self.max_entries,
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_user(user_id: Optional[int] = None, username: Optional[str] = None) -> int:
+    """Инвалидация кэша после изменения или деактивации пользователя"""
+    return principal_cache.invalidate(username=username, user_id=user_id)
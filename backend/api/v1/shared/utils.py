@@ -1,15 +1,7 @@
-from passlib.context import CryptContext
 import re
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Проверка пароля"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    """Хеширование пароля"""
-    return pwd_context.hash(password)
+# Операции bcrypt выполняются в выделенном пуле (см. password_hasher)
+from .password_hasher import pwd_context, verify_password, get_password_hash
 
 def validate_email(email: str) -> bool:
     """Валидация email адреса"""
@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 from typing import List, Dict, Any, Optional
-from database import get_db
+from database import get_async_db
 from ..schemas import (
     EmailSettingsCreate, EmailSettingsUpdate, EmailSettingsResponse,
     ApiKeySettingsCreate, ApiKeySettingsUpdate, ApiKeySettingsResponse,
@@ -28,7 +28,7 @@ router = APIRouter()
 # Email настройки
 @router.get("/email-settings", response_model=List[EmailSettingsResponse])
 async def get_email_settings(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить все настройки email"""
@@ -43,7 +43,7 @@ async def get_email_settings(
 @router.post("/email-settings", response_model=EmailSettingsResponse)
 async def create_email_settings(
     settings_data: EmailSettingsCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать настройки email"""
@@ -96,7 +96,7 @@ async def create_email_settings(
 async def update_email_settings(
     settings_id: int,
     settings_data: EmailSettingsUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить настройки email"""
@@ -144,7 +144,7 @@ async def update_email_settings(
 @router.delete("/email-settings/{settings_id}", response_model=SuccessResponse)
 async def delete_email_settings(
     settings_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить настройки email"""
@@ -174,7 +174,7 @@ async def delete_email_settings(
 async def test_email_settings(
     settings_id: int,
     test_data: EmailTestRequest,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Тестировать настройки email"""
@@ -227,7 +227,7 @@ async def test_email_settings(
 @router.get("/api-keys", response_model=List[ApiKeySettingsResponse])
 async def get_api_keys(
     service_name: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить все API ключи"""
@@ -247,7 +247,7 @@ async def get_api_keys(
 @router.post("/api-keys", response_model=ApiKeySettingsResponse)
 async def create_api_key(
     key_data: ApiKeySettingsCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать API ключ"""
@@ -300,7 +300,7 @@ async def create_api_key(
 async def update_api_key(
     key_id: int,
     key_data: ApiKeySettingsUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить API ключ"""
@@ -352,7 +352,7 @@ async def update_api_key(
 @router.delete("/api-keys/{key_id}", response_model=SuccessResponse)
 async def delete_api_key(
     key_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить API ключ"""
@@ -382,7 +382,7 @@ async def delete_api_key(
 @router.get("/system-settings", response_model=List[SystemSettingResponse])
 async def get_system_settings(
     category: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить системные настройки"""
@@ -402,7 +402,7 @@ async def get_system_settings(
 @router.post("/system-settings", response_model=SystemSettingResponse)
 async def create_system_setting(
     setting_data: SystemSettingCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать системную настройку"""
@@ -457,7 +457,7 @@ async def create_system_setting(
 async def update_system_setting(
     setting_id: int,
     setting_data: SystemSettingUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить системную настройку"""
@@ -496,7 +496,7 @@ async def update_system_setting(
 @router.delete("/system-settings/{setting_id}", response_model=SuccessResponse)
 async def delete_system_setting(
     setting_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить системную настройку"""
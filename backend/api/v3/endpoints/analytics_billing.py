@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import json
 
-from database import get_db
+from database import get_async_db, get_async_read_db
 from ..schemas import (
     ApiUsageStats, BillingInfo, ApiCostBreakdown, 
     SuccessResponse, ErrorResponse
@@ -88,7 +88,7 @@ async def get_api_usage_stats(
     user_id: Optional[int] = Query(None, description="ID пользователя (только для админов)"),
     start_date: Optional[datetime] = Query(None, description="Начальная дата"),
     end_date: Optional[datetime] = Query(None, description="Конечная дата"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить статистику использования API"""
@@ -189,7 +189,7 @@ async def get_api_usage_stats(
 @router.get("/billing/info", response_model=BillingInfo)
 async def get_billing_info(
     user_id: Optional[int] = Query(None, description="ID пользователя (только для админов)"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить информацию о биллинге"""
@@ -243,7 +243,7 @@ async def get_billing_info(
 async def get_cost_breakdown(
     start_date: Optional[datetime] = Query(None, description="Начальная дата"),
     end_date: Optional[datetime] = Query(None, description="Конечная дата"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить детальную разбивку стоимости API"""
@@ -307,7 +307,7 @@ async def get_cost_breakdown(
 @router.get("/analytics/performance", response_model=Dict[str, Any])
 async def get_performance_analytics(
     hours: int = Query(24, ge=1, le=168, description="Количество часов для анализа"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить аналитику производительности API"""
@@ -379,7 +379,7 @@ async def get_performance_analytics(
 @router.get("/analytics/users", response_model=Dict[str, Any])
 async def get_user_analytics(
     days: int = Query(30, ge=1, le=365, description="Количество дней для анализа"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить аналитику пользователей"""
@@ -445,7 +445,7 @@ async def get_user_analytics(
 @router.post("/billing/upgrade-plan", response_model=SuccessResponse)
 async def upgrade_plan(
     new_plan: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить план подписки"""
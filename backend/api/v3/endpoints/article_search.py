@@ -2,7 +2,7 @@
 API эндпоинты для поиска поставщиков артикулов
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import select, and_, or_, func, desc, text
 from sqlalchemy.orm import selectinload
@@ -23,6 +23,8 @@ from models import (
     ArticleSearchResult, SupplierValidationLog, ApiKey
 )
 from api.v1.dependencies import get_current_user
+from api.v1.schemas import JobAcceptedResponse
+from utils.jobs import JobCancelled, JobContext, enqueue_sync, job_accepted, job_handler
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -346,14 +348,106 @@ def test_endpoint():
     """Тестовый эндпоинт"""
     return {"message": "API v3 работает!", "status": "ok"}
 
-@router.post("/search", response_model=SearchRequestResponse)
+def run_article_search(
+    db: Session,
+    search_request,
+    articles: List[str],
+    use_ai: bool,
+    context: Optional[JobContext] = None
+) -> Dict[str, Any]:
+    """Поиск поставщиков по артикулам запроса; результаты сохраняются в БД"""
+    from models import ArticleSearchResult
+    all_results = 0
+    total_suppliers = 0
+
+    if use_ai:
+        try:
+            api_key = get_polza_api_key(db)
+            logger.info("🔑 API ключ получен, выполняем поиск с ИИ")
+            
+            # Ищем поставщиков для каждого артикула
+            for index, article in enumerate(articles):
+                if context:
+                    context.report(100 * index / len(articles), f"Поиск {article} ({index + 1} из {len(articles)})")
+                suppliers = search_suppliers_with_ai(article, api_key, db)
+                if suppliers:
+                    all_results += 1
+                    total_suppliers += len(suppliers)
+                    
+                    # Сохраняем результаты в базу данных
+                    for supplier_data in suppliers:
+                        result = ArticleSearchResult(
+                            request_id=search_request.id,
+                            article=article,
+                            company_name=supplier_data.get('company_name', 'Неизвестно'),
+                            contact_person=supplier_data.get('contact_person'),
+                            email=supplier_data.get('email'),
+                            phone=supplier_data.get('phone'),
+                            website=supplier_data.get('website'),
+                            address=supplier_data.get('address'),
+                            country=supplier_data.get('country'),
+                            city=supplier_data.get('city'),
+                            price=supplier_data.get('price'),
+                            currency=supplier_data.get('currency', 'RUB'),
+                            min_order_quantity=supplier_data.get('min_order_quantity'),
+                            availability=supplier_data.get('availability', 'in_stock'),
+                            confidence_score=supplier_data.get('confidence_score', 0.5)
+                        )
+                        db.add(result)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            logger.warning(f"Не удалось получить API ключ, поиск без ИИ: {e}")
+            all_results = 0
+
+    search_request.status = "completed"
+    search_request.results_count = all_results
+    search_request.completed_at = datetime.utcnow()
+    db.commit()
+    logger.info(f"✅ Поиск завершен для запроса {search_request.id}, найдено {total_suppliers} поставщиков")
+    return {"request_id": search_request.id, "found_articles": all_results, "total_suppliers": total_suppliers}
+
+
+def _article_search_job(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from database import SessionLocal
+    from models import ArticleSearchRequest as ArticleSearchRequestModel
+    with SessionLocal() as db:
+        search_request = db.get(ArticleSearchRequestModel, payload["request_id"])
+        if search_request is None:
+            raise RuntimeError(f"Запрос поиска {payload['request_id']} удалён")
+        search_request.status = "processing"
+        db.commit()
+        try:
+            return run_article_search(db, search_request, payload["articles"], payload.get("use_ai", True), context)
+        except Exception as e:
+            logger.error(f"Ошибка поиска: {e}")
+            db.rollback()
+            search_request.status = "failed"
+            db.commit()
+            raise
+
+
+@job_handler("article_search", priority=5, max_attempts=1)
+async def article_search_job(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Фоновый поиск поставщиков (сетевые запросы и синхронная сессия - в потоке)
+
+    Без повторов: после ошибки запрос помечается failed, и клиент считает
+    этот статус окончательным. Повторный поиск - новый запрос POST /search.
+    """
+    return await asyncio.to_thread(_article_search_job, context, payload)
+
+
+@router.post("/search", response_model=JobAcceptedResponse, status_code=202)
 def search_articles(
     request: ArticleSearchRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Поиск поставщиков для списка артикулов"""
+    """Поиск поставщиков для списка артикулов
+
+    Запрос ставится в очередь; прогресс - GET /api/v1/jobs/{job_id},
+    результаты - GET /requests/{request_id}.
+    """
     try:
         logger.info(f"🔍 Получен запрос поиска: {request}")
         logger.info(f"👤 Пользователь: {current_user.username}")
@@ -363,87 +457,18 @@ def search_articles(
             user_id=current_user.id,
             search_query=", ".join(request.articles),  # Объединяем артикулы в строку
             search_type="article",
-            status="processing"
+            status="pending"
         )
         db.add(search_request)
         db.commit()
         
-        # Выполняем поиск синхронно
-        try:
-            all_results = []
-            total_suppliers = 0
-            
-            if request.use_ai:
-                try:
-                    api_key = get_polza_api_key(db)
-                    logger.info("🔑 API ключ получен, выполняем поиск с ИИ")
-                    
-                    # Ищем поставщиков для каждого артикула
-                    for article in request.articles:
-                        suppliers = search_suppliers_with_ai(article, api_key, db)
-                        if suppliers:
-                            confidence_scores = [s.get('confidence_score', 0.5) for s in suppliers]
-                            all_results.append({
-                                "article_code": article,
-                                "suppliers": suppliers,
-                                "total_suppliers": len(suppliers),
-                                "confidence_scores": confidence_scores
-                            })
-                            total_suppliers += len(suppliers)
-                            
-                            # Сохраняем результаты в базу данных
-                            for supplier_data in suppliers:
-                                from models import ArticleSearchResult
-                                result = ArticleSearchResult(
-                                    request_id=search_request.id,
-                                    article=article,
-                                    company_name=supplier_data.get('company_name', 'Неизвестно'),
-                                    contact_person=supplier_data.get('contact_person'),
-                                    email=supplier_data.get('email'),
-                                    phone=supplier_data.get('phone'),
-                                    website=supplier_data.get('website'),
-                                    address=supplier_data.get('address'),
-                                    country=supplier_data.get('country'),
-                                    city=supplier_data.get('city'),
-                                    price=supplier_data.get('price'),
-                                    currency=supplier_data.get('currency', 'RUB'),
-                                    min_order_quantity=supplier_data.get('min_order_quantity'),
-                                    availability=supplier_data.get('availability', 'in_stock'),
-                                    confidence_score=supplier_data.get('confidence_score', 0.5)
-                                )
-                                db.add(result)
-                    
-                    search_request.status = "completed"
-                    search_request.results_count = len(all_results)
-                    
-                except Exception as e:
-                    logger.warning(f"Не удалось получить API ключ, поиск без ИИ: {e}")
-                    search_request.status = "completed"
-                    search_request.results_count = 0
-            else:
-                search_request.status = "completed"
-                search_request.results_count = 0
-            
-            db.commit()
-            logger.info(f"✅ Поиск завершен для запроса {search_request.id}, найдено {total_suppliers} поставщиков")
-            
-        except Exception as e:
-            logger.error(f"Ошибка поиска: {e}")
-            search_request.status = "failed"
-            db.commit()
-        
-        return SearchRequestResponse(
-            id=search_request.id,
-            request_name=request.request_name or f"Поиск {', '.join(request.articles[:3])}...",
-            articles=request.articles,
-            status=search_request.status,  # Используем актуальный статус из БД
-            total_articles=len(request.articles),
-            found_articles=search_request.results_count,
-            total_suppliers=total_suppliers,
-            created_at=search_request.created_at,
-            completed_at=search_request.completed_at,
-            results=all_results
+        job = enqueue_sync(
+            db,
+            "article_search",
+            {"request_id": search_request.id, "articles": request.articles, "use_ai": request.use_ai},
+            user_id=current_user.id
         )
+        return job_accepted(job, request_id=search_request.id)
         
     except Exception as e:
         logger.error(f"Ошибка создания запроса поиска: {e}")
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
 from typing import List, Optional
 from datetime import datetime, timedelta
+import asyncio
 import os
 import subprocess
 import shutil
@@ -16,6 +17,8 @@ from database import get_db
 from ..models import BackupLog
 from ..schemas import BackupLogResponse, BackupCreateRequest, BackupStatsResponse
 from ..utils import PermissionManager, ActivityLogger
+from api.v1.schemas import JobAcceptedResponse
+from utils.jobs import JobContext, enqueue_sync, job_accepted, job_handler
 
 router = APIRouter()
 permission_manager = PermissionManager()
@@ -96,13 +99,12 @@ async def get_backup_stats(db: Session = Depends(get_db)):
     )
 
 
-@router.post("/backups/create")
+@router.post("/backups/create", response_model=JobAcceptedResponse, status_code=202)
 async def create_backup(
     backup_request: BackupCreateRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
-    """Создать резервную копию"""
+    """Создать резервную копию (фоновой задачей, статус - GET /api/v1/jobs/{job_id})"""
     
     if not permission_manager.has_permission("admin", "backup.write"):
         raise HTTPException(status_code=403, detail="Недостаточно прав для создания резервных копий")
@@ -118,20 +120,42 @@ async def create_backup(
     db.commit()
     db.refresh(backup_log)
     
-    # Запускаем резервное копирование в фоне
-    background_tasks.add_task(
-        perform_backup,
-        backup_log.id,
-        backup_request.backup_type,
-        backup_request.include_files,
-        backup_request.compression
+    # Ставим резервное копирование в очередь фоновых задач
+    job = enqueue_sync(
+        db,
+        "backup",
+        {
+            "backup_id": backup_log.id,
+            "backup_type": backup_request.backup_type,
+            "include_files": backup_request.include_files,
+            "compression": backup_request.compression,
+        },
+        user_id=backup_request.created_by
     )
     
-    return {
-        "message": "Резервное копирование запущено",
-        "backup_id": backup_log.id,
-        "status": "IN_PROGRESS"
-    }
+    return job_accepted(
+        job,
+        message="Резервное копирование запущено",
+        backup_id=backup_log.id,
+        backup_status="IN_PROGRESS"
+    )
+
+
+@job_handler("backup", priority=-10, max_attempts=1)
+async def backup_job(context: JobContext, payload: dict) -> dict:
+    """Фоновое резервное копирование"""
+    context.report(0, "Резервное копирование")
+    await perform_backup(
+        payload["backup_id"], payload["backup_type"], payload["include_files"], payload["compression"]
+    )
+    db = next(get_db())
+    try:
+        backup = db.query(BackupLog).filter(BackupLog.id == payload["backup_id"]).first()
+        if backup is None or backup.status != 'SUCCESS':
+            raise RuntimeError(backup.error_message if backup else "Запись о резервной копии удалена")
+        return {"backup_id": backup.id, "file_path": backup.file_path, "file_size": backup.file_size}
+    finally:
+        db.close()
 
 
 @router.post("/backups/{backup_id}/restore")
@@ -306,8 +330,9 @@ async def backup_database(backup_id: int, compression: bool) -> Optional[str]:
         if compression:
             cmd.extend(["-Z", "9"])
         
+        # В потоке: pg_dump не должен блокировать event loop исполнителя задач
         with open(filepath, 'w') as f:
-            subprocess.run(cmd, stdout=f, check=True)
+            await asyncio.to_thread(subprocess.run, cmd, stdout=f, check=True)
         
         return filepath
         
@@ -340,7 +365,7 @@ async def backup_files_system(backup_id: int, compression: bool) -> Optional[str
         
         cmd.extend(existing_dirs)
         
-        subprocess.run(cmd, check=True)
+        await asyncio.to_thread(subprocess.run, cmd, check=True)
         
         return filepath
         
@@ -8,7 +8,7 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
 from typing import List, Dict, Any, Optional
@@ -16,7 +16,7 @@ from datetime import datetime, timedelta
 import asyncio
 import logging
 
-from database import get_db
+from database import AsyncSessionLocal, get_async_db
 from ..schemas import (
     EmailSettingsCreate, EmailSettingsUpdate, EmailSettingsResponse,
     EmailTestRequest, EmailTestResponse, EmailStatsResponse,
@@ -28,7 +28,9 @@ from ..utils import (
     ActivityLogger, SettingsValidator, encryption_manager
 )
 from ...v1.dependencies import get_current_user
+from ...v1.schemas import JobAcceptedResponse
 from models import User
+from utils.jobs import JobContext, enqueue, job_accepted, job_handler
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -220,7 +222,7 @@ class EmailManager:
 # Эндпоинты для управления email настройками
 @router.get("/email-settings", response_model=List[EmailSettingsResponse])
 async def get_email_settings(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить все настройки email"""
@@ -235,7 +237,7 @@ async def get_email_settings(
 @router.post("/email-settings", response_model=EmailSettingsResponse)
 async def create_email_settings(
     settings_data: EmailSettingsCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать настройки email"""
@@ -288,7 +290,7 @@ async def create_email_settings(
 async def update_email_settings(
     settings_id: int,
     settings_data: EmailSettingsUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить настройки email"""
@@ -338,7 +340,7 @@ async def update_email_settings(
 @router.delete("/email-settings/{settings_id}", response_model=SuccessResponse)
 async def delete_email_settings(
     settings_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить настройки email"""
@@ -375,7 +377,7 @@ async def delete_email_settings(
 @router.post("/email-settings/{settings_id}/test-connection", response_model=EmailTestResponse)
 async def test_email_connection(
     settings_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Тестировать подключение к email серверу"""
@@ -407,7 +409,7 @@ async def test_email_connection(
 async def test_email_send(
     settings_id: int,
     test_request: EmailTestRequest,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Отправить тестовое письмо"""
@@ -444,7 +446,7 @@ async def test_email_send(
 async def get_email_stats(
     settings_id: int,
     days: int = 30,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить статистику использования email настроек"""
@@ -480,7 +482,7 @@ async def get_email_stats(
 @router.post("/email-settings/{settings_id}/set-default", response_model=SuccessResponse)
 async def set_default_email_settings(
     settings_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Установить настройки email по умолчанию"""
@@ -516,18 +518,35 @@ async def set_default_email_settings(
     return SuccessResponse(message="Настройки email установлены по умолчанию")
 
 
-@router.post("/email-settings/send-bulk", response_model=SuccessResponse)
+@job_handler("bulk_email", priority=0)
+async def bulk_email_job(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Фоновая массовая рассылка (одно письмо всем получателям, как и раньше)"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(EmailSettings).where(EmailSettings.id == payload["settings_id"]))
+        settings = result.scalar_one_or_none()
+    if settings is None or not settings.is_active:
+        raise RuntimeError("Настройки email не найдены или неактивны")
+
+    context.report(0, f"Отправка {len(payload['to_emails'])} получателям")
+    result = await EmailManager.send_email(
+        settings, payload["to_emails"], payload["subject"], payload["body"], payload.get("is_html", True)
+    )
+    if not result["success"]:
+        raise RuntimeError(result.get("details") or result["error"])
+    return {"message": result["message"], "recipients_count": len(payload["to_emails"])}
+
+
+@router.post("/email-settings/send-bulk", response_model=JobAcceptedResponse, status_code=202)
 async def send_bulk_email(
     settings_id: int,
     to_emails: List[str],
     subject: str,
     body: str,
     is_html: bool = True,
-    background_tasks: BackgroundTasks = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Отправить массовое письмо"""
+    """Отправить массовое письмо (фоновой задачей, статус - GET /api/v1/jobs/{job_id})"""
     await PermissionManager.require_permission(db, current_user.id, "settings.manage_email")
     
     # Получаем настройки
@@ -546,32 +565,17 @@ async def send_bulk_email(
             detail="Настройки email неактивны"
         )
     
-    # Добавляем задачу в фоновые задачи
-    if background_tasks:
-        background_tasks.add_task(
-            EmailManager.send_email,
-            settings,
-            to_emails,
-            subject,
-            body,
-            is_html
-        )
-        
-        # Логируем активность
-        await ActivityLogger.log_activity(
-            db, current_user.id, "send_bulk_email", "email_settings", str(settings_id),
-            details={"recipients_count": len(to_emails), "subject": subject}
-        )
-        
-        return SuccessResponse(message=f"Массовая рассылка запущена для {len(to_emails)} получателей")
-    else:
-        # Синхронная отправка
-        result = await EmailManager.send_email(settings, to_emails, subject, body, is_html)
-        
-        if result["success"]:
-            return SuccessResponse(message=result["message"])
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=result["error"]
-            )
+    # Логируем активность
+    await ActivityLogger.log_activity(
+        db, current_user.id, "send_bulk_email", "email_settings", str(settings_id),
+        details={"recipients_count": len(to_emails), "subject": subject}
+    )
+    
+    # Ставим рассылку в очередь фоновых задач
+    job = await enqueue(
+        db,
+        "bulk_email",
+        {"settings_id": settings_id, "to_emails": to_emails, "subject": subject, "body": body, "is_html": is_html},
+        user_id=current_user.id
+    )
+    return job_accepted(job, message=f"Массовая рассылка запущена для {len(to_emails)} получателей")
@@ -12,7 +12,7 @@ import json
 import asyncio
 import logging
 
-from database import get_db
+from database import get_async_db
 from ..schemas import (
     IntegrationCreate, IntegrationUpdate, IntegrationResponse,
     WebhookConfig, IntegrationTestResult, SuccessResponse, ErrorResponse
@@ -608,7 +608,7 @@ async def get_supported_integrations():
 
 @router.get("/integrations", response_model=List[IntegrationResponse])
 async def get_integrations(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить список настроенных интеграций"""
@@ -647,7 +647,7 @@ async def get_integrations(
 @router.post("/integrations", response_model=IntegrationResponse)
 async def create_integration(
     integration_data: IntegrationCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать новую интеграцию"""
@@ -700,7 +700,7 @@ async def create_integration(
 @router.post("/integrations/{integration_id}/test", response_model=IntegrationTestResult)
 async def test_integration(
     integration_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Тестировать интеграцию"""
@@ -752,7 +752,7 @@ async def send_notification(
     message: str,
     data: Optional[Dict[str, Any]] = None,
     background_tasks: BackgroundTasks = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Отправить уведомление через интеграцию"""
@@ -826,7 +826,7 @@ async def send_notification(
 @router.delete("/integrations/{integration_id}", response_model=SuccessResponse)
 async def delete_integration(
     integration_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить интеграцию"""
@@ -4,12 +4,13 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, and_, or_, select
 from typing import List, Optional
 from datetime import datetime, timedelta
 import json
 
-from database import get_db
+from database import get_db, get_async_read_db
 from ..models import SystemLog, LoginLog, SecurityEvent
 from ..schemas import (
     SystemLogResponse, LoginLogResponse, SecurityEventResponse,
@@ -32,7 +33,7 @@ async def get_system_logs(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Получить системные логи с фильтрацией"""
     
@@ -40,27 +41,28 @@ async def get_system_logs(
     if not permission_manager.has_permission("admin", "logs.read"):
         raise HTTPException(status_code=403, detail="Недостаточно прав для просмотра логов")
     
-    query = db.query(SystemLog)
+    query = select(SystemLog)
     
     # Применяем фильтры
     if level:
-        query = query.filter(SystemLog.level == level.upper())
+        query = query.where(SystemLog.level == level.upper())
     if module:
-        query = query.filter(SystemLog.module.ilike(f"%{module}%"))
+        query = query.where(SystemLog.module.ilike(f"%{module}%"))
     if user_id:
-        query = query.filter(SystemLog.user_id == user_id)
+        query = query.where(SystemLog.user_id == user_id)
     if start_date:
-        query = query.filter(SystemLog.created_at >= start_date)
+        query = query.where(SystemLog.created_at >= start_date)
     if end_date:
-        query = query.filter(SystemLog.created_at <= end_date)
+        query = query.where(SystemLog.created_at <= end_date)
     if search:
-        query = query.filter(SystemLog.message.ilike(f"%{search}%"))
+        query = query.where(SystemLog.message.ilike(f"%{search}%"))
     
     # Сортировка по дате (новые сначала)
     query = query.order_by(desc(SystemLog.created_at))
     
     # Пагинация
-    logs = query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    logs = result.scalars().all()
     
     return logs
 
@@ -3,6 +3,7 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func, and_
 from typing import List, Optional, Dict, Any
@@ -11,13 +12,20 @@ import psutil
 import os
 import json
 
-from database import get_db
+from database import (
+    get_db, get_async_db, engine, async_engine, replica_engine, async_replica_engine, replica_health
+)
+from core.db_pool import engine_pool_stats, pool_config
 from ..models import SystemMetrics, SystemLog, LoginLog
+from models import User
 from ..schemas import (
     SystemMetricsResponse, SystemHealthResponse, 
     PerformanceMetricsResponse, DatabaseStatsResponse
 )
 from ..utils import PermissionManager, ActivityLogger
+from ...v1.dependencies import get_current_user
+from ...v1.shared.password_hasher import password_hasher
+from ...v1.shared.principal_cache import principal_cache
 
 router = APIRouter()
 permission_manager = PermissionManager()
@@ -264,6 +272,47 @@ async def get_system_alerts(
     return {"alerts": alerts, "total": len(alerts)}
 
 
+@router.get("/pool-stats")
+async def get_pool_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Состояние пулов соединений с БД (для подбора размера пула на воркер)"""
+    
+    await PermissionManager.require_permission(db, current_user.id, "monitoring.read")
+    
+    return {
+        "pid": os.getpid(),
+        "config": pool_config(),
+        "pools": {
+            "sync": engine_pool_stats(engine),
+            "async": engine_pool_stats(async_engine),
+            **({
+                "replica_sync": engine_pool_stats(replica_engine),
+                "replica_async": engine_pool_stats(async_replica_engine)
+            } if replica_engine is not None else {})
+        },
+        "replica": replica_health.stats(),
+        "timestamp": datetime.utcnow()
+    }
+
+
+@router.get("/auth-stats")
+async def get_auth_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Статистика пула хеширования паролей и кэша пользователей"""
+    
+    await PermissionManager.require_permission(db, current_user.id, "monitoring.read")
+    
+    return {
+        "password_hasher": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "timestamp": datetime.utcnow()
+    }
+
+
 def get_system_uptime() -> str:
     """Получить время работы системы"""
     try:
@@ -11,7 +11,7 @@ import json
 import asyncio
 import logging
 
-from database import get_db
+from database import get_async_db
 from ..schemas import (
     NotificationCreate, NotificationResponse, NotificationUpdate,
     NotificationTemplate, NotificationStats, SuccessResponse, ErrorResponse
@@ -413,7 +413,7 @@ class NotificationManager:
 async def send_notification(
     notification_data: NotificationCreate,
     background_tasks: BackgroundTasks = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Отправить уведомление"""
@@ -460,7 +460,7 @@ async def broadcast_notification(
     channels: List[str] = ["email", "in_app"],
     user_ids: Optional[List[int]] = None,
     background_tasks: BackgroundTasks = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Отправить массовое уведомление"""
@@ -506,7 +506,7 @@ async def broadcast_notification(
 @router.get("/notifications/stats", response_model=NotificationStats)
 async def get_notification_stats(
     days: int = Query(30, ge=1, le=365),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить статистику уведомлений"""
@@ -519,7 +519,7 @@ async def get_notification_stats(
 
 @router.get("/notifications/templates", response_model=List[NotificationTemplate])
 async def get_notification_templates(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить шаблоны уведомлений"""
@@ -561,7 +561,7 @@ async def get_notification_templates(
 @router.post("/notifications/templates", response_model=NotificationTemplate)
 async def create_notification_template(
     template_data: NotificationTemplate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать шаблон уведомления"""
@@ -615,7 +615,7 @@ async def test_notification(
     title: str = "Тестовое уведомление",
     message: str = "Это тестовое уведомление для проверки системы",
     channels: List[str] = ["email"],
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Отправить тестовое уведомление"""
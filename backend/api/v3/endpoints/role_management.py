@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 from typing import List, Dict, Any, Optional
-from database import get_db
+from database import get_async_db
 from ..schemas import (
     RoleCreate, RoleUpdate, RoleResponse, 
     SystemPermissionSchema, SuccessResponse
@@ -27,7 +27,7 @@ async def get_roles(
     search: Optional[str] = Query(None, description="Поиск по названию роли"),
     is_active: Optional[bool] = Query(None, description="Фильтр по активности"),
     include_system: bool = Query(True, description="Включать системные роли"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить список ролей"""
@@ -69,7 +69,7 @@ async def get_roles(
 
 @router.get("/permissions", response_model=List[Dict[str, str]])
 async def get_available_permissions(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить список доступных разрешений"""
@@ -89,7 +89,7 @@ async def get_available_permissions(
 @router.get("/{role_id}", response_model=RoleResponse)
 async def get_role(
     role_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить роль по ID"""
@@ -119,7 +119,7 @@ async def get_role(
 @router.post("/", response_model=RoleResponse)
 async def create_role(
     role_data: RoleCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать новую роль"""
@@ -180,7 +180,7 @@ async def create_role(
 async def update_role(
     role_id: int,
     role_data: RoleUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить роль"""
@@ -250,7 +250,7 @@ async def update_role(
 @router.delete("/{role_id}", response_model=SuccessResponse)
 async def delete_role(
     role_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить роль"""
@@ -308,7 +308,7 @@ async def get_role_users(
     role_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить пользователей с определенной ролью"""
@@ -359,7 +359,7 @@ async def clone_role(
     role_id: int,
     new_name: str = Query(..., description="Имя для новой роли"),
     new_display_name: str = Query(..., description="Отображаемое имя для новой роли"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Клонировать роль"""
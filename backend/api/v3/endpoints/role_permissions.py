@@ -8,7 +8,7 @@ from sqlalchemy import select, and_, or_, func, desc
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 
-from database import get_db
+from database import get_async_db
 from ..schemas import (
     RoleCreate, RoleUpdate, RoleResponse, RolePermissionCreate, RolePermissionResponse,
     UserRoleAssignment, UserRoleResponse, UserDetailedResponse, SystemPermissionSchema,
@@ -29,7 +29,7 @@ async def get_roles(
     search: Optional[str] = Query(None, description="Поиск по названию роли"),
     is_active: Optional[bool] = Query(None, description="Фильтр по активности"),
     include_system: bool = Query(True, description="Включать системные роли"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить список ролей с фильтрацией"""
@@ -102,7 +102,7 @@ async def get_roles(
 @router.post("/roles", response_model=RoleResponse)
 async def create_role(
     role_data: RoleCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать новую роль"""
@@ -153,7 +153,7 @@ async def create_role(
 
 
 @router.get("/roles/{role_id}", response_model=RoleResponse)
-async def get_role_by_id(role_id: int, db: AsyncSession = Depends(get_db)):
+async def get_role_by_id(role_id: int, db: AsyncSession = Depends(get_async_db)):
     """Получить роль по ID"""
     result = await db.execute(select(Role).where(Role.id == role_id))
     role = result.scalar_one_or_none()
@@ -198,7 +198,7 @@ async def get_role_by_id(role_id: int, db: AsyncSession = Depends(get_db)):
 async def update_role(
     role_id: int,
     role_data: RoleUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить роль"""
@@ -263,7 +263,7 @@ async def update_role(
 @router.delete("/roles/{role_id}", response_model=SuccessResponse)
 async def delete_role(
     role_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить роль"""
@@ -322,7 +322,7 @@ async def delete_role(
 @router.get("/permissions", response_model=List[Dict[str, Any]])
 async def get_all_permissions(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Получить все доступные разрешения"""
     try:
@@ -347,7 +347,7 @@ async def get_all_permissions(
 async def add_permission_to_role(
     role_id: int,
     permission_data: RolePermissionCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Добавить разрешение к роли"""
@@ -402,7 +402,7 @@ async def add_permission_to_role(
 async def remove_permission_from_role(
     role_id: int,
     permission_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить разрешение из роли"""
@@ -441,7 +441,7 @@ async def remove_permission_from_role(
 @router.get("/users/{user_id}/roles", response_model=List[UserRoleResponse])
 async def get_user_roles(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить роли пользователя"""
@@ -484,7 +484,7 @@ async def get_user_roles(
 async def assign_role_to_user(
     user_id: int,
     assignment: UserRoleAssignment,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Назначить роль пользователю"""
@@ -552,7 +552,7 @@ async def assign_role_to_user(
 async def remove_role_from_user(
     user_id: int,
     user_role_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить роль у пользователя"""
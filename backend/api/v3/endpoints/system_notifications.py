@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, desc
 from typing import List, Dict, Any, Optional
-from database import get_db
+from database import get_async_db
 from ..schemas import (
     NotificationCreate, NotificationUpdate, NotificationResponse,
     SuccessResponse
@@ -29,7 +29,7 @@ async def get_notifications(
     is_system_wide: Optional[bool] = Query(None),
     priority: Optional[int] = Query(None, ge=1, le=3),
     only_active: bool = Query(True, description="Показывать только активные уведомления"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить список уведомлений для текущего пользователя"""
@@ -107,7 +107,7 @@ async def get_notifications(
 @router.post("/", response_model=NotificationResponse)
 async def create_notification(
     notification_data: NotificationCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создать системное уведомление"""
@@ -155,7 +155,7 @@ async def create_notification(
 async def update_notification(
     notification_id: int,
     notification_data: NotificationUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить уведомление"""
@@ -197,7 +197,7 @@ async def update_notification(
 @router.delete("/{notification_id}", response_model=SuccessResponse)
 async def delete_notification(
     notification_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удалить уведомление"""
@@ -233,7 +233,7 @@ async def delete_notification(
 @router.post("/{notification_id}/mark-read", response_model=SuccessResponse)
 async def mark_notification_read(
     notification_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Отметить уведомление как прочитанное"""
@@ -285,7 +285,7 @@ async def mark_notification_read(
 
 @router.post("/mark-all-read", response_model=SuccessResponse)
 async def mark_all_notifications_read(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Отметить все уведомления пользователя как прочитанные"""
@@ -342,7 +342,7 @@ async def mark_all_notifications_read(
 
 @router.get("/unread-count", response_model=Dict[str, int])
 async def get_unread_count(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить количество непрочитанных уведомлений"""
@@ -402,7 +402,7 @@ async def get_all_notifications_admin(
     limit: int = Query(100, ge=1, le=1000),
     created_by: Optional[int] = Query(None, description="Фильтр по создателю"),
     notification_type: Optional[str] = Query(None, regex=r'^(info|warning|error|success)$'),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить все уведомления (для администраторов)"""
@@ -431,7 +431,7 @@ async def get_all_notifications_admin(
 async def send_mass_notification(
     notification_data: NotificationCreate,
     send_email: bool = Query(False, description="Отправить также по email"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Отправить массовое уведомление"""
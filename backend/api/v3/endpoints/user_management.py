@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, desc
 from typing import List, Dict, Any, Optional
-from database import get_db
+from database import get_async_db
 from ..schemas import (
     UserDetailedResponse, UserUpdateV3, UserRoleAssignment,
     UserActivityResponse, SuccessResponse
@@ -14,6 +14,7 @@ from ..schemas import (
 from ..models import UserRole as UserRoleV3, Role, UserActivity
 from ..utils import PermissionManager, ActivityLogger
 from ...v1.dependencies import get_current_user
+from ...v1.shared.principal_cache import invalidate_user
 from models import User
 
 
@@ -28,7 +29,7 @@ async def get_users_detailed(
     role_id: Optional[int] = Query(None, description="Фильтр по роли"),
     is_active: Optional[bool] = Query(None, description="Фильтр по активности"),
     department_id: Optional[int] = Query(None, description="Фильтр по отделу"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить детальный список пользователей с фильтрами"""
@@ -80,7 +81,7 @@ async def get_users_detailed(
 @router.get("/{user_id}", response_model=UserDetailedResponse)
 async def get_user_detailed(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить детальную информацию о пользователе"""
@@ -106,7 +107,7 @@ async def get_user_detailed(
 async def update_user_detailed(
     user_id: int,
     user_data: UserUpdateV3,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить пользователя с управлением ролями"""
@@ -177,6 +178,7 @@ async def update_user_detailed(
     
     await db.commit()
     await db.refresh(user)
+    invalidate_user(user_id=user_id)
     
     # Логируем активность
     await ActivityLogger.log_activity(
@@ -193,7 +195,7 @@ async def update_user_detailed(
 async def assign_user_role(
     user_id: int,
     role_assignment: UserRoleAssignment,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Назначить роль пользователю"""
@@ -257,7 +259,7 @@ async def assign_user_role(
 async def revoke_user_role(
     user_id: int,
     role_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Отозвать роль у пользователя"""
@@ -300,7 +302,7 @@ async def get_user_activity(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=500),
     action: Optional[str] = Query(None, description="Фильтр по действию"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить активность пользователя"""
@@ -335,7 +337,7 @@ async def get_user_activity(
 @router.post("/{user_id}/activate", response_model=SuccessResponse)
 async def activate_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Активировать пользователя"""
@@ -352,6 +354,7 @@ async def activate_user(
     
     user.is_active = True
     await db.commit()
+    invalidate_user(user_id=user_id)
     
     # Логируем активность
     await ActivityLogger.log_activity(
@@ -364,7 +367,7 @@ async def activate_user(
 @router.post("/{user_id}/deactivate", response_model=SuccessResponse)
 async def deactivate_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Деактивировать пользователя"""
@@ -387,6 +390,7 @@ async def deactivate_user(
     
     user.is_active = False
     await db.commit()
+    invalidate_user(user_id=user_id)
     
     # Логируем активность
     await ActivityLogger.log_activity(
@@ -0,0 +1,158 @@
+"""
+Настройка и инструментирование пулов соединений SQLAlchemy
+
+Параметры пула берутся из переменных окружения, а пулы синхронного и
+асинхронного движков собирают метрики: занятые соединения, overflow,
+гистограмму времени ожидания соединения и ошибки подключения.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Границы корзин гистограммы ожидания соединения, мс
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", "true")
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "256"))
+
+
+class PoolMetrics:
+    """Счётчики и гистограмма ожидания для одного пула"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connect_errors = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self.wait_buckets[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def observe_error(self, exc: Exception) -> None:
+        with self._lock:
+            if isinstance(exc, PoolTimeoutError):
+                self.timeouts += 1
+            else:
+                self.connect_errors += 1
+
+    def snapshot(self, pool: QueuePool) -> Dict[str, Any]:
+        with self._lock:
+            histogram = {
+                f"le_{bound}ms": count
+                for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets)
+            }
+            histogram["le_inf"] = self.wait_buckets[-1]
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "checkouts_total": self.checkouts,
+                "timeouts_total": self.timeouts,
+                "connect_errors_total": self.connect_errors,
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "wait_histogram": histogram,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Замеряет время получения соединения из пула (включая подключение)"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception as exc:
+            self.metrics.observe_error(exc)
+            raise
+        self.metrics.observe_wait((time.perf_counter() - started) * 1000)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics = PoolMetrics("sync")
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics("async")
+
+
+def attach_metrics(engine, name: str) -> PoolMetrics:
+    """Отдельный набор метрик для пула конкретного движка"""
+    pool = getattr(engine, "sync_engine", engine).pool
+    pool.metrics = PoolMetrics(name)
+    return pool.metrics
+
+
+def pool_kwargs() -> Dict[str, Any]:
+    """Общие параметры пула для create_engine/create_async_engine"""
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def sync_connect_args() -> Dict[str, Any]:
+    """psycopg2: statement_timeout через параметры сессии"""
+    return {"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"}
+
+
+def async_connect_args() -> Dict[str, Any]:
+    """asyncpg: statement_timeout и размер кэша подготовленных выражений"""
+    return {
+        "server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)},
+        "prepared_statement_cache_size": PREPARED_STATEMENT_CACHE_SIZE,
+    }
+
+
+def pool_config() -> Dict[str, Any]:
+    return {
+        **pool_kwargs(),
+        "statement_timeout_ms": STATEMENT_TIMEOUT_MS,
+        "prepared_statement_cache_size": PREPARED_STATEMENT_CACHE_SIZE,
+    }
+
+
+def engine_pool_stats(engine) -> Dict[str, Any]:
+    """Метрики пула движка (sync Engine или AsyncEngine)"""
+    pool = getattr(engine, "sync_engine", engine).pool
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        return {"status": pool.status()}
+    return metrics.snapshot(pool)
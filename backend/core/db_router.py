@@ -0,0 +1,127 @@
+"""
+Маршрутизация read-only запросов на реплику
+
+Отчёты, аналитика, логи и архивы читаются с реплики (REPLICA_DATABASE_URL),
+если она доступна и её отставание не превышает REPLICA_MAX_LAG_SECONDS.
+Иначе запрос прозрачно уходит на primary. Результат проверки кэшируется
+на REPLICA_LAG_CHECK_INTERVAL секунд, чтобы не платить лишний round trip.
+
+Репликой считается только standby с работающим WAL receiver (status =
+'streaming'): у отключившейся от primary реплики полученный и применённый
+LSN совпадают и замирают, и отставание по ним выглядело бы нулевым.
+Неизвестное отставание (не standby, нет streaming, нет отметки применения)
+считается превышающим порог. Роли реплики нужны права pg_read_all_stats,
+иначе статус WAL receiver ей не виден и чтение всегда идёт на primary.
+
+Для локальной разработки вместо standby можно указать вторую обычную базу:
+с REPLICA_ALLOW_NON_STANDBY=true сервер не в recovery считается репликой
+без отставания. На проде флаг не включать - свежесть данных такой «реплики»
+ничем не гарантирована.
+
+Сессии чтения (database.get_read_db/get_async_read_db) открываются в
+режиме READ ONLY и на primary тоже: запись в «читающем» обработчике падает
+одинаково в разработке и на реплике.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL", "")
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2"))
+REPLICA_ALLOW_NON_STANDBY = os.getenv("REPLICA_ALLOW_NON_STANDBY", "false").lower() in ("1", "true", "yes")
+
+# NULL - отставание неизвестно: не standby (без allow_non_standby) или WAL
+# receiver не в streaming. Streaming-реплика, применившая всё полученное, не отстаёт
+REPLICATION_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN CASE WHEN :allow_non_standby THEN 0 END
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+UNKNOWN_LAG_ERROR = "отставание неизвестно: сервер не standby или WAL receiver не в режиме streaming"
+
+
+class ReplicaHealth:
+    """Кэшированное состояние реплики: доступность и отставание"""
+
+    def __init__(
+        self,
+        max_lag: float = REPLICA_MAX_LAG_SECONDS,
+        interval: float = REPLICA_LAG_CHECK_INTERVAL,
+        allow_non_standby: bool = REPLICA_ALLOW_NON_STANDBY
+    ):
+        self.max_lag = max_lag
+        self.interval = interval
+        self.allow_non_standby = allow_non_standby
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def _due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.interval
+
+    def _record(self, lag: Optional[float], error: Optional[str] = None) -> bool:
+        if lag is None and error is None:
+            error = UNKNOWN_LAG_ERROR
+        with self._lock:
+            self._checked_at = time.monotonic()
+            self.lag_seconds = lag
+            self.last_error = error
+            self._healthy = error is None and lag is not None and lag <= self.max_lag
+            return self._healthy
+
+    def _count(self, use_replica: bool) -> bool:
+        with self._lock:
+            if use_replica:
+                self.replica_reads += 1
+            else:
+                self.primary_fallbacks += 1
+        return use_replica
+
+    def _lag_params(self) -> Dict[str, Any]:
+        return {"allow_non_standby": self.allow_non_standby}
+
+    def check_sync(self, engine) -> bool:
+        if not self._due():
+            return self._count(self._healthy)
+        try:
+            with engine.connect() as conn:
+                lag = conn.execute(REPLICATION_LAG_SQL, self._lag_params()).scalar()
+            return self._count(self._record(None if lag is None else float(lag)))
+        except Exception as e:
+            return self._count(self._record(None, str(e)))
+
+    async def check_async(self, engine) -> bool:
+        if not self._due():
+            return self._count(self._healthy)
+        try:
+            async with engine.connect() as conn:
+                lag = (await conn.execute(REPLICATION_LAG_SQL, self._lag_params())).scalar()
+            return self._count(self._record(None if lag is None else float(lag)))
+        except Exception as e:
+            return self._count(self._record(None, str(e)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "configured": bool(REPLICA_DATABASE_URL),
+                "healthy": self._healthy,
+                "lag_seconds": self.lag_seconds,
+                "max_lag_seconds": self.max_lag,
+                "allow_non_standby": self.allow_non_standby,
+                "last_error": self.last_error,
+                "replica_reads": self.replica_reads,
+                "primary_fallbacks": self.primary_fallbacks,
+            }
@@ -46,8 +46,27 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             print(f"⚠️ Ошибка запуска проверки: {e}")
 
+    # Исполнители фоновых задач (или отдельным процессом: scripts/run_job_worker.py)
+    from utils.jobs import JOB_WORKER_IN_PROCESS, job_worker_pool, load_handlers
+    if JOB_WORKER_IN_PROCESS:
+        load_handlers()
+        job_worker_pool.start()
+
     yield
 
+    await job_worker_pool.stop()
+
+    # Останавливаем пулы процессов рендеринга PDF, извлечения текста и OCR,
+    # закрываем соединения с ИИ-провайдерами
+    from utils.ai_gateway import ai_gateway
+    from utils.ocr import ocr_client
+    from utils.pdf_render_pool import pdf_render_pool
+    from utils.text_extraction import text_extraction_pool
+    pdf_render_pool.shutdown()
+    text_extraction_pool.shutdown()
+    await ocr_client.aclose()
+    await ai_gateway.aclose()
+
 app = FastAPI(
     title="Felix - Алмазгеобур Platform",
     description="Корпоративная платформа для Алмазгеобур",
@@ -147,6 +166,9 @@ app.include_router(ved_passports_upload_router, prefix="/api/v1/ved-passports-up
 from api.v1.endpoints.admin_data_entry import router as admin_data_entry_router
 app.include_router(admin_data_entry_router, prefix="/api/v1/admin", tags=["👑 Админка - Управление данными"])
 
+from api.v1.endpoints.jobs import router as jobs_router
+app.include_router(jobs_router, prefix="/api/v1/jobs", tags=["⏳ Фоновые задачи"])
+
 # Подключаем API v3
 from api.v3.router import api_router as v3_router
 app.include_router(v3_router, prefix="/api/v3", tags=["🔍 API v3"])
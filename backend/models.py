@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, func, select, BigInteger, Float, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, func, select, BigInteger, Float, Text, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
@@ -42,6 +42,7 @@ class User(Base):
     role = Column(String, default=UserRole.EMPLOYEE)
     is_active = Column(Boolean, default=True)
     is_password_changed = Column(Boolean, default=False)  # Флаг смены пароля
+    password_version = Column(Integer, nullable=False, default=0, server_default="0")  # Версия токенов, растёт при смене пароля
     avatar_url = Column(String, nullable=True)
     phone = Column(String, nullable=True)
     department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
@@ -323,6 +324,18 @@ class VEDNomenclature(Base):
 class VedPassport(Base):
     """ВЭД паспорта"""
     __tablename__ = "ved_passports"
+    __table_args__ = (
+        # Архив: сортировка (created_at, id) для keyset-пагинации и фильтры
+        Index("ix_ved_passports_created_at_id", "created_at", "id"),
+        Index("ix_ved_passports_created_by_created_at", "created_by", "created_at"),
+        Index("ix_ved_passports_status_created_at", "status", "created_at"),
+        Index("ix_ved_passports_nomenclature_id", "nomenclature_id"),
+        # Префиксный поиск LIKE 'term%' по номерам паспорта и заказа
+        Index("ix_ved_passports_passport_number_prefix", "passport_number",
+              postgresql_ops={"passport_number": "text_pattern_ops"}),
+        Index("ix_ved_passports_order_number_prefix", "order_number",
+              postgresql_ops={"order_number": "text_pattern_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     passport_number = Column(String, nullable=False, unique=True)
@@ -350,54 +363,25 @@ class VedPassport(Base):
 
         Расширители и башмаки: AGB [Матрица] [Серийный номер] [Год]
         Пример: AGB NQ 000001 25
+
+        Серийный номер берется из блока, зарезервированного атомарным
+        UPDATE ... RETURNING (см. utils.passport_serials), поэтому db здесь
+        не используется и оставлен для совместимости.
         """
+        numbers = await VedPassport.generate_passport_numbers(1, matrix, drilling_depth, product_type)
+        return numbers[0]
+
+    @staticmethod
+    async def generate_passport_numbers(count: int, matrix: str, drilling_depth: str = None, product_type: str = None) -> list:
+        """Генерация count номеров паспортов за одно обращение к счетчику"""
+        from utils.passport_serials import passport_serial_allocator, format_passport_number
+
         current_year = datetime.datetime.now().year
-        current_year_suffix = str(current_year)[-2:]  # Последние 2 цифры года
-        counter_name = f"ved_passport_{current_year}"
-
-        # Получаем или создаем счетчик для текущего года
-        result = await db.execute(
-            select(PassportCounter).where(PassportCounter.counter_name == counter_name)
-        )
-        counter = result.scalar_one_or_none()
-
-        if not counter:
-            # Создаем новый счетчик для текущего года
-            counter = PassportCounter(
-                counter_name=counter_name,
-                current_value=0,
-                prefix="",
-                suffix=current_year_suffix
-            )
-            db.add(counter)
-            # Убираем лишний коммит - пусть будет одна транзакция
-            await db.flush()
-            print(f"DEBUG: Created new counter for year {current_year}")
-
-        # Увеличиваем счетчик
-        counter.current_value += 1
-        # Убираем лишний коммит - пусть будет одна транзакция
-        await db.flush()
-
-        # Форматируем серийный номер с ведущими нулями
-        serial_number = str(counter.current_value).zfill(6)
-
-        # Формируем номер паспорта согласно правилам
-        if product_type == "коронка":
-            # Коронки: AGB [Глубина бурения] [Матрица] [Серийный номер] [Год]
-            if drilling_depth:
-                passport_number = f"AGB {drilling_depth} {matrix} {serial_number} {current_year_suffix}"
-            else:
-                passport_number = f"AGB {matrix} {serial_number} {current_year_suffix}"
-        elif product_type in ["расширитель", "башмак"]:
-            # Расширители и башмаки: AGB [Матрица] [Серийный номер] [Год]
-            passport_number = f"AGB {matrix} {serial_number} {current_year_suffix}"
-        else:
-            # Если тип продукта не определен, используем общий формат
-            passport_number = f"AGB {matrix} {serial_number} {current_year_suffix}"
-
-        print(f"DEBUG: Generated passport number: {passport_number} (serial: {counter.current_value}, year: {current_year}, type: {product_type})")
-        return passport_number
+        serials = await passport_serial_allocator.allocate(count, current_year)
+        return [
+            format_passport_number(serial, current_year, matrix, drilling_depth, product_type)
+            for serial in serials
+        ]
 
 class VedPassportRole(Base):
     """Роли пользователей в ВЭД паспортах"""
@@ -413,6 +397,21 @@ class VedPassportRole(Base):
     passport = relationship("VedPassport", lazy="selectin")
     user = relationship("User", lazy="selectin")
 
+class VedPassportBulkRequest(Base):
+    """Идемпотентные запросы массового создания ВЭД паспортов"""
+    __tablename__ = "ved_passport_bulk_requests"
+    __table_args__ = (
+        UniqueConstraint("created_by", "idempotency_key", name="uq_ved_bulk_requests_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    order_number = Column(String, nullable=False)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 тела запроса без ключа
+    passport_ids = Column(JSON, nullable=False)  # ID созданных паспортов в порядке создания
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class PassportCounter(Base):
     """Счетчики для ВЭД паспортов"""
     __tablename__ = "passport_counters"
@@ -431,6 +430,11 @@ class PassportCounter(Base):
 class ArticleMapping(Base):
     """Соответствия артикулов контрагентов с нашей базой данных"""
     __tablename__ = "article_mappings"
+    __table_args__ = (
+        # Канонический ключ артикула (utils.nomenclature_matching)
+        Index("ix_article_mappings_contractor_article_key",
+              text(r"upper(regexp_replace(contractor_article, '[\s./_-]+', '', 'g'))")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     contractor_article = Column(String, nullable=False, index=True)  # Артикул контрагента
@@ -445,6 +449,13 @@ class ArticleMapping(Base):
 class MatchingNomenclature(Base):
     """Номенклатура для сопоставления артикулов"""
     __tablename__ = "matching_nomenclatures"
+    __table_args__ = (
+        # Канонический ключ артикула (utils.nomenclature_matching)
+        Index("ix_matching_nomenclatures_agb_article_key",
+              text(r"upper(regexp_replace(agb_article, '[\s./_-]+', '', 'g'))")),
+        Index("ix_matching_nomenclatures_bl_article_key",
+              text(r"upper(regexp_replace(bl_article, '[\s./_-]+', '', 'g'))")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     agb_article = Column(String, nullable=False, index=True)
@@ -482,6 +493,54 @@ class AiProcessingLog(Base):
     # Связи
     user = relationship("User", lazy="selectin")
 
+class AiUploadBlob(Base):
+    """Файл, загруженный для ИИ-обработки, в хранилище по содержимому (utils.blob_store)"""
+    __tablename__ = "ai_upload_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    extension = Column(String, nullable=False, default="")
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class AiProcessingLogFile(Base):
+    """Ссылка лога ИИ-обработки на файл хранилища (счётчик ссылок на файл)"""
+    __tablename__ = "ai_processing_log_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    log_id = Column(Integer, ForeignKey("ai_processing_logs.id", ondelete="CASCADE"), nullable=False, index=True)
+    sha256 = Column(String(64), ForeignKey("ai_upload_blobs.sha256", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String, nullable=False)
+
+class BackgroundJob(Base):
+    """Фоновая задача (очередь utils.jobs)"""
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        # Выбор следующей задачи: queued, по приоритету и времени запуска
+        Index("ix_background_jobs_queue", "status", "priority", "run_after"),
+        Index("ix_background_jobs_created_by_created_at", "created_by", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # ai_processing, article_search, backup, bulk_email
+    payload = Column(JSON, nullable=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    priority = Column(Integer, nullable=False, default=0)  # больше - раньше
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    progress = Column(Float, nullable=False, default=0.0)  # 0-100
+    progress_message = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    worker_id = Column(String, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    run_after = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
 class AppSettings(Base):
     """Настройки приложения"""
     __tablename__ = "app_settings"
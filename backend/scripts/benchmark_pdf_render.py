@@ -0,0 +1,66 @@
+"""Микро-бенчмарк рендеринга PDF паспортов ВЭД.
+
+Сравнивает время на один паспорт:
+  - cold: перед каждым экспортом заново настраиваются шрифт, стили и
+    логотип (как было до реестра utils.pdf_resources);
+  - warm: ресурсы берутся из реестра, измеряется только рендеринг.
+
+Запуск: python scripts/benchmark_pdf_render.py [--passports 30] [--rounds 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_generator import generate_bulk_passports_pdf  # noqa: E402
+from utils.pdf_resources import pdf_resources  # noqa: E402
+
+
+def make_passports(count: int):
+    nomenclature = SimpleNamespace(
+        id=1, code_1c="УТ-00047870", name="Коронка алмазная NQ", article="3501040",
+        matrix="NQ", drilling_depth="05-07", height="12 мм", thread=None, product_type="коронка"
+    )
+    return [
+        SimpleNamespace(id=i, passport_number=f"AGB 05-07 NQ {i:06d} 25", nomenclature=nomenclature)
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(passports, rounds: int, cold: bool) -> float:
+    """Среднее время рендеринга одного паспорта, мс"""
+    total = 0.0
+    for _ in range(rounds):
+        if cold:
+            pdf_resources.reset()
+        started = time.perf_counter()
+        generate_bulk_passports_pdf(passports)
+        total += time.perf_counter() - started
+    return total / rounds / len(passports) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--passports", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    passports = make_passports(args.passports)
+    # Прогрев: импорт модулей ReportLab и первичная регистрация шрифта
+    generate_bulk_passports_pdf(passports[:3])
+
+    cold = measure(passports, args.rounds, cold=True)
+    warm = measure(passports, args.rounds, cold=False)
+    print(f"Паспортов в экспорте: {args.passports}, повторов: {args.rounds}")
+    print(f"cold (настройка ресурсов на каждый экспорт): {cold:.3f} мс/паспорт")
+    print(f"warm (реестр ресурсов):                       {warm:.3f} мс/паспорт")
+    print(f"Инициализация ресурсов: {pdf_resources.stats()['load_ms']} мс")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
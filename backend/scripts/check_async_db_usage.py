@@ -0,0 +1,132 @@
+"""Проверка: async def-обработчики не должны использовать синхронную сессию БД.
+
+Синхронный Session внутри async def блокирует event loop на время запроса.
+Скрипт разбирает модули api/ и падает (код возврата 1), если найден
+async-маршрут, который получает Depends(get_db), аннотирован sqlalchemy
+Session или создаёт SessionLocal()/get_session() напрямую.
+
+Маршруты, ещё не переведённые на AsyncSession, перечислены в
+LEGACY_ALLOWLIST - новые нарушения в список добавлять нельзя.
+
+Запуск: python scripts/check_async_db_usage.py
+"""
+
+import ast
+import os
+import sys
+from typing import Iterator, List, Tuple
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_ROOT = os.path.join(BACKEND_ROOT, "api")
+
+SYNC_DEPENDENCIES = {"get_db"}
+SYNC_SESSION_FACTORIES = {"SessionLocal", "get_session"}
+ROUTE_DECORATORS = {"get", "post", "put", "patch", "delete", "websocket", "api_route"}
+
+# Ещё не мигрированные маршруты (модуль:функция)
+LEGACY_ALLOWLIST = {
+    "api/v1/endpoints/ai_processing.py:get_ai_logs",
+    "api/v1/endpoints/ai_processing.py:process_ai_request",
+    "api/v1/endpoints/chat.py:create_chat_message",
+    "api/v1/endpoints/chat.py:create_chat_session",
+    "api/v1/endpoints/chat.py:delete_chat_session",
+    "api/v1/endpoints/chat.py:get_chat_session",
+    "api/v1/endpoints/chat.py:get_chat_sessions",
+    "api/v1/endpoints/chat.py:update_chat_message",
+    "api/v1/endpoints/chat_folders.py:add_room_to_folder",
+    "api/v1/endpoints/chat_folders.py:create_folder",
+    "api/v1/endpoints/chat_folders.py:delete_folder",
+    "api/v1/endpoints/chat_folders.py:get_folder_rooms",
+    "api/v1/endpoints/chat_folders.py:get_folders",
+    "api/v1/endpoints/chat_folders.py:remove_room_from_folder",
+    "api/v1/endpoints/chat_folders.py:update_folder",
+    "api/v1/endpoints/chat_ws.py:websocket_endpoint",
+    "api/v1/endpoints/data_upload.py:upload_articles_data",
+    "api/v3/endpoints/backup.py:cleanup_old_backups",
+    "api/v3/endpoints/backup.py:create_backup",
+    "api/v3/endpoints/backup.py:delete_backup",
+    "api/v3/endpoints/backup.py:get_backup_logs",
+    "api/v3/endpoints/backup.py:get_backup_stats",
+    "api/v3/endpoints/backup.py:restore_backup",
+    "api/v3/endpoints/logging.py:cleanup_old_logs",
+    "api/v3/endpoints/logging.py:get_log_stats",
+    "api/v3/endpoints/logging.py:get_login_logs",
+    "api/v3/endpoints/logging.py:get_security_events",
+    "api/v3/endpoints/logging.py:resolve_security_event",
+    "api/v3/endpoints/monitoring.py:get_database_stats",
+    "api/v3/endpoints/monitoring.py:get_performance_metrics",
+    "api/v3/endpoints/monitoring.py:get_system_alerts",
+    "api/v3/endpoints/monitoring.py:get_system_health",
+    "api/v3/endpoints/monitoring.py:record_metric",
+}
+
+
+def _is_route(node: ast.AsyncFunctionDef) -> bool:
+    for decorator in node.decorator_list:
+        if isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute):
+            if decorator.func.attr in ROUTE_DECORATORS:
+                return True
+    return False
+
+
+def _name(node: ast.AST) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+def _violations(node: ast.AsyncFunctionDef) -> Iterator[str]:
+    args = node.args.args + node.args.kwonlyargs
+    defaults = [None] * (len(node.args.args) - len(node.args.defaults)) + list(node.args.defaults)
+    defaults += list(node.args.kw_defaults)
+
+    for arg, default in zip(args, defaults):
+        if arg.annotation is not None and _name(arg.annotation) == "Session":
+            yield f"параметр '{arg.arg}' аннотирован синхронным Session"
+        if isinstance(default, ast.Call) and _name(default.func) == "Depends" and default.args:
+            if _name(default.args[0]) in SYNC_DEPENDENCIES:
+                yield f"параметр '{arg.arg}' получает Depends({_name(default.args[0])})"
+
+    for child in ast.walk(node):
+        if isinstance(child, ast.Call) and _name(child.func) in SYNC_SESSION_FACTORIES:
+            yield f"вызов {_name(child.func)}() на строке {child.lineno}"
+
+
+def find_violations(root: str = API_ROOT) -> List[Tuple[str, int, str]]:
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(path, BACKEND_ROOT).replace(os.sep, "/")
+            with open(path, encoding="utf-8") as f:
+                tree = ast.parse(f.read(), filename=path)
+            for node in ast.walk(tree):
+                if isinstance(node, ast.AsyncFunctionDef) and _is_route(node):
+                    for reason in _violations(node):
+                        found.append((f"{relpath}:{node.name}", node.lineno, reason))
+    return found
+
+
+def main() -> int:
+    violations = find_violations()
+    new = [v for v in violations if v[0] not in LEGACY_ALLOWLIST]
+    stale = LEGACY_ALLOWLIST - {v[0] for v in violations}
+
+    for key, lineno, reason in new:
+        print(f"❌ {key} (строка {lineno}): {reason}")
+    for key in sorted(stale):
+        print(f"⚠️ {key} больше не нарушает правило - удалите из LEGACY_ALLOWLIST")
+
+    if new:
+        print(f"Найдено {len(new)} нарушений: используйте get_async_db/AsyncSession или обычный def")
+        return 1
+    print("✅ Синхронные сессии в async-маршрутах не найдены")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Сборка мусора в хранилище файлов ИИ-обработки (uploads/ai_processing)
+
+Снимает ссылки логов старше срока хранения и удаляет файлы без ссылок
+вместе с извлечённым текстом (utils.blob_store). Запускать по расписанию,
+например раз в сутки из cron.
+
+Запуск: python scripts/gc_ai_uploads.py [--retention-days 30] [--dry-run]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from database import SessionLocal  # noqa: E402
+from utils.blob_store import ai_upload_store  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retention-days", type=int, default=None,
+                        help="срок хранения ссылок из логов, дней (по умолчанию AI_UPLOAD_RETENTION_DAYS)")
+    parser.add_argument("--dry-run", action="store_true", help="только показать, что будет удалено")
+    args = parser.parse_args()
+
+    print(f"🧹 Сборка мусора в {ai_upload_store.root}...")
+    with SessionLocal() as db:
+        result = ai_upload_store.collect_garbage(db, args.retention_days, args.dry_run)
+    prefix = "Будет удалено" if args.dry_run else "Удалено"
+    print(f"📊 Снято ссылок логов: {result['links_expired']}")
+    print(f"✅ {prefix}: файлов хранилища {result['blobs_deleted']}, всего файлов {result['files_deleted']}, "
+          f"{result['bytes_freed'] / (1024 * 1024):.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
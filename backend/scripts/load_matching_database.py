@@ -4,9 +4,11 @@
 """
 import pandas as pd
 import asyncio
+import itertools
 import sys
 import os
 from pathlib import Path
+from typing import Iterable
 
 # Добавляем корневую директорию проекта в путь
 project_root = Path(__file__).parent.parent
@@ -14,6 +16,7 @@ sys.path.append(str(project_root))
 
 from database import get_db
 from models import VEDNomenclature, ArticleMapping
+from utils.tabular_reader import read_batches
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import logging
@@ -33,16 +36,16 @@ async def load_matching_database():
         return
     
     try:
-        # Читаем Excel файл
+        # Читаем Excel файл порциями (openpyxl read_only)
         logger.info("Читаем Excel файл...")
-        df = pd.read_excel(excel_file)
+        batches = read_batches(excel_file)
+        first_batch = next(batches)
         
-        logger.info(f"Загружено {len(df)} строк из Excel файла")
-        logger.info(f"Колонки: {list(df.columns)}")
+        logger.info(f"Колонки: {list(first_batch.columns)}")
         
         # Показываем первые несколько строк для понимания структуры
         logger.info("Первые 5 строк:")
-        print(df.head())
+        print(first_batch.head())
         
         # Получаем сессию базы данных
         async for db in get_db():
@@ -53,7 +56,7 @@ async def load_matching_database():
                 # await db.commit()
                 
                 # Загружаем данные в базу
-                await process_excel_data(df, db)
+                await process_excel_data(itertools.chain([first_batch], batches), db)
                 
                 logger.info("Данные успешно загружены в базу данных!")
                 break
@@ -68,8 +71,8 @@ async def load_matching_database():
     except Exception as e:
         logger.error(f"Ошибка при чтении Excel файла: {e}")
 
-async def process_excel_data(df: pd.DataFrame, db: AsyncSession):
-    """Обрабатывает данные из Excel и загружает их в базу данных"""
+async def process_excel_data(batches: Iterable[pd.DataFrame], db: AsyncSession):
+    """Обрабатывает порции данных из Excel и загружает их в базу данных"""
     
     # Предполагаем, что в Excel есть колонки:
     # - Артикул АГБ
@@ -96,8 +99,10 @@ async def process_excel_data(df: pd.DataFrame, db: AsyncSession):
     nomenclatures_created = 0
     nomenclatures_updated = 0
     mappings_created = 0
+    total_rows = 0
     
-    for index, row in df.iterrows():
+    for index, row in (item for batch in batches for item in batch.iterrows()):
+        total_rows += 1
         try:
             # Извлекаем данные из строки
             article = str(row[column_mapping['article']]).strip() if pd.notna(row[column_mapping['article']]) else None
@@ -170,7 +175,7 @@ async def process_excel_data(df: pd.DataFrame, db: AsyncSession):
     logger.info(f"  - Создано номенклатур: {nomenclatures_created}")
     logger.info(f"  - Обновлено номенклатур: {nomenclatures_updated}")
     logger.info(f"  - Создано сопоставлений: {mappings_created}")
-    logger.info(f"  - Всего обработано строк: {len(df)}")
+    logger.info(f"  - Всего обработано строк: {total_rows}")
 
 if __name__ == "__main__":
     asyncio.run(load_matching_database())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Отдельный процесс-исполнитель фоновых задач (utils.jobs)
+
+Используется, когда в приложении исполнители выключены
+(JOB_WORKER_IN_PROCESS=false), например чтобы ИИ-обработка и резервное
+копирование не делили процесс с API. Процессов можно запустить несколько:
+задачи распределяются через SELECT ... FOR UPDATE SKIP LOCKED.
+
+Запуск: python scripts/run_job_worker.py [--workers 4]
+"""
+
+import argparse
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from utils.jobs import JOB_WORKERS, job_worker_pool as pool, load_handlers  # noqa: E402
+
+
+async def run(workers: int) -> None:
+    pool.workers = max(1, workers)
+    load_handlers()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    pool.start()
+    await stop.wait()
+    print("🛑 Остановка исполнителей, выполняемые задачи возвращаются в очередь...")
+    await pool.stop()
+
+    from utils.ai_gateway import ai_gateway
+    from utils.ocr import ocr_client
+    from utils.text_extraction import text_extraction_pool
+    text_extraction_pool.shutdown()
+    await ocr_client.aclose()
+    await ai_gateway.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="число одновременно выполняемых задач")
+    args = parser.parse_args()
+    asyncio.run(run(args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Стресс-тест выделения серийных номеров паспортов ВЭД.
+
+Запускает несколько процессов (у каждого свой PassportSerialAllocator, как
+у воркеров uvicorn). В каждом процессе номера одновременно запрашивают
+потоки через allocate_sync и корутины через allocate, запросами случайного
+размера. Затем все полученные номера собираются вместе, и скрипт
+проверяет, что дубликатов нет и ни один номер не превышает значение
+счётчика в passport_counters.
+
+Счётчик берётся для отдельного «года» (по умолчанию 9999) и удаляется
+после прогона; рабочие счётчики не затрагиваются.
+
+Запуск: python scripts/stress_passport_serials.py [--processes 4] [--threads 8]
+        [--tasks 8] [--requests 200] [--block-size 50] [--year 9999]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MAX_REQUEST_SIZE = 120
+
+
+def allocate_in_process(options) -> list:
+    """Все номера, выданные одному процессу"""
+    from database import async_engine
+    from utils.passport_serials import PassportSerialAllocator
+
+    allocator = PassportSerialAllocator(block_size=options["block_size"])
+    rng = random.Random(os.getpid())
+    sizes = [rng.randint(1, MAX_REQUEST_SIZE) for _ in range(options["requests"])]
+
+    def sync_worker(index: int) -> list:
+        serials = []
+        for size in sizes[index::options["threads"]]:
+            serials += allocator.allocate_sync(size, options["year"])
+        return serials
+
+    async def async_worker(index: int) -> list:
+        serials = []
+        for size in sizes[index::options["tasks"]]:
+            serials += await allocator.allocate(size, options["year"])
+        return serials
+
+    async def run_async() -> list:
+        try:
+            results = await asyncio.gather(*(async_worker(i) for i in range(options["tasks"])))
+        finally:
+            await async_engine.dispose()
+        return [serial for serials in results for serial in serials]
+
+    # Потоки и корутины работают одновременно с общим аллокатором
+    with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+        futures = [executor.submit(sync_worker, i) for i in range(options["threads"])]
+        serials = asyncio.run(run_async())
+        for future in futures:
+            serials += future.result()
+    return serials
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на процесс")
+    parser.add_argument("--block-size", type=int, default=50)
+    parser.add_argument("--year", type=int, default=9999)
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+    from database import engine
+    from utils.passport_serials import counter_name_for_year
+
+    counter_name = counter_name_for_year(args.year)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM passport_counters WHERE counter_name = :name"), {"name": counter_name})
+
+    options = {
+        "threads": args.threads,
+        "tasks": args.tasks,
+        "requests": args.requests,
+        "block_size": args.block_size,
+        "year": args.year,
+    }
+    started = time.perf_counter()
+    try:
+        with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+            results = pool.map(allocate_in_process, [options] * args.processes)
+        elapsed = time.perf_counter() - started
+        with engine.begin() as conn:
+            counter_value = conn.execute(
+                text("SELECT current_value FROM passport_counters WHERE counter_name = :name"),
+                {"name": counter_name}
+            ).scalar()
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM passport_counters WHERE counter_name = :name"), {"name": counter_name})
+
+    serials = [serial for serials in results for serial in serials]
+    duplicates = [serial for serial, count in Counter(serials).items() if count > 1]
+    out_of_range = [serial for serial in serials if serial < 1 or serial > (counter_value or 0)]
+    print(f"Процессов: {args.processes}, потоков: {args.threads}, корутин: {args.tasks}, блок: {args.block_size}")
+    print(f"Выдано номеров: {len(serials)} за {elapsed:.2f} с, значение счётчика: {counter_value}")
+    print(f"Пропущено (остатки блоков): {(counter_value or 0) - len(set(serials))}")
+    if duplicates or out_of_range:
+        print(f"❌ Дубликатов: {len(duplicates)} (например {duplicates[:10]}), вне диапазона: {len(out_of_range)}")
+        return 1
+    print("✅ Дубликатов нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Извлечение артикулов ИИ из длинных документов по частям
+
+Текст всех файлов запроса раньше уходил модели одним промптом и упирался
+в лимит контекста или таймаут. Теперь текст каждого источника (сообщение,
+файл) режется на части не длиннее AI_CHUNK_MAX_CHARS по границам страниц
+(\\f) и строк. Таблица приходит строкой на строку файла с заголовком
+(utils.text_extraction.TABLE_HEADER_PREFIX), заголовок повторяется в
+начале каждой части - артикул, описание и количество строки всегда в
+одной части вместе с названиями колонок. Части обрабатываются параллельно
+(не больше AI_CHUNK_CONCURRENCY запросов одновременно).
+
+Найденные позиции объединяются: одинаковый артикул с одинаковой единицей
+измерения внутри одного источника складывается по количеству, между
+источниками - не складывается (берётся большее количество), а источники с
+одинаковым текстом обрабатываются один раз. Повторно приложенная копия
+заявки не удваивает количества. Разобранный ответ по каждой части
+кешируется по SHA-256 её текста - при повторной обработке изменённого
+документа модель получает только изменившиеся части.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.text_extraction import TABLE_HEADER_PREFIX
+
+AI_CHUNK_MAX_CHARS = int(os.getenv("AI_CHUNK_MAX_CHARS", "12000"))
+AI_CHUNK_CONCURRENCY = int(os.getenv("AI_CHUNK_CONCURRENCY", "4"))
+AI_CHUNK_CACHE_SIZE = int(os.getenv("AI_CHUNK_CACHE_SIZE", "2048"))
+
+PAGE_BREAK = "\f"
+
+# Ответ-заглушка, если ни одна часть не разобралась (как и раньше)
+PARSE_ERROR_ARTICLE = {
+    "contractor_article": "Не удалось извлечь",
+    "description": "Ошибка парсинга ответа ИИ",
+    "quantity": 0,
+    "unit": "шт",
+}
+
+JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+
+def _split_long_line(line: str, max_chars: int) -> List[str]:
+    """Режет строку длиннее max_chars по пробелам"""
+    parts = []
+    while len(line) > max_chars:
+        cut = line.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        parts.append(line[:cut])
+        line = line[cut:].lstrip()
+    if line:
+        parts.append(line)
+    return parts
+
+
+def split_text(text: str, max_chars: int = AI_CHUNK_MAX_CHARS) -> List[str]:
+    """Делит текст на части по границам страниц и строк
+
+    Строки набираются в часть до max_chars; на границе страницы часть
+    закрывается, если заполнена хотя бы наполовину. Заголовок таблицы
+    (первая строка с TABLE_HEADER_PREFIX) повторяется в начале каждой части.
+    """
+    header = None
+    if text.startswith(TABLE_HEADER_PREFIX):
+        header, _, text = text.partition("\n")
+        max_chars = max(max_chars - len(header) - 1, max_chars // 2)
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        chunk = "\n".join(current).strip()
+        if chunk:
+            chunks.append(chunk)
+        current, size = [], 0
+
+    for page in text.split(PAGE_BREAK):
+        for line in page.split("\n"):
+            for piece in _split_long_line(line, max_chars) or [""]:
+                if size + len(piece) + 1 > max_chars:
+                    flush()
+                current.append(piece)
+                size += len(piece) + 1
+        if size >= max_chars // 2:
+            flush()
+    flush()
+    if header:
+        return [f"{header}\n{chunk}" for chunk in chunks] or [header]
+    return chunks
+
+
+def parse_articles(ai_response: Any, provider: str) -> Optional[List[Dict[str, Any]]]:
+    """Список позиций из ответа провайдера; None, если ответ не разобран"""
+    if provider != "openai":
+        if isinstance(ai_response, dict):
+            return list(ai_response.get("articles", []))
+        return None
+    try:
+        articles = json.loads(ai_response)
+    except (TypeError, json.JSONDecodeError):
+        # Модель часто оборачивает JSON в ```json ... ``` или поясняющий текст
+        match = JSON_ARRAY_RE.search(ai_response or "")
+        if not match:
+            return None
+        try:
+            articles = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+    if isinstance(articles, dict):
+        articles = articles.get("articles", [articles])
+    return [item for item in articles if isinstance(item, dict)] if isinstance(articles, list) else None
+
+
+def _merge_key(article: Dict[str, Any]) -> Tuple[str, str]:
+    key = str(article.get("contractor_article") or "").strip().lower()
+    if not key:
+        key = " ".join(str(article.get("description") or "").lower().split())
+    return key, str(article.get("unit") or "").strip().lower()
+
+
+def parse_quantity(value: Any) -> float:
+    try:
+        return float(str(value).replace(",", ".").replace(" ", ""))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _set_quantity(article: Dict[str, Any], quantity: float) -> None:
+    article["quantity"] = int(quantity) if quantity.is_integer() else quantity
+
+
+def _merge_into(merged: Dict[Tuple[str, str], Dict[str, Any]], article: Dict[str, Any], combine) -> None:
+    key = _merge_key(article)
+    if not key[0]:
+        return
+    if key not in merged:
+        merged[key] = dict(article)
+        return
+    existing = merged[key]
+    _set_quantity(existing, combine(parse_quantity(existing.get("quantity")), parse_quantity(article.get("quantity"))))
+    if not existing.get("description") and article.get("description"):
+        existing["description"] = article["description"]
+
+
+def merge_articles(source_articles: List[Tuple[str, List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """Объединяет позиции частей: одинаковый артикул и единица - одна позиция
+
+    source_articles - пары (источник, позиции части). Внутри источника
+    количества складываются (строки одной заявки), между источниками
+    берётся большее: копия заявки в другом файле не удваивает количество.
+    """
+    by_source: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+    for source, articles in source_articles:
+        source_merged = by_source.setdefault(source, {})
+        for article in articles:
+            _merge_into(source_merged, article, lambda a, b: a + b)
+    merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for source_merged in by_source.values():
+        for article in source_merged.values():
+            _merge_into(merged, article, max)
+    return list(merged.values())
+
+
+class ChunkResultCache:
+    """LRU-кеш разобранных ответов по хешу части"""
+
+    def __init__(self, max_entries: int = AI_CHUNK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(provider: str, chunk: str) -> str:
+        return hashlib.sha256(f"{provider}\x1f{chunk}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            articles = self._entries.get(key)
+            if articles is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(item) for item in articles]
+
+    def put(self, key: str, articles: List[Dict[str, Any]]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = articles
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+chunk_result_cache = ChunkResultCache()
+
+
+async def extract_articles(
+    sections: List[Tuple[str, str]],
+    provider: str,
+    request: Callable[[str], Awaitable[Any]],
+    max_chars: int = AI_CHUNK_MAX_CHARS,
+    concurrency: int = AI_CHUNK_CONCURRENCY
+) -> Tuple[List[Dict[str, Any]], List[Any], int]:
+    """Извлекает позиции из источников по частям
+
+    sections - пары (заголовок источника, текст), например
+    ("--- Содержимое файла order.xlsx ---", текст). Заголовок добавляется в
+    начало каждой части источника. request(prompt) - вызов модели для одной
+    части. Возвращает объединённые позиции, сырые ответы модели (для лога;
+    из кеша - None) и число необработанных частей. Если не удалась ни одна
+    часть, пробрасывает первую ошибку.
+    """
+    chunks: List[Tuple[str, str, str]] = []
+    seen_texts = set()
+    for title, text in sections:
+        text = text.strip()
+        if not text or text in seen_texts:
+            continue
+        seen_texts.add(text)
+        for chunk in split_text(text, max(max_chars - len(title) - 1, max_chars // 2)):
+            chunks.append((title, chunk, f"{title}\n{chunk}" if title else chunk))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def process(chunk: str, prompt: str) -> Tuple[Optional[List[Dict[str, Any]]], Any]:
+        key = chunk_result_cache.key(provider, chunk)
+        cached = chunk_result_cache.get(key)
+        if cached is not None:
+            return cached, None
+        async with semaphore:
+            ai_response = await request(prompt)
+        articles = parse_articles(ai_response, provider)
+        if articles is not None:
+            chunk_result_cache.put(key, articles)
+        return articles, ai_response
+
+    results = await asyncio.gather(*[process(chunk, prompt) for _, chunk, prompt in chunks], return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    done = [
+        (title, result) for (title, _, _), result in zip(chunks, results)
+        if not isinstance(result, BaseException)
+    ]
+    if errors:
+        print(f"[AI] Не обработано частей: {len(errors)} из {len(chunks)}: {errors[0]}")
+        if not done:
+            raise errors[0]
+
+    parsed = [(title, articles) for title, (articles, _) in done if articles is not None]
+    articles = merge_articles(parsed)
+    if not articles and len(parsed) < len(done):
+        articles = [dict(PARSE_ERROR_ARTICLE)]
+    return articles, [ai_response for _, (_, ai_response) in done], len(errors)
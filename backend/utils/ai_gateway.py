@@ -0,0 +1,219 @@
+"""
+Шлюз к ИИ-провайдерам (OpenAI, Polza.ai, Perplexity)
+
+На каждого провайдера - один долгоживущий httpx.AsyncClient с пулом
+соединений и семафор, ограничивающий число одновременных запросов.
+Ключ передаётся в заголовке конкретного запроса: глобального
+openai.api_key, который перезаписывали запросы разных пользователей,
+больше нет. Ответы 429/5xx и сетевые ошибки повторяются с
+экспоненциальной задержкой со случайным разбросом (с учётом Retry-After).
+Токены и задержка каждого вызова суммируются в AiUsage - вызывающий код
+записывает их в AiProcessingLog.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "60"))
+AI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("AI_CONNECT_TIMEOUT_SECONDS", "10"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+AI_RETRY_BASE_SECONDS = float(os.getenv("AI_RETRY_BASE_SECONDS", "1"))
+AI_RETRY_MAX_SECONDS = float(os.getenv("AI_RETRY_MAX_SECONDS", "30"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class ProviderConfig:
+    name: str
+    base_url: str
+    max_concurrency: int
+    timeout: float = AI_TIMEOUT_SECONDS
+
+
+def _provider(name: str, base_url: str) -> ProviderConfig:
+    env = name.upper()
+    return ProviderConfig(
+        name=name,
+        base_url=os.getenv(f"AI_{env}_BASE_URL", base_url).rstrip("/"),
+        max_concurrency=int(os.getenv(f"AI_{env}_CONCURRENCY", "4")),
+        timeout=float(os.getenv(f"AI_{env}_TIMEOUT_SECONDS", str(AI_TIMEOUT_SECONDS))),
+    )
+
+
+PROVIDERS: Dict[str, ProviderConfig] = {
+    "openai": _provider("openai", "https://api.openai.com/v1"),
+    "polza": _provider("polza", "https://api.polza.ai"),
+    "perplexity": _provider("perplexity", "https://api.perplexity.ai"),
+}
+
+
+class AiGatewayError(Exception):
+    """Ошибка вызова ИИ-провайдера"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class AiUsage:
+    """Счётчики вызовов ИИ (на запрос пользователя или на провайдера)"""
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    latency_ms: float = 0.0
+    providers: List[str] = field(default_factory=list)
+
+    def record(self, provider: str, latency_ms: float, usage: Optional[Dict[str, Any]]) -> None:
+        self.requests += 1
+        self.latency_ms += latency_ms
+        if provider not in self.providers:
+            self.providers.append(provider)
+        if usage:
+            self.prompt_tokens += int(usage.get("prompt_tokens") or 0)
+            self.completion_tokens += int(usage.get("completion_tokens") or 0)
+            self.total_tokens += int(usage.get("total_tokens") or 0)
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = dict(self.__dict__)
+        data["latency_ms"] = round(self.latency_ms, 1)
+        return data
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    """Задержка перед повтором: Retry-After провайдера или экспонента со случайным разбросом"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), AI_RETRY_MAX_SECONDS)
+            except ValueError:
+                pass
+    return random.uniform(0, min(AI_RETRY_MAX_SECONDS, AI_RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+class AiGateway:
+    """Общие клиенты и ограничения для всех обращений к ИИ"""
+
+    def __init__(self, providers: Dict[str, ProviderConfig] = PROVIDERS, max_retries: int = AI_MAX_RETRIES):
+        self.providers = providers
+        self.max_retries = max(0, max_retries)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+        self.totals: Dict[str, AiUsage] = {name: AiUsage() for name in providers}
+
+    def _get_client(self, provider: str) -> httpx.AsyncClient:
+        config = self.providers.get(provider)
+        if config is None:
+            raise AiGatewayError(f"Неподдерживаемый провайдер: {provider}")
+        with self._lock:
+            client = self._clients.get(provider)
+            if client is None:
+                client = httpx.AsyncClient(
+                    base_url=config.base_url,
+                    timeout=httpx.Timeout(config.timeout, connect=AI_CONNECT_TIMEOUT_SECONDS),
+                    limits=httpx.Limits(
+                        max_connections=config.max_concurrency,
+                        max_keepalive_connections=config.max_concurrency
+                    ),
+                )
+                self._clients[provider] = client
+                self._semaphores[provider] = asyncio.Semaphore(config.max_concurrency)
+            return client
+
+    async def post_json(
+        self,
+        provider: str,
+        path: str,
+        api_key: str,
+        payload: Dict[str, Any],
+        usage: Optional[AiUsage] = None
+    ) -> Dict[str, Any]:
+        """POST с JSON к провайдеру с повторами; возвращает JSON ответа"""
+        client = self._get_client(provider)
+        semaphore = self._semaphores[provider]
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        totals = self.totals[provider]
+
+        for attempt in range(self.max_retries + 1):
+            response = None
+            started = time.perf_counter()
+            try:
+                async with semaphore:
+                    response = await client.post(path, headers=headers, json=payload)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    data = response.json()
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    token_usage = data.get("usage") if isinstance(data, dict) else None
+                    totals.record(provider, latency_ms, token_usage)
+                    if usage is not None:
+                        usage.record(provider, latency_ms, token_usage)
+                    return data
+                error = AiGatewayError(f"{provider}: HTTP {response.status_code}", response.status_code)
+            except httpx.HTTPStatusError as e:
+                # Остальные 4xx (неверный ключ, запрос) не повторяем
+                totals.errors += 1
+                if usage is not None:
+                    usage.errors += 1
+                raise AiGatewayError(
+                    f"{provider}: HTTP {e.response.status_code}: {e.response.text[:500]}", e.response.status_code
+                )
+            except (httpx.TransportError, ValueError) as e:
+                error = AiGatewayError(f"{provider}: {e}")
+
+            if attempt == self.max_retries:
+                break
+            totals.retries += 1
+            if usage is not None:
+                usage.retries += 1
+            await asyncio.sleep(_retry_delay(attempt, response))
+
+        totals.errors += 1
+        if usage is not None:
+            usage.errors += 1
+        raise error
+
+    async def chat_completion(
+        self,
+        provider: str,
+        api_key: str,
+        messages: List[Dict[str, str]],
+        model: str,
+        usage: Optional[AiUsage] = None,
+        **params
+    ) -> str:
+        """Chat Completions (OpenAI-совместимый API); возвращает текст ответа"""
+        data = await self.post_json(
+            provider, "/chat/completions", api_key, {"model": model, "messages": messages, **params}, usage
+        )
+        try:
+            return data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            raise AiGatewayError(f"{provider}: неожиданный формат ответа")
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: usage.as_dict() for name, usage in self.totals.items()}
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._semaphores.clear()
+        for client in clients:
+            await client.aclose()
+
+
+ai_gateway = AiGateway()
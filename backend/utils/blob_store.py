@@ -0,0 +1,195 @@
+"""
+Хранилище файлов ИИ-обработки по содержимому
+
+Файлы /ai-process/ раньше сохранялись как {uuid}_{имя} без очистки: один и
+тот же прайс-лист, загруженный 50 раз, лежал на диске 50 раз и 50 раз
+разбирался. Теперь файл хранится один раз под своим SHA-256 в
+подкаталогах по первым символам хеша (ab/cd/abcd...{расширение}), рядом -
+извлечённый из него текст (abcd....text-v2.txt), поэтому повторная
+загрузка не пишет копию и не запускает повторно разбор и OCR.
+
+Каждый файл учтён в ai_upload_blobs, каждый лог, в котором он
+использовался, - строкой ai_processing_log_files: число таких строк и есть
+счётчик ссылок. Сборщик мусора (collect_garbage, scripts/gc_ai_uploads.py)
+снимает ссылки логов старше AI_UPLOAD_RETENTION_DAYS и удаляет файлы без
+ссылок, а также старые файлы, не учтённые в базе (прежние {uuid}_{имя},
+загрузки прерванных запросов).
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from fastapi import UploadFile
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models import AiProcessingLog, AiProcessingLogFile, AiUploadBlob
+from utils.upload_ingest import IngestedUpload, blob_path, ingest_upload
+
+AI_UPLOAD_DIR = os.getenv("AI_UPLOAD_DIR", "uploads/ai_processing")
+AI_UPLOAD_RETENTION_DAYS = int(os.getenv("AI_UPLOAD_RETENTION_DAYS", "30"))
+
+# Версия в имени: при изменении извлечения текста старые файлы текста не читаются
+# v2: таблица - строка на строку файла с заголовком (было - колонка на строку)
+TEXT_SIDECAR_SUFFIX = ".text-v2.txt"
+GC_BATCH_SIZE = 1000
+SHA256_HEX_LENGTH = 64
+
+
+class BlobStore:
+    """Файлы по SHA-256 содержимого с текстом рядом и сборкой мусора"""
+
+    def __init__(self, root: Union[str, Path] = AI_UPLOAD_DIR, retention_days: int = AI_UPLOAD_RETENTION_DAYS):
+        self.root = Path(root)
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self.text_hits = 0
+        self.text_misses = 0
+
+    async def ingest(self, upload: UploadFile) -> IngestedUpload:
+        """Сохраняет загрузку в хранилище (существующий файл не перезаписывается)"""
+        return await ingest_upload(upload, dest_dir=self.root, sharded=True)
+
+    def register(self, db: Session, log_id: int, uploads: Iterable[IngestedUpload]) -> None:
+        """Учитывает файлы и ссылки лога на них (коммит - за вызывающим кодом)"""
+        uploads = list(uploads)
+        if not uploads:
+            return
+        blobs = {upload.sha256: {"sha256": upload.sha256, "extension": upload.extension, "size": upload.size}
+                 for upload in uploads}
+        stmt = pg_insert(AiUploadBlob.__table__).values(list(blobs.values()))
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[AiUploadBlob.__table__.c.sha256],
+            set_={"last_used_at": func.now()}
+        ))
+        db.add_all(
+            AiProcessingLogFile(log_id=log_id, sha256=upload.sha256, filename=upload.filename)
+            for upload in uploads
+        )
+
+    def text_path(self, sha256: str) -> Path:
+        return blob_path(self.root, sha256, TEXT_SIDECAR_SUFFIX)
+
+    def read_text(self, sha256: str) -> Optional[str]:
+        """Ранее извлечённый текст файла или None"""
+        try:
+            text = self.text_path(sha256).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            with self._lock:
+                self.text_misses += 1
+            return None
+        with self._lock:
+            self.text_hits += 1
+        return text
+
+    def write_text(self, sha256: str, text: str) -> None:
+        path = self.text_path(sha256)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _remove(self, path: Path, cutoff_ts: float, dry_run: bool) -> int:
+        """Удаляет файл старше cutoff_ts; возвращает освобождённые байты"""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return 0
+        if stat.st_mtime >= cutoff_ts:
+            return 0
+        if not dry_run:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                return 0
+        return stat.st_size
+
+    def _blob_files(self, sha256: str) -> List[Path]:
+        return list(blob_path(self.root, sha256).parent.glob(f"{sha256}*"))
+
+    def collect_garbage(self, db: Session, retention_days: Optional[int] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """Снимает устаревшие ссылки и удаляет файлы без ссылок
+
+        Файл с mtime новее границы хранения не удаляется, даже если ссылок
+        нет: его могли только что загрузить повторно, а ссылку ещё не записали.
+        """
+        days = self.retention_days if retention_days is None else retention_days
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        cutoff_ts = cutoff.timestamp()
+        result = {"links_expired": 0, "blobs_deleted": 0, "files_deleted": 0, "bytes_freed": 0, "dry_run": dry_run}
+
+        expired_logs = select(AiProcessingLog.id).where(AiProcessingLog.created_at < cutoff)
+        result["links_expired"] = db.execute(
+            delete(AiProcessingLogFile).where(AiProcessingLogFile.log_id.in_(expired_logs))
+        ).rowcount or 0
+
+        orphans = db.execute(
+            select(AiUploadBlob.sha256)
+            .where(AiUploadBlob.last_used_at < cutoff)
+            .where(~exists().where(AiProcessingLogFile.sha256 == AiUploadBlob.sha256))
+        ).scalars().all()
+        deleted: List[str] = []
+        for sha256 in orphans:
+            files = self._blob_files(sha256)
+            if any(path.stat().st_mtime >= cutoff_ts for path in files if path.exists()):
+                continue
+            for path in files:
+                freed = self._remove(path, cutoff_ts, dry_run)
+                if freed:
+                    result["files_deleted"] += 1
+                    result["bytes_freed"] += freed
+            deleted.append(sha256)
+        for start in range(0, len(deleted), GC_BATCH_SIZE):
+            db.execute(delete(AiUploadBlob).where(AiUploadBlob.sha256.in_(deleted[start:start + GC_BATCH_SIZE])))
+        result["blobs_deleted"] = len(deleted)
+
+        # Файлы, не учтённые в базе: прежние {uuid}_{имя}, плоские {sha256}{ext},
+        # загрузки запросов, прерванных до записи ссылок
+        untracked: Dict[str, List[Path]] = {}
+        for path in self.root.rglob("*"):
+            if not path.is_file():
+                continue
+            name = path.name
+            if path.parent != self.root and len(name) >= SHA256_HEX_LENGTH:
+                untracked.setdefault(name[:SHA256_HEX_LENGTH], []).append(path)
+            else:
+                freed = self._remove(path, cutoff_ts, dry_run)
+                if freed:
+                    result["files_deleted"] += 1
+                    result["bytes_freed"] += freed
+        removed = set(deleted)
+        shas = [sha256 for sha256 in untracked if sha256 not in removed]
+        for start in range(0, len(shas), GC_BATCH_SIZE):
+            chunk = shas[start:start + GC_BATCH_SIZE]
+            known = set(db.execute(select(AiUploadBlob.sha256).where(AiUploadBlob.sha256.in_(chunk))).scalars())
+            for sha256 in chunk:
+                if sha256 in known:
+                    continue
+                for path in untracked[sha256]:
+                    freed = self._remove(path, cutoff_ts, dry_run)
+                    if freed:
+                        result["files_deleted"] += 1
+                        result["bytes_freed"] += freed
+
+        if dry_run:
+            db.rollback()
+            return result
+        db.commit()
+        # Опустевшие подкаталоги ab/cd
+        for directory in sorted((path for path in self.root.glob("*/*") if path.is_dir()), reverse=True):
+            for empty in (directory, directory.parent):
+                try:
+                    empty.rmdir()
+                except OSError:
+                    pass
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"root": str(self.root), "text_hits": self.text_hits, "text_misses": self.text_misses}
+
+
+ai_upload_store = BlobStore()
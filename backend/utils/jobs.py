@@ -0,0 +1,446 @@
+"""
+Фоновые задачи с очередью в базе данных
+
+Долгие операции (ИИ-обработка файлов, поиск поставщиков, импорт
+номенклатуры ВЭД, резервное копирование, массовая рассылка) больше не выполняются внутри запроса:
+обработчик маршрута ставит задачу в таблицу background_jobs и сразу
+отвечает 202 с её id, состояние опрашивается через GET /api/v1/jobs/{id}.
+
+Задачи выбирает пул из JOB_WORKERS asyncio-исполнителей: в процессе
+приложения (JOB_WORKER_IN_PROCESS=true, запускается в lifespan) или
+отдельным процессом (scripts/run_job_worker.py). Следующая задача
+берётся через SELECT ... FOR UPDATE SKIP LOCKED по убыванию приоритета,
+поэтому несколько процессов не возьмут одну задачу дважды.
+
+Обработчик регистрируется декоратором job_handler(kind) и получает
+JobContext: context.report(percent, message) сохраняет прогресс и бросает
+JobCancelled, если задачу отменили. Прогресс и отметка «жив» пишутся в БД
+раз в JOB_HEARTBEAT_SECONDS; задача, исполнитель которой перестал
+отвечать дольше JOB_STALE_SECONDS, возвращается в очередь. Ошибка
+обработчика повторяется с экспоненциальной задержкой, пока не исчерпаны
+max_attempts.
+"""
+
+import asyncio
+import importlib
+import inspect
+import os
+import socket
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import AsyncSessionLocal
+from models import BackgroundJob
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_WORKER_IN_PROCESS = os.getenv("JOB_WORKER_IN_PROCESS", "true").lower() in ("1", "true", "yes")
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "2"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+# Модули с обработчиками: отдельный процесс-исполнитель импортирует их сам
+JOB_HANDLER_MODULES = (
+    "api.v1.endpoints.ai_processing",
+    "api.v1.endpoints.admin_data_entry",
+    "api.v3.endpoints.article_search",
+    "api.v3.endpoints.backup",
+    "api.v3.endpoints.email_management",
+)
+
+
+class JobCancelled(Exception):
+    """Задача отменена пользователем"""
+
+
+class JobContext:
+    """Состояние выполняемой задачи, доступное обработчику
+
+    report() можно вызывать и из потока (asyncio.to_thread): он только
+    меняет поля, в БД их переносит цикл heartbeat исполнителя.
+    """
+
+    def __init__(self, job_id: int, attempt: int, created_by: Optional[int]):
+        self.job_id = job_id
+        self.attempt = attempt
+        self.created_by = created_by
+        self.percent = 0.0
+        self.message: Optional[str] = None
+        self.cancel_requested = False
+
+    def check_cancelled(self) -> None:
+        if self.cancel_requested:
+            raise JobCancelled(f"Задача {self.job_id} отменена")
+
+    def report(self, percent: float, message: Optional[str] = None) -> None:
+        self.check_cancelled()
+        self.percent = max(0.0, min(100.0, float(percent)))
+        if message is not None:
+            self.message = message
+
+
+JobHandlerFunc = Callable[[JobContext, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+@dataclass
+class JobHandler:
+    kind: str
+    func: JobHandlerFunc
+    priority: int = 0
+    max_attempts: int = JOB_MAX_ATTEMPTS
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str, priority: int = 0, max_attempts: int = JOB_MAX_ATTEMPTS):
+    """Регистрирует async-обработчик задачи kind: func(context, payload) -> dict результата"""
+    def decorator(func: JobHandlerFunc) -> JobHandlerFunc:
+        if not inspect.iscoroutinefunction(func):
+            raise TypeError(f"Обработчик задачи {kind} должен быть async-функцией")
+        JOB_HANDLERS[kind] = JobHandler(kind, func, priority, max_attempts)
+        return func
+    return decorator
+
+
+def load_handlers() -> None:
+    """Импортирует модули с обработчиками (регистрация - при импорте)"""
+    for module in JOB_HANDLER_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            print(f"⚠️ Обработчики задач {module} не загружены: {e}")
+
+
+def _new_job(kind: str, payload: Dict[str, Any], user_id: Optional[int], priority: Optional[int]) -> BackgroundJob:
+    handler = JOB_HANDLERS.get(kind)
+    if handler is None:
+        raise ValueError(f"Неизвестный тип задачи: {kind}")
+    return BackgroundJob(
+        kind=kind,
+        payload=payload,
+        status=JOB_QUEUED,
+        priority=handler.priority if priority is None else priority,
+        attempts=0,
+        max_attempts=handler.max_attempts,
+        progress=0.0,
+        cancel_requested=False,
+        created_by=user_id,
+    )
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: Dict[str, Any],
+    user_id: Optional[int] = None,
+    priority: Optional[int] = None
+) -> BackgroundJob:
+    """Ставит задачу в очередь (для маршрутов с AsyncSession); коммитит сессию"""
+    job = _new_job(kind, payload, user_id, priority)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    job_worker_pool.notify()
+    return job
+
+
+def enqueue_sync(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    user_id: Optional[int] = None,
+    priority: Optional[int] = None
+) -> BackgroundJob:
+    """То же для синхронной сессии"""
+    job = _new_job(kind, payload, user_id, priority)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    job_worker_pool.notify()
+    return job
+
+
+def job_accepted(job: BackgroundJob, **extra) -> Dict[str, Any]:
+    """Тело ответа 202 для поставленной задачи"""
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "status_url": f"/api/v1/jobs/{job.id}",
+        **extra,
+    }
+
+
+def job_as_dict(job: BackgroundJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "priority": job.priority,
+        "progress": round(job.progress or 0.0, 1),
+        "progress_message": job.progress_message,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "cancel_requested": job.cancel_requested,
+        "result": job.result,
+        "error": job.error,
+        "created_by": job.created_by,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+async def request_cancel(db: AsyncSession, job: BackgroundJob) -> BackgroundJob:
+    """Отмена: задача в очереди отменяется сразу, выполняемая - при следующем heartbeat"""
+    queued = await db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job.id, BackgroundJob.status == JOB_QUEUED)
+        .values(status=JOB_CANCELLED, cancel_requested=True, finished_at=func.now())
+    )
+    if not queued.rowcount:
+        # Задачу уже взял исполнитель
+        await db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job.id, BackgroundJob.status == JOB_RUNNING)
+            .values(cancel_requested=True)
+        )
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+def _retry_delay(attempt: int) -> float:
+    return min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempt - 1))
+
+
+class JobWorkerPool:
+    """Пул asyncio-исполнителей задач из background_jobs"""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = max(1, workers)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        self.running: Dict[int, str] = {}
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.cancelled = 0
+        self.reclaimed = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Запускает исполнителей в текущем event loop"""
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reaper()))
+        print(f"✅ Исполнители фоновых задач запущены ({self.workers}, {self.worker_id})")
+
+    async def stop(self) -> None:
+        """Останавливает исполнителей; выполнявшиеся задачи возвращаются в очередь"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+
+    async def run_forever(self) -> None:
+        """Для отдельного процесса-исполнителя"""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    def notify(self) -> None:
+        """Будит исполнителей после постановки задачи (из любого потока)"""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            pass
+
+    async def _wait(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _claim(self) -> Optional[BackgroundJob]:
+        async with AsyncSessionLocal() as db:
+            job = (await db.execute(
+                select(BackgroundJob)
+                .where(BackgroundJob.status == JOB_QUEUED, BackgroundJob.run_after <= func.now())
+                .order_by(BackgroundJob.priority.desc(), BackgroundJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )).scalar_one_or_none()
+            if job is None:
+                return None
+            job.status = JOB_RUNNING
+            job.attempts += 1
+            job.worker_id = self.worker_id
+            job.started_at = func.now()
+            job.heartbeat_at = func.now()
+            job.error = None
+            await db.commit()
+            await db.refresh(job)
+            return job
+
+    async def _finish(self, job_id: int, **values) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(BackgroundJob).where(BackgroundJob.id == job_id).values(**values))
+            await db.commit()
+
+    async def _heartbeat(self, context: JobContext, task: asyncio.Task) -> None:
+        """Пишет прогресс и отметку «жив», следит за запросом отмены"""
+        while not task.done():
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    cancel = (await db.execute(
+                        update(BackgroundJob)
+                        .where(BackgroundJob.id == context.job_id)
+                        .values(heartbeat_at=func.now(), progress=context.percent, progress_message=context.message)
+                        .returning(BackgroundJob.cancel_requested)
+                    )).scalar_one_or_none()
+                    await db.commit()
+            except Exception as e:
+                print(f"⚠️ Heartbeat задачи {context.job_id}: {e}")
+                continue
+            if cancel and not context.cancel_requested:
+                context.cancel_requested = True
+                task.cancel()
+
+    async def _run(self, job: BackgroundJob) -> None:
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None:
+            await self._finish(job.id, status=JOB_FAILED, error=f"Неизвестный тип задачи: {job.kind}",
+                               finished_at=func.now())
+            return
+        context = JobContext(job.id, job.attempts, job.created_by)
+        context.cancel_requested = bool(job.cancel_requested)
+        task = asyncio.create_task(handler.func(context, job.payload or {}))
+        heartbeat = asyncio.create_task(self._heartbeat(context, task))
+        with self._lock:
+            self.running[job.id] = job.kind
+        try:
+            result = await task
+        except (JobCancelled, asyncio.CancelledError) as e:
+            if not context.cancel_requested:
+                # Остановка исполнителя, а не отмена задачи: вернуть в очередь
+                await asyncio.shield(self._finish(
+                    job.id, status=JOB_QUEUED, attempts=job.attempts - 1, worker_id=None, run_after=func.now()
+                ))
+                raise
+            self.cancelled += 1
+            await self._finish(job.id, status=JOB_CANCELLED, error=str(e) or "Отменено",
+                               progress=context.percent, progress_message=context.message, finished_at=func.now())
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts < job.max_attempts:
+                self.retried += 1
+                delay = _retry_delay(job.attempts)
+                print(f"⚠️ Задача {job.id} ({job.kind}), попытка {job.attempts}: {error}; повтор через {delay:.0f} с")
+                await self._finish(job.id, status=JOB_QUEUED, error=error, worker_id=None,
+                                   run_after=datetime.now(timezone.utc) + timedelta(seconds=delay))
+            else:
+                self.failed += 1
+                print(f"❌ Задача {job.id} ({job.kind}) не выполнена: {error}")
+                await self._finish(job.id, status=JOB_FAILED, error=error, progress=context.percent,
+                                   progress_message=context.message, finished_at=func.now())
+        else:
+            self.succeeded += 1
+            await self._finish(job.id, status=JOB_SUCCEEDED, result=result, progress=100.0,
+                               progress_message=context.message, finished_at=func.now())
+        finally:
+            heartbeat.cancel()
+            with self._lock:
+                self.running.pop(job.id, None)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Исполнитель задач {index}: ошибка выбора задачи: {e}")
+                job = None
+            if job is None:
+                await self._wait()
+                continue
+            await self._run(job)
+
+    async def _reaper(self) -> None:
+        """Возвращает в очередь задачи исполнителей, переставших отвечать"""
+        while True:
+            await asyncio.sleep(max(JOB_STALE_SECONDS / 4, JOB_POLL_INTERVAL_SECONDS))
+            stale_before = datetime.now(timezone.utc) - timedelta(seconds=JOB_STALE_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    stale = (BackgroundJob.status == JOB_RUNNING) & (BackgroundJob.heartbeat_at < stale_before)
+                    failed = await db.execute(
+                        update(BackgroundJob)
+                        .where(stale, BackgroundJob.attempts >= BackgroundJob.max_attempts)
+                        .values(status=JOB_FAILED, error="Исполнитель задачи перестал отвечать", finished_at=func.now())
+                    )
+                    requeued = await db.execute(
+                        update(BackgroundJob)
+                        .where(stale)
+                        .values(status=JOB_QUEUED, worker_id=None, run_after=func.now())
+                    )
+                    await db.commit()
+                count = (failed.rowcount or 0) + (requeued.rowcount or 0)
+                if count:
+                    self.reclaimed += count
+                    print(f"⚠️ Возвращено зависших задач: {requeued.rowcount or 0}, не выполнено: {failed.rowcount or 0}")
+            except Exception as e:
+                print(f"⚠️ Проверка зависших задач: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = dict(self.running)
+        return {
+            "worker_id": self.worker_id,
+            "workers": self.workers,
+            "started": self.started,
+            "running": running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "cancelled": self.cancelled,
+            "reclaimed": self.reclaimed,
+        }
+
+
+job_worker_pool = JobWorkerPool()
@@ -0,0 +1,272 @@
+"""
+Инкрементальный импорт номенклатуры ВЭД из Excel
+
+Книга читается потоково (openpyxl read_only), каждая строка
+нормализуется и хешируется. Существующая номенклатура загружается одним
+запросом и сравнивается по code_1c: в БД уходят только новые и
+изменившиеся строки (пакетный INSERT ... ON CONFLICT (code_1c) DO UPDATE)
+и, по запросу, деактивация позиций, которых больше нет в прайсе.
+Повторный запуск на почти том же файле почти ничего не пишет.
+
+Из API импорт запускается фоновой задачей nomenclature_import
+(api.v1.endpoints.admin_data_entry), прогресс передаётся через on_progress.
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import VEDNomenclature
+
+UPSERT_BATCH_SIZE = 500
+# Как часто сообщать о прогрессе чтения книги
+PROGRESS_EVERY_ROWS = 1000
+
+FIELDS = ("code_1c", "article", "name", "matrix", "drilling_depth", "height", "thread", "product_type")
+
+HEADER_ALIASES: Dict[str, str] = {
+    "код": "code_1c",
+    "код 1с": "code_1c",
+    "code": "code_1c",
+    "1c": "code_1c",
+
+    "артикул": "article",
+    "article": "article",
+
+    "наименование": "name",
+    "наименование товара": "name",
+    "name": "name",
+
+    "матрица": "matrix",
+    "matrix": "matrix",
+
+    "глубина бурения": "drilling_depth",
+    "depth": "drilling_depth",
+
+    "высота": "height",
+    "height": "height",
+
+    "резьба": "thread",
+    "thread": "thread",
+
+    "тип продукта": "product_type",
+    "тип": "product_type",
+    "product_type": "product_type",
+}
+
+# Фоллбэк сопоставления, если заголовки не распознаны: колонки A..H
+FALLBACK_COLUMNS = {i: name for i, name in enumerate(FIELDS)}
+
+
+def normalize(s: Optional[object]) -> str:
+    """Безопасная нормализация значений из Excel в строку.
+    Поддерживает int/float/None, обрезает пробелы.
+    """
+    if s is None:
+        return ""
+    try:
+        return str(s).strip()
+    except Exception:
+        return ""
+
+
+def map_header(name: Any) -> Optional[str]:
+    if name is None:
+        return None
+    key = str(name).strip().lower()
+    return HEADER_ALIASES.get(key)
+
+
+def row_hash(record: Dict[str, Optional[str]]) -> str:
+    payload = "\x1f".join(record.get(name) or "" for name in FIELDS)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class NomenclatureImportProgress:
+    """Состояние импорта (для CLI и результата фоновой задачи)"""
+    status: str = "pending"  # pending, reading, applying, done, failed
+    dry_run: bool = False
+    total_rows: int = 0
+    skipped_empty: int = 0
+    skipped_required: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deactivated: int = 0
+    applied: int = 0
+    to_apply: int = 0
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    on_progress: Optional[Callable[["NomenclatureImportProgress"], None]] = field(default=None, repr=False)
+
+    def notify(self) -> None:
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = {key: value for key, value in self.__dict__.items() if key != "on_progress"}
+        data["percent"] = round(100 * self.applied / self.to_apply, 1) if self.to_apply else (100.0 if self.status == "done" else 0.0)
+        return data
+
+
+def iter_workbook_records(path: str, sheet: Optional[str], progress: NomenclatureImportProgress) -> Iterator[Dict[str, Optional[str]]]:
+    """Потоково читает книгу и отдаёт нормализованные записи"""
+    wb = load_workbook(filename=path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        indices = {i: h for i, h in enumerate(map_header(value) for value in header) if h}
+        # code/article может быть пустым, но хотя бы name/matrix нужны
+        if not indices or not {"name", "matrix"}.issubset(set(indices.values())):
+            indices = FALLBACK_COLUMNS
+            print("[IMPORT] Заголовки не распознаны полностью, применён фоллбэк по колонкам A..H")
+
+        for row in rows:
+            progress.total_rows += 1
+            if progress.total_rows % PROGRESS_EVERY_ROWS == 0:
+                progress.notify()
+            data = {key: normalize(row[idx]) if idx < len(row) else "" for idx, key in indices.items()}
+            if not any(data.values()):
+                progress.skipped_empty += 1
+                continue
+            code = data.get("code_1c", "")
+            article = data.get("article", "")
+            if (not code and not article) or not data.get("name") or not data.get("matrix"):
+                progress.skipped_required += 1
+                continue
+            yield {
+                "code_1c": code,
+                # Пустой артикул заполняется кодом только для новых позиций (diff_records)
+                "article": article,
+                "name": data["name"],
+                "matrix": data["matrix"],
+                "drilling_depth": data.get("drilling_depth") or None,
+                "height": data.get("height") or None,
+                "thread": data.get("thread") or None,
+                "product_type": data.get("product_type") or "коронка",
+            }
+    finally:
+        wb.close()
+
+
+def _load_existing(db) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    rows = db.execute(select(*[getattr(VEDNomenclature, name) for name in FIELDS], VEDNomenclature.is_active)).all()
+    by_code = {row.code_1c: dict(row._mapping) for row in rows}
+    by_article = {row.article: row.code_1c for row in rows if row.article}
+    return by_code, by_article
+
+
+def diff_records(
+    records: Iterator[Dict[str, Optional[str]]],
+    by_code: Dict[str, Dict[str, Any]],
+    by_article: Dict[str, str],
+    progress: NomenclatureImportProgress
+) -> Tuple[List[Dict[str, Any]], set]:
+    """Возвращает записи для upsert и множество code_1c, встреченных в файле"""
+    changes: Dict[str, Dict[str, Any]] = {}
+    seen = set()
+    for record in records:
+        # Без кода ищем существующую позицию по артикулу, как и раньше
+        code = (record["code_1c"] or (record["article"] and by_article.get(record["article"]))
+                or f"ART-{record['article']}")
+        record["code_1c"] = code
+        first_occurrence = code not in seen
+        seen.add(code)
+        existing = by_code.get(code)
+        if existing is not None:
+            # Пустые значения в файле не затирают заполненные в БД
+            record = {name: record.get(name) or existing.get(name) for name in FIELDS}
+            if existing.get("is_active") and row_hash(record) == row_hash(existing):
+                if first_occurrence:
+                    progress.unchanged += 1
+                continue
+            if code not in changes:
+                progress.updated += 1
+        else:
+            record = {**record, "article": record["article"] or code}
+            if code not in changes:
+                progress.inserted += 1
+        changes[code] = {**record, "is_active": True}
+    return list(changes.values()), seen
+
+
+def apply_changes(
+    db,
+    changes: List[Dict[str, Any]],
+    deactivate: List[str],
+    progress: NomenclatureImportProgress
+) -> None:
+    """Пакетный upsert и деактивация; прогресс обновляется после каждого пакета"""
+    progress.to_apply = len(changes) + len(deactivate)
+    table = VEDNomenclature.__table__
+    for start in range(0, len(changes), UPSERT_BATCH_SIZE):
+        batch = changes[start:start + UPSERT_BATCH_SIZE]
+        stmt = pg_insert(table).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.code_1c],
+            set_={**{name: stmt.excluded[name] for name in FIELDS if name != "code_1c"},
+                  "is_active": stmt.excluded.is_active, "updated_at": func.now()}
+        )
+        db.execute(stmt)
+        progress.applied += len(batch)
+        progress.notify()
+    for start in range(0, len(deactivate), UPSERT_BATCH_SIZE):
+        batch = deactivate[start:start + UPSERT_BATCH_SIZE]
+        db.execute(
+            update(VEDNomenclature)
+            .where(VEDNomenclature.code_1c.in_(batch))
+            .values(is_active=False, updated_at=func.now())
+        )
+        progress.applied += len(batch)
+        progress.notify()
+
+
+def import_nomenclature(
+    path: str,
+    sheet: Optional[str] = None,
+    deactivate_missing: bool = False,
+    dry_run: bool = False,
+    progress: Optional[NomenclatureImportProgress] = None
+) -> NomenclatureImportProgress:
+    """Инкрементальный импорт файла; изменения применяются в одной транзакции
+
+    Исключение из progress.on_progress (например, отмена задачи) прерывает
+    импорт до коммита: статус failed, в БД ничего не записано.
+    """
+    from database import SessionLocal
+
+    progress = progress or NomenclatureImportProgress()
+    progress.dry_run = dry_run
+    try:
+        with SessionLocal() as db:
+            progress.status = "reading"
+            progress.notify()
+            by_code, by_article = _load_existing(db)
+            changes, seen = diff_records(iter_workbook_records(path, sheet, progress), by_code, by_article, progress)
+            deactivate = []
+            if deactivate_missing:
+                deactivate = [code for code, row in by_code.items() if row.get("is_active") and code not in seen]
+            progress.deactivated = len(deactivate)
+
+            if not dry_run:
+                progress.status = "applying"
+                progress.notify()
+                apply_changes(db, changes, deactivate, progress)
+                db.commit()
+        progress.status = "done"
+    except Exception as e:
+        progress.status = "failed"
+        progress.error = str(e)
+        print(f"❌ Ошибка импорта номенклатуры: {e}")
+    finally:
+        progress.finished_at = time.time()
+    return progress
+
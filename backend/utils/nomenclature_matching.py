@@ -0,0 +1,165 @@
+"""
+Сопоставление артикулов контрагента с номенклатурой по каноническому ключу
+
+Канонический ключ артикула - верхний регистр без пробелов и разделителей
+(- . / _): "ab-12 3" и "AB123" совпадают. То же выражение есть в
+функциональных индексах matching_nomenclatures и article_mappings, поэтому
+поиск всех артикулов запроса - один запрос по индексу на таблицу, а не
+ILIKE на каждую позицию.
+
+match_batch сопоставляет сразу все позиции: сначала точный поиск по ключу,
+затем для оставшихся одним запросом выбираются кандидаты (ключ артикула
+содержит артикул позиции или наименование содержит её описание), и
+лучший кандидат для каждой позиции выбирается в памяти.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import any_, func, or_, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import Session
+
+from models import ArticleMapping, MatchingNomenclature
+
+LOOKUP_BATCH_SIZE = 1000
+# Кандидаты частичного совпадения: короткие артикулы совпадают почти со всем
+MIN_PARTIAL_LENGTH = 3
+MATCH_CANDIDATE_LIMIT = 5000
+
+SEPARATORS_PATTERN = r"[\s./_-]+"
+SEPARATORS_RE = re.compile(SEPARATORS_PATTERN)
+
+
+def canonical_article(value) -> str:
+    if value is None:
+        return ""
+    return SEPARATORS_RE.sub("", str(value)).upper()
+
+
+def canonical_article_sql(column):
+    """SQL-выражение канонического ключа (совпадает с выражением индексов)"""
+    return func.upper(func.regexp_replace(column, SEPARATORS_PATTERN, "", "g"))
+
+
+@dataclass
+class NomenclatureMatch:
+    nomenclature: MatchingNomenclature
+    confidence: float  # 0-100
+    source: str  # agb_article, bl_article, article_mapping, partial
+
+    @property
+    def search_type(self) -> str:
+        if self.source == "article_mapping":
+            return "existing_mapping"
+        return "partial_match" if self.source == "partial" else "exact_lookup"
+
+
+def lookup_exact(db: Session, articles: Iterable[str]) -> Dict[str, NomenclatureMatch]:
+    """Точные совпадения для набора артикулов: {канонический ключ: NomenclatureMatch}
+
+    Порядок приоритета: артикул АГБ, артикул BL, сохранённое соответствие
+    (article_mappings) с его уверенностью.
+    """
+    keys = sorted({canonical_article(article) for article in articles} - {""})
+    found: Dict[str, NomenclatureMatch] = {}
+    agb_key = canonical_article_sql(MatchingNomenclature.agb_article)
+    bl_key = canonical_article_sql(MatchingNomenclature.bl_article)
+    mapping_key = canonical_article_sql(ArticleMapping.contractor_article)
+
+    for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        chunk = keys[start:start + LOOKUP_BATCH_SIZE]
+        rows = db.execute(
+            select(MatchingNomenclature, agb_key, bl_key)
+            .where(or_(agb_key.in_(chunk), bl_key.in_(chunk)))
+            .order_by(MatchingNomenclature.id)
+        ).all()
+        by_bl: Dict[str, MatchingNomenclature] = {}
+        for nomenclature, agb, bl in rows:
+            if agb in chunk and agb not in found:
+                found[agb] = NomenclatureMatch(nomenclature, 100.0, "agb_article")
+            if bl:
+                by_bl.setdefault(bl, nomenclature)
+        for key, nomenclature in by_bl.items():
+            if key in chunk and key not in found:
+                found[key] = NomenclatureMatch(nomenclature, 100.0, "bl_article")
+
+        missing = [key for key in chunk if key not in found]
+        if not missing:
+            continue
+        mappings = db.execute(
+            select(mapping_key, ArticleMapping.confidence, MatchingNomenclature)
+            .join(MatchingNomenclature, MatchingNomenclature.agb_article == ArticleMapping.agb_article)
+            .where(mapping_key.in_(missing))
+            .order_by(ArticleMapping.confidence.desc(), ArticleMapping.id)
+        ).all()
+        for key, confidence, nomenclature in mappings:
+            if key not in found:
+                found[key] = NomenclatureMatch(nomenclature, round((confidence or 0) * 100, 1), "article_mapping")
+    return found
+
+
+def _like_pattern(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _partial_score(key: str, description: str, agb_key: str, bl_key: str, name: str) -> float:
+    """Уверенность частичного совпадения (как при поиске по одной позиции)"""
+    score = 0
+    if key and key in agb_key:
+        score += 50
+    if any(word in name for word in description.split()):
+        score += 30
+    if key and bl_key and key in bl_key:
+        score += 20
+    return min(score, 100)
+
+
+def match_batch(db: Session, articles: List[Dict[str, Any]]) -> List[Optional[NomenclatureMatch]]:
+    """Сопоставление позиций {contractor_article, description} с номенклатурой
+
+    Возвращает совпадение (или None) для каждой позиции в исходном порядке.
+    """
+    keys = [canonical_article(article.get("contractor_article")) for article in articles]
+    descriptions = [" ".join(str(article.get("description") or "").lower().split()) for article in articles]
+    exact = lookup_exact(db, keys)
+    results: List[Optional[NomenclatureMatch]] = [exact.get(key) for key in keys]
+
+    pending = [i for i, match in enumerate(results) if match is None]
+    key_patterns = sorted({_like_pattern(keys[i]) for i in pending if len(keys[i]) >= MIN_PARTIAL_LENGTH})
+    name_patterns = sorted({_like_pattern(descriptions[i]) for i in pending if len(descriptions[i]) >= MIN_PARTIAL_LENGTH})
+    if not key_patterns and not name_patterns:
+        return results
+
+    agb_key = canonical_article_sql(MatchingNomenclature.agb_article)
+    bl_key = canonical_article_sql(MatchingNomenclature.bl_article)
+    conditions = []
+    if key_patterns:
+        conditions += [agb_key.like(any_(array(key_patterns))), bl_key.like(any_(array(key_patterns)))]
+    if name_patterns:
+        conditions.append(MatchingNomenclature.agb_description.ilike(any_(array(name_patterns))))
+    candidates = [
+        (nomenclature, agb or "", bl or "", " ".join((nomenclature.agb_description or "").lower().split()))
+        for nomenclature, agb, bl in db.execute(
+            select(MatchingNomenclature, agb_key, bl_key)
+            .where(or_(*conditions))
+            .order_by(MatchingNomenclature.id)
+            .limit(MATCH_CANDIDATE_LIMIT)
+        ).all()
+    ]
+
+    for i in pending:
+        key, description = keys[i], descriptions[i]
+        key = key if len(key) >= MIN_PARTIAL_LENGTH else ""
+        description = description if len(description) >= MIN_PARTIAL_LENGTH else ""
+        best: Optional[NomenclatureMatch] = None
+        for nomenclature, agb, bl, name in candidates:
+            if not ((key and (key in agb or key in bl)) or (description and description in name)):
+                continue
+            score = _partial_score(key, description, agb, bl, name)
+            if best is None or score > best.confidence:
+                best = NomenclatureMatch(nomenclature, score, "partial")
+        results[i] = best
+    return results
@@ -0,0 +1,245 @@
+"""
+Асинхронное распознавание текста (OCR) с локальным фоллбэком
+
+Изображение отправляется в OCR-сервис через общий httpx.AsyncClient
+(пул соединений, таймауты, повторы с задержкой, ограничение числа
+одновременных запросов). Если сервис недоступен, Tesseract запускается
+локально в пуле процессов, а не в event loop. Многостраничные TIFF и
+PDF-сканы сервис не обрабатывает (он читает только первый кадр), поэтому
+они распознаются локально постранично и параллельно. Перед Tesseract
+изображение уменьшается и бинаризуется - это заметно сокращает время CPU.
+"""
+
+import asyncio
+import io
+import mimetypes
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+OCR_SERVICE_URL = os.getenv("OCR_SERVICE_URL", "http://localhost:8001")
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "30"))
+OCR_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OCR_CONNECT_TIMEOUT_SECONDS", "5"))
+OCR_RETRIES = int(os.getenv("OCR_RETRIES", "2"))
+OCR_RETRY_BACKOFF_SECONDS = float(os.getenv("OCR_RETRY_BACKOFF_SECONDS", "0.5"))
+OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", "4"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_PAGE_TIMEOUT_SECONDS = float(os.getenv("OCR_PAGE_TIMEOUT_SECONDS", "60"))
+# Длинная сторона страницы после уменьшения (~300 dpi для A4)
+OCR_MAX_SIDE_PX = int(os.getenv("OCR_MAX_SIDE_PX", "3500"))
+OCR_LANG = os.getenv("OCR_LANG", "rus+eng")
+
+MULTIPAGE_EXTENSIONS = (".tif", ".tiff", ".pdf")
+
+
+class OcrError(Exception):
+    """Не удалось распознать текст"""
+
+
+def _otsu_threshold(histogram: List[int]) -> int:
+    """Порог бинаризации по методу Оцу для гистограммы оттенков серого"""
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    background = weighted_background = 0
+    best_threshold, best_variance = 127, 0.0
+    for i, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += i * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = i, variance
+    return best_threshold
+
+
+def prepare_image(image, max_side: int = OCR_MAX_SIDE_PX):
+    """Оттенки серого, уменьшение до max_side и бинаризация"""
+    from PIL import Image, ImageOps
+
+    image = ImageOps.exif_transpose(image).convert("L")
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    image = ImageOps.autocontrast(image)
+    threshold = _otsu_threshold(image.histogram())
+    return image.point(lambda p: 255 if p > threshold else 0, mode="1")
+
+
+def _load_page(file_path: str, page: int):
+    """Открывает страницу многостраничного TIFF или наибольшее изображение страницы PDF"""
+    from PIL import Image
+
+    if Path(file_path).suffix.lower() == ".pdf":
+        from PyPDF2 import PdfReader
+
+        images = PdfReader(file_path).pages[page].images
+        if not images:
+            return None
+        largest = max(images, key=lambda item: len(item.data))
+        return Image.open(io.BytesIO(largest.data))
+
+    image = Image.open(file_path)
+    image.seek(page)
+    return image
+
+
+def _page_count(file_path: str) -> int:
+    """Выполняется в процессе пула"""
+    if Path(file_path).suffix.lower() == ".pdf":
+        from PyPDF2 import PdfReader
+
+        return len(PdfReader(file_path).pages)
+
+    from PIL import Image
+
+    with Image.open(file_path) as image:
+        return getattr(image, "n_frames", 1)
+
+
+def _ocr_page(file_path: str, page: int, lang: str, timeout: float) -> str:
+    """Выполняется в процессе пула: распознаёт одну страницу"""
+    import pytesseract
+
+    try:
+        image = _load_page(file_path, page)
+        if image is None:
+            return ""
+        return pytesseract.image_to_string(prepare_image(image), lang=lang, timeout=timeout).strip()
+    except Exception as e:
+        # Исключения pytesseract не сериализуются и ломают пул процессов
+        raise RuntimeError(f"страница {page + 1}: {e}") from None
+
+
+class OcrClient:
+    """Клиент OCR-сервиса с локальным пулом Tesseract"""
+
+    def __init__(
+        self,
+        service_url: str = OCR_SERVICE_URL,
+        retries: int = OCR_RETRIES,
+        max_concurrency: int = OCR_MAX_CONCURRENCY,
+        workers: int = OCR_WORKERS,
+        lang: str = OCR_LANG
+    ):
+        self.service_url = service_url.rstrip("/")
+        self.retries = max(0, retries)
+        self.max_concurrency = max(1, max_concurrency)
+        self.workers = max(1, workers)
+        self.lang = lang
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.remote_requests = 0
+        self.remote_failures = 0
+        self.local_pages = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(OCR_TIMEOUT_SECONDS, connect=OCR_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: fork процесса с потоками и открытыми соединениями БД небезопасен
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def recognize_remote(self, file_path: str) -> str:
+        """Распознаёт изображение в OCR-сервисе с повторами при сетевых ошибках и 5xx"""
+        client = self._get_client()
+        filename = Path(file_path).name
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        content = await asyncio.to_thread(Path(file_path).read_bytes)
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(OCR_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            try:
+                async with self._semaphore:
+                    self.remote_requests += 1
+                    response = await client.post(
+                        f"{self.service_url}/ocr/", files={"file": (filename, content, content_type)}
+                    )
+                if response.status_code >= 500:
+                    last_error = OcrError(f"OCR сервис вернул {response.status_code}")
+                    continue
+                response.raise_for_status()
+                result = response.json()
+                if not result.get("success"):
+                    raise OcrError("OCR сервис вернул ошибку")
+                return result.get("text", "")
+            except httpx.TransportError as e:
+                last_error = e
+            except httpx.HTTPStatusError as e:
+                # 4xx не повторяем
+                last_error = e
+                break
+        self.remote_failures += 1
+        raise OcrError(f"OCR сервис недоступен: {last_error}")
+
+    async def recognize_local(self, file_path: str) -> str:
+        """Распознаёт файл локальным Tesseract; страницы обрабатываются параллельно"""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        try:
+            pages = await loop.run_in_executor(executor, _page_count, file_path)
+            texts = await asyncio.gather(*[
+                loop.run_in_executor(executor, _ocr_page, file_path, page, self.lang, OCR_PAGE_TIMEOUT_SECONDS)
+                for page in range(pages)
+            ])
+        except Exception as e:
+            raise OcrError(f"Ошибка локального OCR: {e}")
+        self.local_pages += pages
+        return "\f".join(text for text in texts if text)
+
+    async def recognize(self, file_path: str) -> str:
+        """Распознаёт изображение или скан: сервис, при его недоступности - локально"""
+        if Path(file_path).suffix.lower() in MULTIPAGE_EXTENSIONS:
+            return await self.recognize_local(file_path)
+        try:
+            return await self.recognize_remote(file_path)
+        except OcrError as e:
+            print(f"[OCR] {e}, используем локальный Tesseract")
+            return await self.recognize_local(file_path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "service_url": self.service_url,
+            "max_concurrency": self.max_concurrency,
+            "workers": self.workers,
+            "remote_requests": self.remote_requests,
+            "remote_failures": self.remote_failures,
+            "local_pages": self.local_pages,
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+ocr_client = OcrClient()
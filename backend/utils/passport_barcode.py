@@ -0,0 +1,64 @@
+"""
+Векторные штрихкоды Code128 для паспортов ВЭД
+
+Штрихкод рисуется графикой ReportLab прямо в PDF - без PNG через
+python-barcode/Pillow и без записи на диск. Готовые Drawing кэшируются
+в LRU по значению кода: повторная выгрузка того же паспорта не строит
+штрихкод заново.
+"""
+
+import os
+from functools import lru_cache
+from typing import Optional
+
+from reportlab.graphics.barcode import createBarcodeDrawing
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib.units import mm
+
+BARCODE_CACHE_SIZE = int(os.getenv("BARCODE_CACHE_SIZE", "4096"))
+
+BAR_WIDTH = 0.3 * mm
+BAR_HEIGHT = 8 * mm
+MAX_WIDTH = 160 * mm
+
+
+def barcode_value(passport) -> str:
+    """Значение штрихкода паспорта: AGB{артикул}-{номер паспорта}"""
+    nomenclature = passport.nomenclature
+    article = (nomenclature.article if nomenclature else None) or '3501040'
+    return f"AGB{article}-{passport.passport_number or '0000125'}"
+
+
+def _drawing(value: str, bar_width: float) -> Drawing:
+    return createBarcodeDrawing(
+        'Code128',
+        value=value,
+        barWidth=bar_width,
+        barHeight=BAR_HEIGHT,
+        humanReadable=True,
+        fontSize=6,
+        quiet=False,
+    )
+
+
+@lru_cache(maxsize=BARCODE_CACHE_SIZE)
+def barcode_drawing(value: str) -> Optional[Drawing]:
+    """Drawing штрихкода Code128, ужатый по ширине до MAX_WIDTH
+
+    Code128 кодирует только ASCII - для остальных значений возвращает None.
+    """
+    if not value or not value.isascii():
+        return None
+    try:
+        drawing = _drawing(value, BAR_WIDTH)
+        if drawing.width > MAX_WIDTH:
+            drawing = _drawing(value, BAR_WIDTH * MAX_WIDTH / drawing.width)
+        return drawing
+    except Exception as e:
+        print(f"Ошибка при построении штрихкода {value}: {e}")
+        return None
+
+
+def barcode_cache_stats() -> dict:
+    info = barcode_drawing.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
@@ -0,0 +1,143 @@
+"""
+Выделение серийных номеров паспортов ВЭД блоками
+
+Счётчик в passport_counters увеличивается одним атомарным
+INSERT ... ON CONFLICT DO UPDATE ... RETURNING сразу на размер блока, в
+отдельной короткой транзакции. Воркер раздаёт номера из полученного
+диапазона без обращения к БД, поэтому серия из 1000 паспортов стоит один
+round trip, а параллельные воркеры никогда не получают пересекающиеся
+диапазоны. Неиспользованный остаток блока при перезапуске процесса
+теряется - в нумерации возможны пропуски, но не дубликаты.
+"""
+
+import asyncio
+import datetime
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+PASSPORT_SERIAL_BLOCK_SIZE = int(os.getenv("PASSPORT_SERIAL_BLOCK_SIZE", "50"))
+
+RESERVE_SQL = text("""
+    INSERT INTO passport_counters (counter_name, current_value, prefix, suffix)
+    VALUES (:counter_name, :count, '', :suffix)
+    ON CONFLICT (counter_name) DO UPDATE
+        SET current_value = COALESCE(passport_counters.current_value, 0) + :count,
+            updated_at = now()
+    RETURNING current_value
+""")
+
+
+def counter_name_for_year(year: int) -> str:
+    return f"ved_passport_{year}"
+
+
+def format_passport_number(
+    serial: int,
+    year: int,
+    matrix: str,
+    drilling_depth: Optional[str] = None,
+    product_type: Optional[str] = None
+) -> str:
+    """Номер паспорта по правилам нумерации
+
+    Коронки: AGB [Глубина бурения] [Матрица] [Серийный номер] [Год]
+    Расширители и башмаки (и прочее): AGB [Матрица] [Серийный номер] [Год]
+    """
+    serial_number = str(serial).zfill(6)
+    year_suffix = str(year)[-2:]
+    if product_type == "коронка" and drilling_depth:
+        return f"AGB {drilling_depth} {matrix} {serial_number} {year_suffix}"
+    return f"AGB {matrix} {serial_number} {year_suffix}"
+
+
+class PassportSerialAllocator:
+    """Раздаёт серийные номера из заранее зарезервированных блоков"""
+
+    def __init__(self, block_size: int = PASSPORT_SERIAL_BLOCK_SIZE):
+        self.block_size = block_size
+        self._ranges: Dict[str, Deque[Tuple[int, int]]] = {}
+        self._state_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._async_locks: Dict[str, asyncio.Lock] = {}
+        self.round_trips = 0
+
+    def _take(self, name: str, count: int) -> List[int]:
+        """Забирает до count номеров из локальных диапазонов"""
+        taken: List[int] = []
+        with self._state_lock:
+            ranges = self._ranges.setdefault(name, deque())
+            while ranges and len(taken) < count:
+                start, end = ranges[0]
+                n = min(count - len(taken), end - start + 1)
+                taken.extend(range(start, start + n))
+                if start + n > end:
+                    ranges.popleft()
+                else:
+                    ranges[0] = (start + n, end)
+        return taken
+
+    def _store(self, name: str, last_value: int, reserved: int) -> None:
+        with self._state_lock:
+            self._ranges.setdefault(name, deque()).append((last_value - reserved + 1, last_value))
+            self.round_trips += 1
+
+    def _reserve_size(self, missing: int) -> int:
+        return max(self.block_size, missing)
+
+    async def allocate(self, count: int = 1, year: Optional[int] = None) -> List[int]:
+        """Асинхронное выделение count последовательных (в рамках блока) номеров"""
+        from database import async_engine
+
+        year = year or datetime.datetime.now().year
+        name = counter_name_for_year(year)
+        serials = self._take(name, count)
+        if len(serials) == count:
+            return serials
+
+        lock = self._async_locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            serials += self._take(name, count - len(serials))
+            missing = count - len(serials)
+            if missing:
+                reserved = self._reserve_size(missing)
+                # Отдельная транзакция: резерв не откатывается вместе с вызывающим кодом
+                async with async_engine.begin() as conn:
+                    result = await conn.execute(
+                        RESERVE_SQL,
+                        {"counter_name": name, "count": reserved, "suffix": str(year)[-2:]}
+                    )
+                    last_value = result.scalar_one()
+                self._store(name, last_value, reserved)
+                serials += self._take(name, missing)
+        return serials
+
+    def allocate_sync(self, count: int = 1, year: Optional[int] = None) -> List[int]:
+        """Синхронный вариант для обработчиков на обычном Session"""
+        from database import engine
+
+        year = year or datetime.datetime.now().year
+        name = counter_name_for_year(year)
+        serials = self._take(name, count)
+        if len(serials) == count:
+            return serials
+
+        with self._sync_lock:
+            serials += self._take(name, count - len(serials))
+            missing = count - len(serials)
+            if missing:
+                reserved = self._reserve_size(missing)
+                with engine.begin() as conn:
+                    last_value = conn.execute(
+                        RESERVE_SQL,
+                        {"counter_name": name, "count": reserved, "suffix": str(year)[-2:]}
+                    ).scalar_one()
+                self._store(name, last_value, reserved)
+                serials += self._take(name, missing)
+        return serials
+
+
+passport_serial_allocator = PassportSerialAllocator()
@@ -0,0 +1,152 @@
+"""
+Дисковый кэш отрендеренных PDF паспортов ВЭД
+
+Ключ (он же ETag) - хеш от версии шаблона и данных паспорта с
+номенклатурой, включая updated_at. Изменение паспорта, номенклатуры или
+кода шаблона (pdf_generator, pdf_resources, passport_barcode) даёт новый
+ключ, поэтому устаревший файл никогда не отдаётся, а вытесняется по LRU
+при превышении PDF_CACHE_MAX_BYTES. Повторное скачивание паспорта - это
+отдача готового файла с диска.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join("cache", "passport_pdf"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+TEMPLATE_MODULES = ("pdf_generator.py", "pdf_resources.py", "passport_barcode.py")
+
+
+@lru_cache(maxsize=1)
+def template_version() -> str:
+    """Хеш исходного кода шаблона паспорта (считается один раз на процесс)"""
+    digest = hashlib.sha256()
+    utils_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in TEMPLATE_MODULES:
+        with open(os.path.join(utils_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class PassportPdfCache:
+    """Кэш PDF на диске с вытеснением по размеру (LRU по mtime)"""
+
+    def __init__(self, directory: str = PDF_CACHE_DIR, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def etag(self, snapshot: Dict[str, Any]) -> str:
+        payload = json.dumps(snapshot, sort_keys=True, default=str)
+        return hashlib.sha256(f"{template_version()}:{payload}".encode("utf-8")).hexdigest()
+
+    def path_for(self, passport_id: int, etag: str) -> str:
+        return os.path.join(self.directory, f"{passport_id}_{etag}.pdf")
+
+    def get(self, passport_id: int, etag: str) -> Optional[str]:
+        path = self.path_for(passport_id, etag)
+        try:
+            os.utime(path)  # отмечаем использование для LRU
+        except FileNotFoundError:
+            return None
+        self.hits += 1
+        return path
+
+    async def get_or_render(self, snapshot: Dict[str, Any]) -> str:
+        from .pdf_render_pool import pdf_render_pool
+
+        etag = self.etag(snapshot)
+        path = self.get(snapshot["id"], etag)
+        if path:
+            return path
+
+        self.misses += 1
+        rendered = await pdf_render_pool.render_to_file([snapshot])
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path_for(snapshot["id"], etag)
+            # Копия во временный файл рядом и атомарная замена: читатели не видят недописанный PDF
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            shutil.move(rendered, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            pdf_render_pool.cleanup(rendered)
+        self._account(os.path.getsize(path), keep=path)
+        return path
+
+    def _scan(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _account(self, added: int, keep: str) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += added
+            if self._size <= self.max_bytes:
+                return
+            entries = sorted(self._scan())
+            self._size = sum(size for _, size, _ in entries)
+            # Вытесняем самые давно использованные до 90% лимита
+            target = self.max_bytes * 0.9
+            for _, size, path in entries:
+                if self._size <= target:
+                    break
+                if path == keep:
+                    # Только что записанный файл сейчас будет отдан клиенту
+                    continue
+                try:
+                    os.remove(path)
+                    self._size -= size
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+
+    def invalidate(self, passport_id: int) -> None:
+        """Удаляет все закэшированные версии паспорта"""
+        if not os.path.isdir(self.directory):
+            return
+        prefix = f"{passport_id}_"
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(prefix):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            self._size = None
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        with self._lock:
+            self._size = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "max_bytes": self.max_bytes,
+            "size_bytes": self._size,
+            "template_version": template_version(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+passport_pdf_cache = PassportPdfCache()
@@ -10,6 +10,9 @@ from reportlab.pdfbase.ttfonts import TTFont
 # from cairosvg import svg2png  # Временно отключено для локальной разработки
 from reportlab.lib.utils import ImageReader
 
+from .pdf_resources import pdf_resources
+from .passport_barcode import barcode_drawing, barcode_value
+
 
 def create_logo_image():
     """Создает изображение логотипа из PNG файла"""
@@ -202,7 +205,7 @@ e-mail: contact@almazgeobur.ru"""
         return story
     
     # Генерируем штрихкод
-    barcode = f"AGB{nomenclature.article or '3501040'}-{passport.passport_number or '0000125'}"
+    barcode = barcode_drawing(barcode_value(passport))
 
     # Создаем стиль для переноса текста
     wrapped_style = ParagraphStyle(
@@ -252,9 +255,13 @@ e-mail: contact@almazgeobur.ru"""
          "2025"],
         [Paragraph("www.almazgeobur.ru", cell_style), "", "", ""]
     ]
+    if barcode is not None:
+        passport_data.append([barcode, "", "", ""])
 
     # Создаем основную таблицу (без дублирующей рамки) с правильными размерами
     table = Table(passport_data, colWidths=[40*mm, 40*mm, 50*mm, 40*mm])
+    if barcode is not None:
+        table.setStyle(TableStyle([('SPAN', (0, 5), (3, 5))]))
     table.setStyle(TableStyle([
         ('FONTNAME', (0, 0), (-1, -1), normal_font),
         ('FONTSIZE', (0, 0), (-1, -1), 7),  # Уменьшенный размер шрифта
@@ -297,7 +304,7 @@ def generate_passport_pdf(passport):
     return generate_bulk_passports_pdf([passport])
 
 
-def create_passport_content_without_header(passport, normal_font, normal_style):
+def create_passport_content_without_header(passport, normal_font, normal_style, cell_style=None):
     """Создает содержимое паспорта без заголовка для массовой выгрузки"""
     story = []
     
@@ -308,23 +315,24 @@ def create_passport_content_without_header(passport, normal_font, normal_style):
         return story
     
     # Создаем основную таблицу с данными паспорта
-    barcode = f"AGB{nomenclature.article or '3501040'}-{passport.passport_number or '0000125'}"
+    barcode = barcode_drawing(barcode_value(passport))
     
     # Определяем тип продукта на основе данных из БД
     product_type = nomenclature.product_type or "коронка"
     product_type_ru = "Алмазная буровая коронка" if product_type == "коронка" else "Буровой инструмент"
     product_type_en = "Diamond drill bit" if product_type == "коронка" else "Drilling tool"
     
-    # Создаем стиль для ячеек с переносом текста
-    cell_style = ParagraphStyle(
-        'CellText',
-        parent=normal_style,
-        fontSize=7,
-        leading=9,
-        spaceBefore=0,
-        spaceAfter=0,
-        alignment=1,  # CENTER
-    )
+    # Стиль для ячеек с переносом текста (в массовой выгрузке - общий из реестра)
+    if cell_style is None:
+        cell_style = ParagraphStyle(
+            'CellText',
+            parent=normal_style,
+            fontSize=7,
+            leading=9,
+            spaceBefore=0,
+            spaceAfter=0,
+            alignment=1,  # CENTER
+        )
     
     # Данные паспорта с реальными данными из БД (согласно инструкциям) с переносом текста
     passport_data = [
@@ -346,9 +354,13 @@ def create_passport_content_without_header(passport, normal_font, normal_style):
          "2025"],
         [Paragraph("www.almazgeobur.ru", cell_style), "", "", ""]
     ]
+    if barcode is not None:
+        passport_data.append([barcode, "", "", ""])
     
     # Создаем основную таблицу (без дублирующей рамки) с правильными размерами
     table = Table(passport_data, colWidths=[40*mm, 40*mm, 50*mm, 40*mm])
+    if barcode is not None:
+        table.setStyle(TableStyle([('SPAN', (0, 5), (3, 5))]))
     table.setStyle(TableStyle([
         ('FONTNAME', (0, 0), (-1, -1), normal_font),
         ('FONTSIZE', (0, 0), (-1, -1), 7),  # Уменьшенный размер шрифта
@@ -391,11 +403,10 @@ def generate_bulk_passports_pdf(passports):
         bottomMargin=margin
     )
     
-    # Настраиваем шрифты
-    normal_font = setup_cyrillic_fonts()
-    
-    # Создаем стили
-    title_style, subtitle_style, normal_style = create_passport_styles(normal_font)
+    # Шрифт, стили и логотип инициализируются один раз на процесс
+    resources = pdf_resources.get()
+    normal_font = resources.font
+    normal_style = resources.normal_style
     
     story = []
     
@@ -406,9 +417,8 @@ e-mail: contact@almazgeobur.ru"""
 
     # Создаем заголовочную таблицу
     header_data = [[None, contact_info]]
-    logo_img = create_logo_image()
-    if logo_img:
-        logo_cell = Image(logo_img, width=40*mm, height=12*mm)
+    logo_cell = pdf_resources.logo_flowable(40*mm, 12*mm)
+    if logo_cell:
         header_data[0][0] = logo_cell
 
     header_table = Table(header_data, colWidths=[45*mm, 143*mm])
@@ -427,10 +437,10 @@ e-mail: contact@almazgeobur.ru"""
         passport_group = passports[i:i+3]
 
         for j, passport in enumerate(passport_group):
-            print(f"📄 Обрабатываем паспорт {j+1} в группе: {passport.passport_number}")
-            
             # Создаем содержимое паспорта без заголовка
-            passport_content = create_passport_content_without_header(passport, normal_font, normal_style)
+            passport_content = create_passport_content_without_header(
+                passport, normal_font, normal_style, resources.cell_style
+            )
             
             # Создаем полный паспорт с заголовком и общей рамкой
             full_passport = Table([[header_table], [Spacer(1, 8)], [passport_content]], colWidths=[188*mm])
@@ -0,0 +1,158 @@
+"""
+Параллельный рендеринг массового PDF-экспорта паспортов ВЭД
+
+Паспорта делятся на чанки (кратные 3 - по 3 паспорта на страницу), каждый
+чанк рендерится в отдельном процессе пула во временный файл, затем
+чанки склеиваются (тоже в процессе пула) в итоговый PDF на диске. Процесс
+API держит только пути к файлам и ждёт результат асинхронно, поэтому
+экспорт 2000 паспортов занимает все ядра, не раздувает память воркера и
+не блокирует event loop. Готовый файл отдаётся клиенту потоково с диска.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(os.cpu_count() or 2)))
+PDF_RENDER_CHUNK_SIZE = int(os.getenv("PDF_RENDER_CHUNK_SIZE", "150"))
+# Процесс пула перезапускается после N задач, чтобы не копить память ReportLab
+PDF_RENDER_MAX_TASKS_PER_CHILD = int(os.getenv("PDF_RENDER_MAX_TASKS_PER_CHILD", "50"))
+
+PASSPORTS_PER_PAGE = 3
+
+NOMENCLATURE_FIELDS = (
+    "id", "code_1c", "name", "article", "matrix", "drilling_depth", "height", "thread", "product_type", "updated_at"
+)
+PASSPORT_FIELDS = (
+    "id", "passport_number", "title", "description", "status", "order_number", "quantity", "created_at", "updated_at"
+)
+
+
+def passport_snapshot(passport) -> Dict[str, Any]:
+    """Сериализуемая копия паспорта с номенклатурой для передачи в процесс пула"""
+    data = {field: getattr(passport, field, None) for field in PASSPORT_FIELDS}
+    nomenclature = getattr(passport, "nomenclature", None)
+    data["nomenclature"] = (
+        {field: getattr(nomenclature, field, None) for field in NOMENCLATURE_FIELDS}
+        if nomenclature is not None else None
+    )
+    return data
+
+
+def _restore(snapshot: Dict[str, Any]) -> SimpleNamespace:
+    nomenclature = snapshot.get("nomenclature")
+    return SimpleNamespace(**{
+        **snapshot,
+        "nomenclature": SimpleNamespace(**nomenclature) if nomenclature else None,
+    })
+
+
+def _render_chunk(snapshots: List[Dict[str, Any]], out_path: str) -> str:
+    """Выполняется в процессе пула: рендерит чанк паспортов в файл"""
+    from utils.pdf_generator import generate_bulk_passports_pdf
+
+    pdf_bytes = generate_bulk_passports_pdf([_restore(s) for s in snapshots])
+    with open(out_path, "wb") as f:
+        f.write(pdf_bytes)
+    return out_path
+
+
+def _merge_chunks(chunk_paths: List[str], out_path: str) -> str:
+    """Выполняется в процессе пула: склеивает чанки в один PDF"""
+    from PyPDF2 import PdfWriter
+
+    writer = PdfWriter()
+    for path in chunk_paths:
+        writer.append(path)
+    with open(out_path, "wb") as f:
+        writer.write(f)
+    writer.close()
+    return out_path
+
+
+class PdfRenderPool:
+    """Ленивый пул процессов для рендеринга PDF"""
+
+    def __init__(
+        self,
+        workers: int = PDF_RENDER_WORKERS,
+        chunk_size: int = PDF_RENDER_CHUNK_SIZE,
+        max_tasks_per_child: int = PDF_RENDER_MAX_TASKS_PER_CHILD
+    ):
+        self.workers = max(1, workers)
+        # Границы чанков совпадают с границами страниц
+        self.chunk_size = max(PASSPORTS_PER_PAGE, chunk_size - chunk_size % PASSPORTS_PER_PAGE)
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.exports = 0
+        self.failures = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: fork процесса с потоками и открытыми соединениями БД небезопасен
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=self.max_tasks_per_child or None
+                )
+            return self._executor
+
+    def chunks(self, snapshots: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        return [snapshots[i:i + self.chunk_size] for i in range(0, len(snapshots), self.chunk_size)]
+
+    async def render_to_file(self, snapshots: List[Dict[str, Any]]) -> str:
+        """Рендерит паспорта в PDF-файл во временной папке и возвращает путь
+
+        Папку удаляет вызывающий код (cleanup) после отдачи файла.
+        """
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        workdir = tempfile.mkdtemp(prefix="ved_pdf_")
+        try:
+            chunk_paths = await asyncio.gather(*[
+                loop.run_in_executor(executor, _render_chunk, chunk, os.path.join(workdir, f"chunk_{n:05d}.pdf"))
+                for n, chunk in enumerate(self.chunks(snapshots))
+            ])
+            out_path = os.path.join(workdir, "ved_passports.pdf")
+            if len(chunk_paths) == 1:
+                os.replace(chunk_paths[0], out_path)
+            else:
+                await loop.run_in_executor(executor, _merge_chunks, list(chunk_paths), out_path)
+                for path in chunk_paths:
+                    os.remove(path)
+            self.exports += 1
+            return out_path
+        except Exception:
+            self.failures += 1
+            self.cleanup(os.path.join(workdir, "ved_passports.pdf"))
+            raise
+
+    @staticmethod
+    def cleanup(path: str) -> None:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "chunk_size": self.chunk_size,
+            "started": self._executor is not None,
+            "exports": self.exports,
+            "failures": self.failures,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+pdf_render_pool = PdfRenderPool()
@@ -0,0 +1,103 @@
+"""
+Реестр ресурсов PDF-генератора паспортов ВЭД
+
+Шрифт с кириллицей, логотип (ImageReader) и стили абзацев вычисляются
+один раз на процесс при первом обращении и дальше переиспользуются всеми
+экспортами. Раньше каждый экспорт заново перебирал пути к шрифтам,
+регистрировал шрифт, проверял или перегенерировал static/logo.png и
+собирал таблицы стилей.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable
+
+
+class LogoFlowable(Flowable):
+    """Логотип из общего ImageReader (без повторного чтения файла)"""
+
+    def __init__(self, reader: ImageReader, width: float, height: float):
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask="auto")
+
+
+class PdfResources:
+    """Лениво инициализируемые шрифт, логотип и стили (потокобезопасно)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.font: str = "Helvetica"
+        self.title_style: Optional[ParagraphStyle] = None
+        self.subtitle_style: Optional[ParagraphStyle] = None
+        self.normal_style: Optional[ParagraphStyle] = None
+        self.cell_style: Optional[ParagraphStyle] = None
+        self.logo_path: Optional[str] = None
+        self.logo: Optional[ImageReader] = None
+        self.load_ms = 0.0
+
+    def _load(self) -> None:
+        from .pdf_generator import create_logo_image, create_passport_styles, setup_cyrillic_fonts
+
+        started = time.perf_counter()
+        self.font = setup_cyrillic_fonts()
+        self.title_style, self.subtitle_style, self.normal_style = create_passport_styles(self.font)
+        self.cell_style = ParagraphStyle(
+            'CellText',
+            parent=self.normal_style,
+            fontSize=7,
+            leading=9,
+            spaceBefore=0,
+            spaceAfter=0,
+            alignment=1,  # CENTER
+        )
+        self.logo_path = create_logo_image()
+        self.logo = None
+        if self.logo_path:
+            try:
+                self.logo = ImageReader(self.logo_path)
+            except Exception as e:
+                print(f"Ошибка при загрузке логотипа: {e}")
+        self.load_ms = (time.perf_counter() - started) * 1000
+
+    def get(self) -> "PdfResources":
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+        return self
+
+    def logo_flowable(self, width: float, height: float) -> Optional[LogoFlowable]:
+        resources = self.get()
+        if resources.logo is None:
+            return None
+        return LogoFlowable(resources.logo, width, height)
+
+    def reset(self) -> None:
+        """Сбрасывает ресурсы (например, после замены логотипа)"""
+        with self._lock:
+            self._loaded = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._loaded,
+            "font": self.font,
+            "logo_path": self.logo_path,
+            "load_ms": round(self.load_ms, 3),
+        }
+
+
+pdf_resources = PdfResources()
@@ -8,6 +8,8 @@ import logging
 from typing import List, Dict, Any, Tuple, Optional
 from dataclasses import dataclass
 
+from utils.ai_gateway import AiGatewayError, ai_gateway
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -95,42 +97,31 @@ class PolzaAIClient:
     async def _perform_deep_search(self, query: str, article_code: str) -> List[SupplierInfo]:
         """Выполняет глубокий поиск через Perplexity/Sonar Deep Research"""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                # Используем Perplexity API для глубокого поиска
-                response = await client.post(
-                    "https://api.perplexity.ai/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
+            # Perplexity через общий шлюз: пул соединений, лимит параллелизма, повторы
+            content = await ai_gateway.chat_completion(
+                "perplexity",
+                self.api_key,
+                [
+                    {
+                        "role": "system",
+                        "content": "Ты эксперт по поиску поставщиков. Найди только реально существующих поставщиков с верифицированными данными. Если поставщик не существует или данные недостоверны - НЕ включай его в результат."
                     },
-                    json={
-                        "model": "sonar-deep-research",
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": "Ты эксперт по поиску поставщиков. Найди только реально существующих поставщиков с верифицированными данными. Если поставщик не существует или данные недостоверны - НЕ включай его в результат."
-                            },
-                            {
-                                "role": "user",
-                                "content": query
-                            }
-                        ],
-                        "max_tokens": 4000,
-                        "temperature": 0.1
+                    {
+                        "role": "user",
+                        "content": query
                     }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    content = data["choices"][0]["message"]["content"]
-                    
-                    # Парсим результаты
-                    suppliers = self._parse_search_results(content, article_code)
-                    return suppliers
-                else:
-                    logger.error(f"Ошибка API Perplexity: {response.status_code} - {response.text}")
-                    return []
+                ],
+                model="sonar-deep-research",
+                max_tokens=4000,
+                temperature=0.1
+            )
+            
+            # Парсим результаты
+            return self._parse_search_results(content, article_code)
                     
+        except AiGatewayError as e:
+            logger.error(f"Ошибка API Perplexity: {e}")
+            return []
         except Exception as e:
             logger.error(f"Ошибка выполнения поиска: {e}")
             return []
@@ -0,0 +1,79 @@
+"""
+Распознавание табличных заявок (CSV/XLSX) с колонкой артикула
+
+Если в таблице есть колонка, похожая на артикул, строки заявки читаются
+напрямую (utils.tabular_reader) и сопоставляются с номенклатурой без
+ИИ. Модели отправляются только строки без точного совпадения.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from utils.tabular_reader import read_batches
+from utils.text_extraction import TABLE_CELL_SEPARATOR, TABLE_HEADER_PREFIX
+
+ORDER_HEADER_ALIASES: Dict[str, str] = {
+    "артикул": "contractor_article",
+    "артикул контрагента": "contractor_article",
+    "артикул поставщика": "contractor_article",
+    "артикул производителя": "contractor_article",
+    "каталожный номер": "contractor_article",
+    "код товара": "contractor_article",
+    "article": "contractor_article",
+    "part number": "contractor_article",
+    "part no": "contractor_article",
+    "sku": "contractor_article",
+    "contractor_article": "contractor_article",
+
+    "наименование": "description",
+    "наименование товара": "description",
+    "номенклатура": "description",
+    "описание": "description",
+    "товар": "description",
+    "name": "description",
+    "description": "description",
+
+    "количество": "quantity",
+    "кол-во": "quantity",
+    "кол.": "quantity",
+    "qty": "quantity",
+    "quantity": "quantity",
+
+    "ед. изм.": "unit",
+    "ед.изм.": "unit",
+    "ед.": "unit",
+    "единица измерения": "unit",
+    "unit": "unit",
+}
+
+ORDER_FIELDS = ("contractor_article", "description", "quantity", "unit")
+ORDER_FIELD_TITLES = ("Артикул", "Наименование", "Количество", "Ед. изм.")
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    text = str(value).strip()
+    return "" if text.lower() == "nan" else text
+
+
+def read_order_rows(path: str, filename: str) -> Optional[List[Dict[str, Any]]]:
+    """Строки заявки из таблицы или None, если колонки артикула нет"""
+    rows: List[Dict[str, Any]] = []
+    for batch in read_batches(path, filename, aliases=ORDER_HEADER_ALIASES, dtype=str):
+        # Несколько колонок с одним синонимом - берём первую
+        batch = batch.loc[:, ~batch.columns.duplicated()]
+        if "contractor_article" not in batch.columns:
+            return None
+        columns = [name for name in ORDER_FIELDS if name in batch.columns]
+        for values in batch[columns].itertuples(index=False, name=None):
+            row = dict(zip(columns, (_cell(value) for value in values)))
+            if row["contractor_article"] or row.get("description"):
+                rows.append(row)
+    return rows
+
+
+def format_order_lines(rows: List[Dict[str, Any]]) -> str:
+    """Строки для отправки модели: заголовок, затем артикул; описание; количество; ед."""
+    lines = [TABLE_HEADER_PREFIX + TABLE_CELL_SEPARATOR.join(ORDER_FIELD_TITLES)]
+    lines.extend(TABLE_CELL_SEPARATOR.join(row.get(name, "") for name in ORDER_FIELDS) for row in rows)
+    return "\n".join(lines)
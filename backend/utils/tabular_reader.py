@@ -0,0 +1,159 @@
+"""
+Потоковое чтение табличных файлов (CSV/XLSX) порциями
+
+Вместо pd.read_csv / pd.read_excel на весь файл строки отдаются
+DataFrame-порциями по TABULAR_BATCH_SIZE: CSV читается итератором
+pandas (chunksize) с определением кодировки и разделителя по началу
+файла, XLSX - openpyxl в режиме read_only. Заголовки приводятся к
+внутренним именам через словарь синонимов (как HEADER_ALIASES импорта
+номенклатуры). Индекс порций сквозной: это номер строки данных в файле
+(0 - первая строка после заголовка). Полностью пустые строки CSV и XLSX
+пропускаются, но нумерацию не сдвигают, поэтому номер строки в отчёте об
+ошибке совпадает с номером строки в файле. Обработка может начинаться с
+первой порции, пока остальной файл ещё читается.
+"""
+
+import codecs
+import csv
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+TABULAR_BATCH_SIZE = int(os.getenv("TABULAR_BATCH_SIZE", "5000"))
+
+# Порядок как в извлечении текста из файлов: cp1251 для выгрузок из 1С/Excel
+CSV_ENCODINGS = ("utf-8-sig", "cp1251", "latin-1")
+CSV_DELIMITERS = ",;\t|"
+SNIFF_BYTES = 64 * 1024
+
+
+def sniff_encoding(path: str, encodings: Sequence[str] = CSV_ENCODINGS) -> str:
+    """Первая кодировка, в которой начало файла декодируется без ошибок"""
+    with open(path, "rb") as f:
+        sample = f.read(SNIFF_BYTES)
+    for encoding in encodings:
+        try:
+            # final=False: многобайтовый символ может быть обрезан границей выборки
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return encodings[-1]
+
+
+def sniff_delimiter(path: str, encoding: str) -> str:
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+        sample = f.read(SNIFF_BYTES)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def normalize_header(name, aliases: Optional[Dict[str, str]] = None) -> str:
+    """Имя колонки без пробелов по краям; синоним ищется без учёта регистра"""
+    name = "" if name is None else str(name).strip()
+    if aliases:
+        return aliases.get(name.lower(), name)
+    return name
+
+
+def _frame(rows: List[Sequence], columns: List[str], positions: List[int], dtype=None) -> pd.DataFrame:
+    width = len(columns)
+    data = [list(row[:width]) + [None] * (width - len(row)) for row in rows]
+    # dtype=str: без вывода типов, иначе колонка с пустыми ячейками станет float (2 -> "2.0", None -> "nan")
+    return pd.DataFrame(
+        data, columns=columns, index=pd.Index(positions, dtype="int64"),
+        dtype=object if dtype is str else None
+    )
+
+
+def _drop_blank_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Убирает пустые строки, сохраняя номера остальных"""
+    blank = (df.isna() | (df == "")).all(axis=1)
+    return df[~blank] if blank.any() else df
+
+
+def _csv_batches(path: str, batch_size: int, dtype) -> Iterator[pd.DataFrame]:
+    encoding = sniff_encoding(path)
+    reader = pd.read_csv(
+        path,
+        sep=sniff_delimiter(path, encoding),
+        encoding=encoding,
+        dtype=dtype,
+        keep_default_na=dtype is not str,
+        # Пустые строки читаются, чтобы индекс совпадал с номером строки файла
+        skip_blank_lines=False,
+        chunksize=batch_size,
+    )
+    with reader:
+        for batch in reader:
+            yield _drop_blank_rows(batch)
+
+
+def _xlsx_batches(path: str, batch_size: int, sheet: Optional[str], dtype) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(filename=path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        rows = ws.iter_rows(values_only=True)
+        columns = list(next(rows, None) or ())
+        # Пустые колонки справа от заголовка (частый артефакт Excel)
+        while columns and columns[-1] is None:
+            columns.pop()
+        columns = [f"Unnamed: {i}" if value is None else value for i, value in enumerate(columns)]
+        batch: List[Sequence] = []
+        positions: List[int] = []
+        emitted = False
+        for position, row in enumerate(rows):
+            if not any(value is not None and value != "" for value in row):
+                continue
+            batch.append(row)
+            positions.append(position)
+            if len(batch) >= batch_size:
+                yield _frame(batch, columns, positions, dtype)
+                emitted = True
+                batch, positions = [], []
+        if batch or not emitted:
+            yield _frame(batch, columns, positions, dtype)
+    finally:
+        wb.close()
+
+
+def _excel_batches(path: str, batch_size: int, sheet: Optional[str], dtype) -> Iterator[pd.DataFrame]:
+    """Старые .xls и .ods построчно не читаются - читаем целиком и режем на порции"""
+    df = pd.read_excel(path, sheet_name=sheet or 0, dtype=dtype)
+    for start in range(0, max(len(df), 1), batch_size):
+        yield df.iloc[start:start + batch_size]
+
+
+def read_batches(
+    path: str,
+    filename: Optional[str] = None,
+    batch_size: int = TABULAR_BATCH_SIZE,
+    aliases: Optional[Dict[str, str]] = None,
+    dtype=None,
+    sheet: Optional[str] = None
+) -> Iterator[pd.DataFrame]:
+    """Отдаёт таблицу DataFrame-порциями со сквозным индексом строк
+
+    Тип файла определяется по расширению filename (по умолчанию - path).
+    dtype=str - все значения строками (пустые ячейки - пустые строки в CSV).
+    Для файла без строк данных отдаётся одна пустая порция с колонками.
+    """
+    ext = Path(filename or path).suffix.lower()
+    if ext == ".csv":
+        batches = _csv_batches(path, batch_size, dtype)
+    elif ext in (".xlsx", ".xlsm"):
+        batches = _xlsx_batches(path, batch_size, sheet, dtype)
+    else:
+        batches = _excel_batches(path, batch_size, sheet, dtype)
+
+    for batch in batches:
+        batch.columns = [normalize_header(column, aliases) for column in batch.columns]
+        if dtype is str and ext in (".xlsx", ".xlsm"):
+            batch = batch.apply(lambda column: column.map(lambda v: "" if v is None else str(v)))
+        yield batch
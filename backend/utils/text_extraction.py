@@ -0,0 +1,332 @@
+"""
+Извлечение текста из документов в пуле процессов
+
+Разбор PDF/Excel/Word/PowerPoint (PyPDF2, pandas, python-docx,
+python-pptx) занимает CPU на секунды и раньше выполнялся прямо в event
+loop. Теперь каждый файл разбирается в процессе ограниченного пула:
+у процесса есть лимит памяти (RLIMIT_AS), у файла - таймаут. Файлы одного
+запроса разбираются параллельно, результат кешируется по sha256 содержимого.
+
+Таймаут отсчитывается в процессе пула с момента, когда он взял файл, а не
+с постановки в очередь: файлы, ждущие свободного процесса, по таймауту не
+падают. По истечении таймаута SIGALRM прерывает разбор, и процесс остаётся
+в пуле. Если разбор завис в C-коде и сигнал не обработан, через
+TEXT_EXTRACT_KILL_GRACE_SECONDS процесс завершает сам себя (faulthandler).
+Пул после этого пересоздаётся, а файлы других запросов, которые были в
+нём в этот момент, повторно ставятся в новый пул, а не завершаются ошибкой.
+"""
+
+import asyncio
+import faulthandler
+import hashlib
+import multiprocessing
+import os
+import signal
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+TEXT_EXTRACT_WORKERS = int(os.getenv("TEXT_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+TEXT_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("TEXT_EXTRACT_TIMEOUT_SECONDS", "60"))
+# Сколько ждать после таймаута, прежде чем зависший процесс завершит себя
+TEXT_EXTRACT_KILL_GRACE_SECONDS = float(os.getenv("TEXT_EXTRACT_KILL_GRACE_SECONDS", "10"))
+# Повторы файла, задачу которого потерял упавший пул
+TEXT_EXTRACT_BROKEN_POOL_RETRIES = int(os.getenv("TEXT_EXTRACT_BROKEN_POOL_RETRIES", "1"))
+# Лимит адресного пространства процесса пула; 0 - без лимита
+TEXT_EXTRACT_MAX_MEMORY_MB = int(os.getenv("TEXT_EXTRACT_MAX_MEMORY_MB", "1024"))
+TEXT_EXTRACT_MAX_TASKS_PER_CHILD = int(os.getenv("TEXT_EXTRACT_MAX_TASKS_PER_CHILD", "20"))
+TEXT_EXTRACT_CACHE_SIZE = int(os.getenv("TEXT_EXTRACT_CACHE_SIZE", "256"))
+
+# Типы документов, которые разбираются в пуле (изображения идут в OCR)
+DOCUMENT_EXTENSIONS = {
+    "pdf": (".pdf",),
+    "excel": (".xlsx", ".xls", ".csv", ".ods"),
+    "word": (".doc", ".docx", ".odt", ".rtf"),
+    "powerpoint": (".ppt", ".pptx", ".odp"),
+    "text": (".txt",),
+}
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Первая строка текста таблицы - её заголовок; при нарезке текста для ИИ
+# он повторяется в начале каждой части (utils.ai_article_extraction)
+TABLE_HEADER_PREFIX = "Колонки: "
+TABLE_CELL_SEPARATOR = "; "
+
+
+class TextExtractionError(Exception):
+    """Не удалось извлечь текст из файла"""
+
+
+class ExtractionTimeout(BaseException):
+    """Таймаут разбора в процессе пула
+
+    BaseException: обработчики except Exception внутри библиотек не должны
+    его перехватывать.
+    """
+
+
+def document_kind(filename: str) -> Optional[str]:
+    ext = Path(filename).suffix.lower()
+    for kind, extensions in DOCUMENT_EXTENSIONS.items():
+        if ext in extensions:
+            return kind
+    return None
+
+
+def _init_worker(max_memory_mb: int) -> None:
+    """Выполняется при старте процесса пула: ограничивает его память"""
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"[TEXT_EXTRACT] Не удалось установить лимит памяти: {e}")
+
+
+def _extract_pdf(file_path: str) -> str:
+    import PyPDF2
+
+    with open(file_path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        # \f между страницами - граница для нарезки текста перед отправкой в ИИ
+        return "\f".join((page.extract_text() or "") for page in reader.pages)
+
+
+def _table_cell(value) -> str:
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return " ".join(str(value).split())
+
+
+def _extract_excel(file_path: str) -> str:
+    """Таблица построчно: строка заголовка, затем «значение; значение; ...» на строку"""
+    from utils.tabular_reader import read_batches
+
+    lines: List[str] = []
+    for batch in read_batches(file_path, dtype=str):
+        if not lines:
+            header = ["" if str(column).startswith("Unnamed: ") else _table_cell(column) for column in batch.columns]
+            lines.append(TABLE_HEADER_PREFIX + TABLE_CELL_SEPARATOR.join(header))
+        for row in batch.itertuples(index=False, name=None):
+            line = TABLE_CELL_SEPARATOR.join(_table_cell(value) for value in row).rstrip("; ")
+            if line:
+                lines.append(line)
+    return "\n".join(lines)
+
+
+def _extract_word(file_path: str) -> str:
+    from docx import Document
+
+    doc = Document(file_path)
+    return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
+
+
+def _extract_powerpoint(file_path: str) -> str:
+    from pptx import Presentation
+
+    prs = Presentation(file_path)
+    return "\n".join(
+        shape.text for slide in prs.slides for shape in slide.shapes if hasattr(shape, "text")
+    ).strip()
+
+
+def _extract_text_file(file_path: str) -> str:
+    with open(file_path, "rb") as file:
+        content = file.read()
+    for encoding in ("utf-8", "cp1251"):
+        try:
+            return content.decode(encoding).strip()
+        except UnicodeDecodeError:
+            continue
+    return content.decode("latin-1").strip()
+
+
+EXTRACTORS = {
+    "pdf": _extract_pdf,
+    "excel": _extract_excel,
+    "word": _extract_word,
+    "powerpoint": _extract_powerpoint,
+    "text": _extract_text_file,
+}
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _extract(kind: str, file_path: str, timeout: float = 0, kill_grace: float = 0) -> str:
+    """Выполняется в процессе пула; таймаут считается с начала разбора"""
+    if timeout > 0:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        # Разбор, застрявший в C-коде, сигнал не прервёт - процесс завершится сам
+        faulthandler.dump_traceback_later(timeout + kill_grace, exit=True)
+    try:
+        return EXTRACTORS[kind](file_path)
+    except (MemoryError, ExtractionTimeout):
+        raise
+    except Exception as e:
+        # Не все исключения библиотек сериализуются, а такое ломает пул процессов
+        raise RuntimeError(str(e)) from None
+    finally:
+        if timeout > 0:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            faulthandler.cancel_dump_traceback_later()
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TextExtractionPool:
+    """Ленивый пул процессов для извлечения текста с LRU-кешем по хешу содержимого"""
+
+    def __init__(
+        self,
+        workers: int = TEXT_EXTRACT_WORKERS,
+        timeout: float = TEXT_EXTRACT_TIMEOUT_SECONDS,
+        kill_grace: float = TEXT_EXTRACT_KILL_GRACE_SECONDS,
+        broken_pool_retries: int = TEXT_EXTRACT_BROKEN_POOL_RETRIES,
+        max_memory_mb: int = TEXT_EXTRACT_MAX_MEMORY_MB,
+        max_tasks_per_child: int = TEXT_EXTRACT_MAX_TASKS_PER_CHILD,
+        cache_size: int = TEXT_EXTRACT_CACHE_SIZE
+    ):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.kill_grace = kill_grace
+        self.broken_pool_retries = broken_pool_retries
+        self.max_memory_mb = max_memory_mb
+        self.max_tasks_per_child = max_tasks_per_child
+        self.cache_size = cache_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self.extracted = 0
+        self.cache_hits = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.restarts = 0
+        self.retries = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: fork процесса с потоками и открытыми соединениями БД небезопасен
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.max_memory_mb,),
+                    max_tasks_per_child=self.max_tasks_per_child or None
+                )
+            return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """Пересоздаёт пул, сломанный завершившимся процессом"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self.restarts += 1
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+            return text
+
+    def _cache_put(self, key: Tuple[str, str], text: str) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def extract(self, file_path: str, filename: Optional[str] = None, content_hash: Optional[str] = None) -> str:
+        """Извлекает текст из документа; тип определяется по расширению filename
+
+        content_hash - уже посчитанный SHA-256 файла (например, при приёме загрузки).
+        """
+        filename = filename or file_path
+        kind = document_kind(filename)
+        if kind is None:
+            raise TextExtractionError(f"Неподдерживаемый тип файла: {Path(filename).suffix.lower()}")
+
+        key = (content_hash or await asyncio.to_thread(file_sha256, file_path), kind)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            executor = self._get_executor()
+            try:
+                text = await loop.run_in_executor(
+                    executor, _extract, kind, file_path, self.timeout, self.kill_grace
+                )
+                break
+            except ExtractionTimeout:
+                self.timeouts += 1
+                raise TextExtractionError(f"Превышено время извлечения текста ({self.timeout:g} с): {filename}")
+            except BrokenProcessPool:
+                # Процесс упал (лимит памяти, завис и завершил себя) - пул теряет
+                # все задачи в нём, в том числе чужие; их повторяем в новом пуле
+                self._restart(executor)
+                if attempt >= self.broken_pool_retries:
+                    self.failures += 1
+                    raise TextExtractionError(f"Процесс извлечения текста аварийно завершился: {filename}")
+                attempt += 1
+                self.retries += 1
+            except MemoryError:
+                self.failures += 1
+                raise TextExtractionError(f"Превышен лимит памяти при извлечении текста: {filename}")
+            except Exception as e:
+                self.failures += 1
+                raise TextExtractionError(f"Ошибка извлечения текста из {filename}: {e}")
+
+        self.extracted += 1
+        self._cache_put(key, text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "started": self._executor is not None,
+            "extracted": self.extracted,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self._cache),
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "restarts": self.restarts,
+            "retries": self.retries,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+text_extraction_pool = TextExtractionPool()
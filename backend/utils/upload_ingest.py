@@ -0,0 +1,150 @@
+"""
+Потоковый приём загружаемых файлов
+
+UploadFile читается порциями по UPLOAD_CHUNK_SIZE и сразу пишется во
+временный файл; по пути считается SHA-256 и проверяется лимит размера,
+поэтому пиковая память не зависит от размера файла, а слишком большой
+файл отклоняется (413), не дочитываясь до конца. Парсеры получают путь
+к файлу. При указании dest_dir файл сохраняется под именем
+{sha256}{расширение}: повторная загрузка того же содержимого не пишет
+новую копию. С sharded=True файл кладётся в подкаталоги по первым
+символам хеша (ab/cd/abcd...{расширение}), см. utils.blob_store.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from fastapi import HTTPException, UploadFile, status
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+
+
+class UploadTooLarge(HTTPException):
+    """Файл превышает допустимый размер"""
+
+    def __init__(self, filename: str, max_bytes: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Файл {filename} превышает допустимый размер {max_bytes // (1024 * 1024)} МБ",
+        )
+
+
+@dataclass
+class IngestedUpload:
+    """Принятый файл на диске"""
+    path: str
+    filename: str
+    sha256: str
+    size: int
+    deduplicated: bool = False
+    temporary: bool = True
+
+    @property
+    def extension(self) -> str:
+        return Path(self.filename).suffix.lower()
+
+    def cleanup(self) -> None:
+        """Удаляет временный файл (файлы в dest_dir остаются)"""
+        if self.temporary:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def _open_temp(filename: str, directory: Optional[Union[str, Path]]):
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=Path(filename or "").suffix.lower(), dir=directory)
+    return os.fdopen(fd, "wb"), path
+
+
+def blob_path(root: Union[str, Path], digest: str, extension: str = "") -> Path:
+    """Путь файла в каталоге, разбитом на подкаталоги по хешу"""
+    return Path(root) / digest[:2] / digest[2:4] / f"{digest}{extension}"
+
+
+def _finalize(
+    tmp_path: str,
+    filename: str,
+    digest: str,
+    size: int,
+    dest_dir: Optional[Union[str, Path]],
+    sharded: bool = False
+) -> IngestedUpload:
+    if dest_dir is None:
+        return IngestedUpload(path=tmp_path, filename=filename, sha256=digest, size=size)
+    extension = Path(filename).suffix.lower()
+    if sharded:
+        final_path = blob_path(dest_dir, digest, extension)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+    else:
+        final_path = Path(dest_dir) / f"{digest}{extension}"
+    if final_path.exists():
+        os.remove(tmp_path)
+        # Свежая mtime - сборщик мусора не удалит файл, пока ссылка на него не записана
+        os.utime(final_path)
+        return IngestedUpload(path=str(final_path), filename=filename, sha256=digest, size=size,
+                              deduplicated=True, temporary=False)
+    os.replace(tmp_path, final_path)
+    return IngestedUpload(path=str(final_path), filename=filename, sha256=digest, size=size, temporary=False)
+
+
+async def ingest_upload(
+    upload: UploadFile,
+    dest_dir: Optional[Union[str, Path]] = None,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    sharded: bool = False
+) -> IngestedUpload:
+    """Потоково сохраняет UploadFile на диск (для async-маршрутов)"""
+    filename = upload.filename or "upload"
+    if dest_dir is not None:
+        Path(dest_dir).mkdir(parents=True, exist_ok=True)
+    out, tmp_path = _open_temp(filename, dest_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with out:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(filename, max_bytes)
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+        return await asyncio.to_thread(_finalize, tmp_path, filename, digest.hexdigest(), size, dest_dir, sharded)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def ingest_upload_sync(
+    upload: UploadFile,
+    dest_dir: Optional[Union[str, Path]] = None,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    sharded: bool = False
+) -> IngestedUpload:
+    """То же для синхронных маршрутов (выполняются в threadpool)"""
+    filename = upload.filename or "upload"
+    if dest_dir is not None:
+        Path(dest_dir).mkdir(parents=True, exist_ok=True)
+    out, tmp_path = _open_temp(filename, dest_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with out:
+            while chunk := upload.file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(filename, max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+        return _finalize(tmp_path, filename, digest.hexdigest(), size, dest_dir, sharded)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,156 @@
+"""
+Колоночный импорт ВЭД паспортов из CSV/Excel
+
+Вместо df.iterrows() и ORM-объекта на строку все проверки выполняются
+над целыми колонками pandas: обязательные поля, количество, статус,
+дубликаты в файле и в БД. Номенклатура сопоставляется одним merge по
+nomenclature_id, code_1c или артикулу (без подстановки id=1 по умолчанию).
+Файл читается порциями по VED_IMPORT_BATCH_SIZE (utils.tabular_reader).
+Строки с ошибками попадают в отчёт с номером строки файла, остальные
+вставляются через COPY порциями по VED_IMPORT_COPY_CHUNK_SIZE.
+"""
+
+import io
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import VEDNomenclature, VedPassport
+from utils.tabular_reader import read_batches
+
+VED_IMPORT_COPY_CHUNK_SIZE = int(os.getenv("VED_IMPORT_COPY_CHUNK_SIZE", "20000"))
+VED_IMPORT_BATCH_SIZE = int(os.getenv("VED_IMPORT_BATCH_SIZE", "20000"))
+
+REQUIRED_COLUMNS = ["passport_number", "order_number"]
+ALLOWED_STATUSES = {"active", "archived", "draft"}
+COPY_COLUMNS = [
+    "passport_number", "order_number", "title", "description",
+    "quantity", "status", "created_by", "nomenclature_id",
+]
+# Номер строки в файле: заголовок - первая строка, данные с второй
+FILE_ROW_OFFSET = 2
+
+
+def read_table_batches(path: str, filename: str) -> Iterator[pd.DataFrame]:
+    """Читает CSV/Excel с диска порциями как строки - приведение типов делаем сами по колонкам"""
+    return read_batches(path, filename, batch_size=VED_IMPORT_BATCH_SIZE, dtype=str)
+
+
+def _text_column(df: pd.DataFrame, name: str) -> pd.Series:
+    if name not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    column = df[name].astype("string").str.strip()
+    return column.mask(column == "")
+
+
+def _add_errors(errors: pd.Series, mask: pd.Series, message: str) -> None:
+    """Дописывает сообщение к ошибкам строк из маски (in place)"""
+    mask = mask.fillna(False).astype(bool)
+    if mask.any():
+        errors[mask] = errors[mask] + message + "; "
+
+
+def load_nomenclature(db: Session) -> pd.DataFrame:
+    rows = db.execute(
+        select(VEDNomenclature.id, VEDNomenclature.code_1c, VEDNomenclature.article)
+        .where(VEDNomenclature.is_active == True)
+    ).all()
+    return pd.DataFrame(rows, columns=["id", "code_1c", "article"])
+
+
+def _resolve_nomenclature(frame: pd.DataFrame, nomenclature: pd.DataFrame) -> pd.Series:
+    """nomenclature_id для каждой строки: по id, затем по коду 1С, затем по уникальному артикулу"""
+    known_ids = pd.Series(nomenclature["id"].to_numpy(), index=nomenclature["id"].to_numpy())
+    by_code = pd.Series(nomenclature["id"].to_numpy(), index=nomenclature["code_1c"].astype(str).str.strip().to_numpy())
+    unique_articles = nomenclature.drop_duplicates("article", keep=False)
+    by_article = pd.Series(unique_articles["id"].to_numpy(), index=unique_articles["article"].astype(str).str.strip().to_numpy())
+
+    resolved = frame["nomenclature_id"].map(known_ids)
+    resolved = resolved.fillna(frame["code_1c"].map(by_code))
+    resolved = resolved.fillna(frame["article"].map(by_article))
+    return resolved
+
+
+def prepare_passports(
+    df: pd.DataFrame,
+    db: Session,
+    user_id: int,
+    nomenclature: Optional[pd.DataFrame] = None,
+    seen_numbers: Optional[set] = None
+) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """Проверяет и приводит порцию загрузки; возвращает строки для COPY и список ошибок
+
+    seen_numbers - номера паспортов из предыдущих порций файла (дополняется).
+    """
+    frame = pd.DataFrame(index=df.index)
+    for name in ("passport_number", "order_number", "title", "description", "status", "code_1c", "article"):
+        frame[name] = _text_column(df, name)
+    errors = pd.Series("", index=df.index, dtype=object)
+
+    for name in REQUIRED_COLUMNS:
+        _add_errors(errors, frame[name].isna(), f"не заполнено поле {name}")
+
+    raw_quantity = _text_column(df, "quantity")
+    quantity = pd.to_numeric(raw_quantity, errors="coerce")
+    _add_errors(errors, raw_quantity.notna() & (quantity.isna() | (quantity < 1) | (quantity % 1 != 0)),
+                "quantity должно быть целым числом >= 1")
+    frame["quantity"] = quantity.where(quantity.notna(), 1)
+
+    frame["status"] = frame["status"].fillna("active").str.lower()
+    _add_errors(errors, ~frame["status"].isin(ALLOWED_STATUSES),
+                f"недопустимый статус (допустимы: {', '.join(sorted(ALLOWED_STATUSES))})")
+
+    raw_nomenclature_id = _text_column(df, "nomenclature_id")
+    frame["nomenclature_id"] = pd.to_numeric(raw_nomenclature_id, errors="coerce")
+    _add_errors(errors, raw_nomenclature_id.notna() & frame["nomenclature_id"].isna(), "nomenclature_id должен быть числом")
+
+    if nomenclature is None:
+        nomenclature = load_nomenclature(db)
+    frame["nomenclature_id"] = _resolve_nomenclature(frame, nomenclature)
+    no_reference = raw_nomenclature_id.isna() & frame["code_1c"].isna() & frame["article"].isna()
+    _add_errors(errors, no_reference, "не указана номенклатура (nomenclature_id, code_1c или article)")
+    _add_errors(errors, ~no_reference & frame["nomenclature_id"].isna(), "номенклатура не найдена")
+
+    numbers = frame["passport_number"]
+    seen_numbers = set() if seen_numbers is None else seen_numbers
+    _add_errors(errors, numbers.notna() & (numbers.duplicated(keep="first") | numbers.isin(seen_numbers)),
+                "номер паспорта повторяется в файле")
+    unique_numbers = numbers.dropna().unique().tolist()
+    existing = set()
+    for start in range(0, len(unique_numbers), VED_IMPORT_COPY_CHUNK_SIZE):
+        chunk = unique_numbers[start:start + VED_IMPORT_COPY_CHUNK_SIZE]
+        existing.update(db.execute(
+            select(VedPassport.passport_number).where(VedPassport.passport_number.in_(chunk))
+        ).scalars())
+    _add_errors(errors, numbers.isin(existing), "паспорт с таким номером уже существует")
+    seen_numbers.update(unique_numbers)
+
+    invalid = errors != ""
+    # Индекс порций сквозной (utils.tabular_reader) - это позиция строки в файле
+    error_rows = [
+        {"row": int(position) + FILE_ROW_OFFSET, "error": message.rstrip("; ")}
+        for position, message in errors[invalid].items()
+    ]
+
+    valid = frame.loc[~invalid].copy()
+    valid["quantity"] = valid["quantity"].astype("int64")
+    valid["nomenclature_id"] = valid["nomenclature_id"].astype("int64")
+    valid["created_by"] = user_id
+    return valid[COPY_COLUMNS], error_rows
+
+
+def copy_passports(db: Session, valid: pd.DataFrame) -> int:
+    """Вставляет подготовленные строки через COPY в транзакции сессии"""
+    raw_connection = db.connection().connection
+    copy_sql = f"COPY ved_passports ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    with raw_connection.cursor() as cursor:
+        for start in range(0, len(valid), VED_IMPORT_COPY_CHUNK_SIZE):
+            buffer = io.StringIO()
+            # Пустые ячейки без кавычек COPY воспринимает как NULL
+            valid.iloc[start:start + VED_IMPORT_COPY_CHUNK_SIZE].to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+    return len(valid)
@@ -81,6 +81,9 @@ interface SupplierArticle {
   last_price_update?: string
 }
 
+const SEARCH_POLL_INTERVAL_MS = 2000
+const SEARCH_POLL_TIMEOUT_MS = 5 * 60 * 1000
+
 export default function ArticleSearchManager() {
   const { token } = useAuth()
   const [activeTab, setActiveTab] = useState<'search' | 'results' | 'suppliers'>('search')
@@ -260,6 +263,28 @@ export default function ArticleSearchManager() {
     setModalResults([])
   }
 
+  // Поиск выполняется фоновой задачей: ждём завершения запроса опросом
+  const waitForSearchRequest = async (requestId: number): Promise<ArticleSearchRequest> => {
+    const deadline = Date.now() + SEARCH_POLL_TIMEOUT_MS
+    while (Date.now() < deadline) {
+      const response = await fetch(getApiUrl() + `/api/v3/article-search/requests/${requestId}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json'
+        }
+      })
+      if (!response.ok) {
+        throw new Error('Ошибка загрузки результатов поиска')
+      }
+      const data: ArticleSearchRequest = await response.json()
+      if (data.status === 'completed' || data.status === 'failed') {
+        return data
+      }
+      await new Promise(resolve => setTimeout(resolve, SEARCH_POLL_INTERVAL_MS))
+    }
+    throw new Error('Поиск выполняется слишком долго, проверьте результаты позже')
+  }
+
   const retrySearchForArticle = async (articleCode: string) => {
     try {
       setIsSearching(true)
@@ -278,23 +303,28 @@ export default function ArticleSearchManager() {
       })
 
       if (response.ok) {
-        const data = await response.json()
+        // Ответ 202: { job_id, status_url, request_id }
+        const job = await response.json()
+        const data = await waitForSearchRequest(job.request_id)
+        await loadSearchRequests()
+        if (data.status === 'failed') {
+          setMessage({ type: 'error', text: 'Ошибка повторного поиска' })
+          return
+        }
         // Обновляем результаты в модальном окне
-        if (data.results && data.results.length > 0) {
-          const articleResult = data.results.find((r: any) => r.article_code === articleCode)
-          if (articleResult) {
-            setModalResults(data.results)
-          }
+        const articleResult = data.results?.find(r => r.article_code === articleCode)
+        if (articleResult && data.results) {
+          setModalResults(data.results)
+          setMessage({ type: 'success', text: 'Повторный поиск выполнен успешно' })
+        } else {
+          setMessage({ type: 'error', text: 'Повторный поиск не нашёл поставщиков' })
         }
-        // Перезагружаем список запросов
-        await loadSearchRequests()
-        setMessage({ type: 'success', text: 'Повторный поиск выполнен успешно' })
       } else {
         setMessage({ type: 'error', text: 'Ошибка повторного поиска' })
       }
     } catch (error) {
       console.error('Ошибка повторного поиска:', error)
-      setMessage({ type: 'error', text: 'Ошибка повторного поиска' })
+      setMessage({ type: 'error', text: error instanceof Error ? error.message : 'Ошибка повторного поиска' })
     } finally {
       setIsSearching(false)
     }